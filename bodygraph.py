@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+BODYGRAPH BIT TABLES
+Gates, channels and centers as bitmasks for vectorized chart math
+
+Encoding:
+- Gate g (1-64)      → bit g-1 of a uint64 gate mask
+- Channel c (0-35)   → bit c of a uint64 channel mask (index into CHANNELS)
+- Center (0-8)       → bit of a uint16 center mask (index into CENTERS)
+- Link l (0-16)      → bit l of a uint32 link mask (index into LINKS): the
+                       center pairs joined by at least one channel
+
+Center names match the enriched KB's `centers` keys.
+
+Definition: gates → complete channels (byte LUTs) → links (channel LUTs)
+→ type / authority / split from one 2^17-entry table per property, built
+at import by bitmask closure over every possible set of links.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# ═══════════════════════════════════════════════════════════════════
+# STATIC TABLES
+# ═══════════════════════════════════════════════════════════════════
+
+CENTERS = [
+    'Head', 'Ajna', 'Throat', 'G (Identity)', 'Heart (Ego)',
+    'Splenic', 'Sacral', 'Solar Plexus', 'Root (Base)'
+]
+
+CENTER_GATES = {
+    'Head': [64, 61, 63],
+    'Ajna': [47, 24, 4, 17, 43, 11],
+    'Throat': [62, 23, 56, 35, 12, 45, 33, 8, 31, 20, 16],
+    'G (Identity)': [1, 13, 25, 46, 2, 15, 10, 7],
+    'Heart (Ego)': [21, 40, 26, 51],
+    'Splenic': [48, 57, 44, 50, 32, 28, 18],
+    'Sacral': [5, 14, 29, 59, 9, 3, 42, 27, 34],
+    'Solar Plexus': [6, 37, 22, 36, 30, 55, 49],
+    'Root (Base)': [58, 38, 54, 53, 60, 52, 19, 39, 41]
+}
+
+GATE_CENTERS = {gate: center for center, gates in CENTER_GATES.items() for gate in gates}
+
+# The 36 channels, each as (lower gate, higher gate)
+CHANNELS = [
+    (1, 8), (2, 14), (3, 60), (4, 63), (5, 15), (6, 59),
+    (7, 31), (9, 52), (10, 20), (10, 34), (10, 57), (11, 56),
+    (12, 22), (13, 33), (16, 48), (17, 62), (18, 58), (19, 49),
+    (20, 34), (20, 57), (21, 45), (23, 43), (24, 61), (25, 51),
+    (26, 44), (27, 50), (28, 38), (29, 46), (30, 41), (32, 54),
+    (34, 57), (35, 36), (37, 40), (39, 55), (42, 53), (47, 64)
+]
+
+CENTER_INDEX = {name: i for i, name in enumerate(CENTERS)}
+
+# ═══════════════════════════════════════════════════════════════════
+# DERIVED BIT TABLES
+# ═══════════════════════════════════════════════════════════════════
+
+ONE = np.uint64(1)
+
+# GATE_BITS[g] is the mask for gate g (index 0 unused)
+GATE_BITS = np.array([0] + [1 << (g - 1) for g in range(1, 65)], dtype=np.uint64)
+
+CHANNEL_LO_BITS = np.array([1 << (a - 1) for a, _ in CHANNELS], dtype=np.uint64)
+CHANNEL_HI_BITS = np.array([1 << (b - 1) for _, b in CHANNELS], dtype=np.uint64)
+
+CHANNEL_CENTER_MASKS = np.array([
+    (1 << CENTER_INDEX[GATE_CENTERS[a]]) | (1 << CENTER_INDEX[GATE_CENTERS[b]])
+    for a, b in CHANNELS
+], dtype=np.uint16)
+
+# CENTER_CHANNEL_MASKS[i]: channels touching center i (a center is defined iff any is complete)
+CENTER_CHANNEL_MASKS = np.array([
+    sum(1 << c for c, (a, b) in enumerate(CHANNELS)
+        if CENTER_INDEX[GATE_CENTERS[a]] == i or CENTER_INDEX[GATE_CENTERS[b]] == i)
+    for i in range(len(CENTERS))
+], dtype=np.uint64)
+
+
+def _popcount_lut(values: np.ndarray) -> np.ndarray:
+    as_bytes = np.ascontiguousarray(values, dtype=np.uint64).view(np.uint8)
+    counts = _BYTE_POPCOUNT[as_bytes].reshape(values.shape + (8,))
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# numpy >= 2.0 has a native popcount ufunc
+popcount64 = getattr(np, 'bitwise_count', _popcount_lut)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# MASK OPERATIONS
+# ═══════════════════════════════════════════════════════════════════
+
+def gate_mask(gates: Iterable[int]) -> int:
+    """Bitmask for a collection of gate numbers"""
+    mask = 0
+    for gate in gates:
+        mask |= 1 << (int(gate) - 1)
+    return mask
+
+
+def mask_gates(mask: int) -> List[int]:
+    """Gate numbers set in a mask"""
+    mask = int(mask)
+    return [g for g in range(1, 65) if mask >> (g - 1) & 1]
+
+
+def channel_halves(gate_masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per chart: (complete, lower-gate-only, higher-gate-only) channel masks
+
+    Two charts form an electromagnetic channel where one holds only the
+    lower gate and the other only the higher: (lo_a & hi_b) | (hi_a & lo_b).
+    """
+    gate_masks = np.asarray(gate_masks, dtype=np.uint64)
+    full = np.zeros(gate_masks.shape, dtype=np.uint64)
+    lo_only = np.zeros(gate_masks.shape, dtype=np.uint64)
+    hi_only = np.zeros(gate_masks.shape, dtype=np.uint64)
+
+    for c in range(len(CHANNELS)):
+        has_lo = (gate_masks & CHANNEL_LO_BITS[c]) != 0
+        has_hi = (gate_masks & CHANNEL_HI_BITS[c]) != 0
+        bit = ONE << np.uint64(c)
+        full |= np.where(has_lo & has_hi, bit, np.uint64(0))
+        lo_only |= np.where(has_lo & ~has_hi, bit, np.uint64(0))
+        hi_only |= np.where(has_hi & ~has_lo, bit, np.uint64(0))
+
+    return full, lo_only, hi_only
+
+
+def centers_from_channels(channel_masks: np.ndarray) -> np.ndarray:
+    """Defined-center masks (uint16) from complete-channel masks"""
+    channel_masks = np.asarray(channel_masks, dtype=np.uint64)
+    centers = np.zeros(channel_masks.shape, dtype=np.uint16)
+    for i in range(len(CENTERS)):
+        defined = (channel_masks & CENTER_CHANNEL_MASKS[i]) != 0
+        centers |= np.where(defined, np.uint16(1 << i), np.uint16(0))
+    return centers
+
+
+# Channel-mask → center-mask lookup, 18 channel bits at a time (2 tables cover all 36)
+CHANNEL_CENTER_LUTS = np.zeros((2, 1 << 18), dtype=np.uint16)
+for _half in range(2):
+    for _c in range(18):
+        _has_channel = (np.arange(1 << 18) >> _c & 1).astype(bool)
+        CHANNEL_CENTER_LUTS[_half][_has_channel] |= CHANNEL_CENTER_MASKS[_half * 18 + _c]
+
+_LOW_18 = np.uint64((1 << 18) - 1)
+_SHIFT_18 = np.uint64(18)
+
+
+def centers_from_channels_lut(channel_masks: np.ndarray) -> np.ndarray:
+    """Same as centers_from_channels via two table gathers (much faster on large blocks)"""
+    channel_masks = np.asarray(channel_masks, dtype=np.uint64)
+    return CHANNEL_CENTER_LUTS[0][channel_masks & _LOW_18] | CHANNEL_CENTER_LUTS[1][channel_masks >> _SHIFT_18]
+
+
+def mask_centers(mask: int) -> List[str]:
+    """Center names set in a center mask"""
+    return [name for i, name in enumerate(CENTERS) if int(mask) >> i & 1]
+
+
+def mask_channels(mask: int) -> List[Tuple[int, int]]:
+    """Channels set in a channel mask"""
+    return [channel for c, channel in enumerate(CHANNELS) if int(mask) >> c & 1]
+
+
+def chart_gates(birth_data: Dict) -> List[int]:
+    """
+    Activated gates of a chart: birth_data['fields'], plus the 'personality'
+    and 'design' sides when present (design_solver.DesignSolver.chart)
+    """
+    gates = []
+    for side in ('fields', 'personality', 'design'):
+        fields = birth_data.get(side) or {}
+        gates.extend(field['gate'] for field in fields.values() if field.get('gate'))
+    return gates
+
+
+# ═══════════════════════════════════════════════════════════════════
+# DEFINITION: TYPE, AUTHORITY, SPLIT
+# ═══════════════════════════════════════════════════════════════════
+
+TYPES = ['Reflector', 'Manifestor', 'Generator', 'Manifesting Generator', 'Projector']
+
+AUTHORITIES = [
+    'Emotional', 'Sacral', 'Splenic', 'Ego Manifested', 'Ego Projected',
+    'Self-Projected', 'Mental', 'Lunar'
+]
+
+SPLITS = ['None', 'Single', 'Split', 'Triple Split', 'Quadruple Split']
+
+MOTORS = ['Heart (Ego)', 'Solar Plexus', 'Root (Base)', 'Sacral']
+
+# Center pairs joined by some channel (17 of them)
+LINKS = sorted({
+    tuple(sorted((CENTER_INDEX[GATE_CENTERS[a]], CENTER_INDEX[GATE_CENTERS[b]])))
+    for a, b in CHANNELS
+})
+LINK_INDEX = {link: i for i, link in enumerate(LINKS)}
+
+_HEAD, _AJNA, _THROAT, _G, _EGO, _SPLEEN, _SACRAL, _SOLAR, _ROOT = (CENTER_INDEX[name] for name in CENTERS)
+_MOTOR_MASK = sum(1 << CENTER_INDEX[name] for name in MOTORS)
+
+# Complete channels from a gate mask: channels whose lower (higher) gate is
+# in byte k of the mask, looked up per byte and ANDed
+_CHANNEL_LO_BYTE_LUTS = np.zeros((8, 256), dtype=np.uint64)
+_CHANNEL_HI_BYTE_LUTS = np.zeros((8, 256), dtype=np.uint64)
+for _c, (_lo, _hi) in enumerate(CHANNELS):
+    for _luts, _gate in ((_CHANNEL_LO_BYTE_LUTS, _lo), (_CHANNEL_HI_BYTE_LUTS, _hi)):
+        _byte, _bit = divmod(_gate - 1, 8)
+        _luts[_byte][(np.arange(256) >> _bit & 1).astype(bool)] |= np.uint64(1 << _c)
+
+# Channel mask → link mask, 18 channel bits at a time (like CHANNEL_CENTER_LUTS)
+CHANNEL_LINK_LUTS = np.zeros((2, 1 << 18), dtype=np.uint32)
+for _half in range(2):
+    for _c in range(18):
+        _a, _b = CHANNELS[_half * 18 + _c]
+        _link = LINK_INDEX[tuple(sorted((CENTER_INDEX[GATE_CENTERS[_a]], CENTER_INDEX[GATE_CENTERS[_b]])))]
+        CHANNEL_LINK_LUTS[_half][(np.arange(1 << 18) >> _c & 1).astype(bool)] |= np.uint32(1 << _link)
+
+
+def _closure(links: np.ndarray, start: int) -> np.ndarray:
+    """Center mask reachable from center `start` over each link mask (fixpoint of link expansion)"""
+    reach = np.full(links.shape, 1 << start, dtype=np.uint16)
+    for _ in range(len(CENTERS) - 1):
+        for l, (a, b) in enumerate(LINKS):
+            pair = np.uint16((1 << a) | (1 << b))
+            touches = ((links >> l) & 1).astype(bool) & ((reach & pair) != 0)
+            reach |= np.where(touches, pair, np.uint16(0))
+    return reach
+
+
+def _build_definition_luts() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    links = np.arange(1 << len(LINKS), dtype=np.uint32)
+    has = lambda a, b: ((links >> LINK_INDEX[(min(a, b), max(a, b))]) & 1).astype(bool)
+
+    defined = np.zeros(links.shape, dtype=np.uint16)
+    for l, (a, b) in enumerate(LINKS):
+        defined |= np.where((links >> l) & 1, np.uint16((1 << a) | (1 << b)), np.uint16(0))
+    is_defined = lambda center: ((defined >> center) & 1).astype(bool)
+
+    # Split: count components by their lowest defined center
+    components = [_closure(links, i) for i in range(len(CENTERS))]
+    split = np.zeros(links.shape, dtype=np.uint8)
+    for i, reach in enumerate(components):
+        split += (is_defined(i) & ((reach & np.uint16((1 << i) - 1)) == 0)).astype(np.uint8)
+
+    motor_to_throat = (components[_THROAT] & np.uint16(_MOTOR_MASK)) != 0
+    sacral = is_defined(_SACRAL)
+    kind = np.select(
+        [defined == 0, sacral & motor_to_throat, sacral, motor_to_throat],
+        [TYPES.index('Reflector'), TYPES.index('Manifesting Generator'),
+         TYPES.index('Generator'), TYPES.index('Manifestor')],
+        TYPES.index('Projector'),
+    ).astype(np.uint8)
+
+    authority = np.select(
+        [is_defined(_SOLAR), sacral, is_defined(_SPLEEN),
+         is_defined(_EGO) & ((components[_THROAT] >> _EGO) & 1).astype(bool), is_defined(_EGO),
+         is_defined(_G) & has(_G, _THROAT), defined != 0],
+        [AUTHORITIES.index(name) for name in
+         ('Emotional', 'Sacral', 'Splenic', 'Ego Manifested', 'Ego Projected', 'Self-Projected', 'Mental')],
+        AUTHORITIES.index('Lunar'),
+    ).astype(np.uint8)
+    return defined, kind, authority, np.minimum(split, len(SPLITS) - 1)
+
+
+# Indexed by link mask
+LINK_CENTERS, LINK_TYPE, LINK_AUTHORITY, LINK_SPLIT = _build_definition_luts()
+
+
+def complete_channels(gate_masks: np.ndarray) -> np.ndarray:
+    """Complete-channel masks from gate masks (16 byte-table gathers per chart)"""
+    gate_masks = np.asarray(gate_masks, dtype=np.uint64)
+    # Little-endian bytes: column k holds gates 8k+1 .. 8k+8
+    as_bytes = gate_masks.astype('<u8').reshape(-1, 1).view(np.uint8)
+    lo = _CHANNEL_LO_BYTE_LUTS[0][as_bytes[:, 0]]
+    hi = _CHANNEL_HI_BYTE_LUTS[0][as_bytes[:, 0]]
+    for k in range(1, 8):
+        lo |= _CHANNEL_LO_BYTE_LUTS[k][as_bytes[:, k]]
+        hi |= _CHANNEL_HI_BYTE_LUTS[k][as_bytes[:, k]]
+    return (lo & hi).reshape(gate_masks.shape)
+
+
+def channel_links(channel_masks: np.ndarray) -> np.ndarray:
+    channel_masks = np.asarray(channel_masks, dtype=np.uint64)
+    return CHANNEL_LINK_LUTS[0][channel_masks & _LOW_18] | CHANNEL_LINK_LUTS[1][channel_masks >> _SHIFT_18]
+
+
+def gate_masks_from_arrays(gates: np.ndarray) -> np.ndarray:
+    """(N, k) gate numbers (0 = no activation) → N gate masks"""
+    gates = np.asarray(gates, dtype=np.intp)
+    return np.bitwise_or.reduce(GATE_BITS[gates], axis=-1)
+
+
+def definition_many(gate_masks: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized definition for N charts
+    Returns arrays: channels (uint64), centers (uint16 defined mask),
+    type / authority / split (uint8 indexes into TYPES / AUTHORITIES / SPLITS)
+    """
+    channels = complete_channels(gate_masks)
+    links = channel_links(channels)
+    return {
+        'channels': channels,
+        'centers': LINK_CENTERS[links],
+        'type': LINK_TYPE[links],
+        'authority': LINK_AUTHORITY[links],
+        'split': LINK_SPLIT[links],
+    }
+
+
+def definition(gates: Iterable[int]) -> Dict:
+    """Definition of one chart from its activated gates, with names"""
+    result = definition_many(np.array([gate_mask(gates)], dtype=np.uint64))
+    centers = int(result['centers'][0])
+    return {
+        'type': TYPES[result['type'][0]],
+        'authority': AUTHORITIES[result['authority'][0]],
+        'definition': SPLITS[result['split'][0]],
+        'channels': mask_channels(result['channels'][0]),
+        'defined_centers': mask_centers(centers),
+        'open_centers': [name for i, name in enumerate(CENTERS) if not centers >> i & 1],
+    }
+
+
+def chart_definition(birth_data: Dict) -> Dict:
+    return definition(chart_gates(birth_data))
+
+
+def charts_definition(charts: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """definition_many over birth_data dicts"""
+    return definition_many(np.array([gate_mask(chart_gates(chart)) for chart in charts], dtype=np.uint64))
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+CHART COMPATIBILITY ENGINE
+Vectorized pairwise compatibility over whole populations of charts
+
+Each chart is a 64-bit gate mask (plus small gate/line/color arrays per field).
+Pair scores are bitwise ops + popcount over blocks of the N×N matrix:
+
+- shared gates         popcount(gates_a & gates_b)
+- electromagnetics     popcount((lo_a & hi_b) | (hi_a & lo_b))
+- composite centers    centers defined by complete_a | complete_b | electromagnetics
+
+top_k() walks the matrix in row blocks × column chunks and keeps only a
+running top-k per row, so memory stays O(block × chunk) for any N.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bodygraph import (
+    channel_halves, centers_from_channels, centers_from_channels_lut,
+    gate_mask, mask_centers, mask_channels, mask_gates, popcount64
+)
+
+DEFAULT_FIELDS = ['mind', 'heart', 'body', 'soul', 'spirit', 'shadow', 'observer', 'unity', 'source']
+
+DEFAULT_WEIGHTS = {
+    'shared_gates': 1.0,
+    'electromagnetic': 3.0,
+    'composite_centers': 0.5
+}
+
+
+class ChartMatrix:
+    """Columnar bitset representation of N charts"""
+
+    def __init__(self, gate_masks: np.ndarray, gates: np.ndarray, lines: np.ndarray, colors: np.ndarray,
+                 fields: Sequence[str], ids: Optional[Sequence] = None):
+        self.gate_masks = np.asarray(gate_masks, dtype=np.uint64)
+        self.gates = np.asarray(gates, dtype=np.uint8)      # [N, F], 0 = field absent
+        self.lines = np.asarray(lines, dtype=np.uint8)      # [N, F], 0 = field absent
+        self.colors = np.asarray(colors, dtype=np.uint8)    # [N, F]
+        self.fields = list(fields)
+        self.ids = list(ids) if ids is not None else list(range(len(self.gate_masks)))
+
+        self.full, self.lo_only, self.hi_only = channel_halves(self.gate_masks)
+        self.centers = centers_from_channels(self.full)
+
+    def __len__(self) -> int:
+        return len(self.gate_masks)
+
+    @classmethod
+    def from_charts(cls, charts: Sequence[Dict], fields: Sequence[str] = DEFAULT_FIELDS,
+                    ids: Optional[Sequence] = None) -> 'ChartMatrix':
+        """Build from birth_data dicts (each with a 'fields' mapping)"""
+        n, f = len(charts), len(fields)
+        gate_masks = np.zeros(n, dtype=np.uint64)
+        gates = np.zeros((n, f), dtype=np.uint8)
+        lines = np.zeros((n, f), dtype=np.uint8)
+        colors = np.zeros((n, f), dtype=np.uint8)
+
+        for i, chart in enumerate(charts):
+            chart_fields = chart['fields']
+            gate_masks[i] = gate_mask(field['gate'] for field in chart_fields.values())
+            for j, name in enumerate(fields):
+                if name in chart_fields:
+                    gates[i, j] = chart_fields[name]['gate']
+                    lines[i, j] = chart_fields[name]['line']
+                    colors[i, j] = chart_fields[name].get('color', 1)
+
+        return cls(gate_masks, gates, lines, colors, fields, ids)
+
+
+class CompatibilityEngine:
+    """Pairwise scoring over a ChartMatrix"""
+
+    def __init__(self, charts: ChartMatrix, weights: Optional[Dict[str, float]] = None):
+        self.charts = charts
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+    def score_block(self, rows: slice, cols: slice) -> np.ndarray:
+        """float32 scores for charts[rows] × charts[cols]"""
+        c = self.charts
+        w = self.weights
+
+        gates_a = c.gate_masks[rows, None]
+        gates_b = c.gate_masks[None, cols]
+        scores = popcount64(gates_a & gates_b).astype(np.float32) * w['shared_gates']
+
+        em = (c.lo_only[rows, None] & c.hi_only[None, cols]) | (c.hi_only[rows, None] & c.lo_only[None, cols])
+        if w['electromagnetic']:
+            scores += popcount64(em).astype(np.float32) * w['electromagnetic']
+
+        if w['composite_centers']:
+            # Own definitions are precomputed; only the bridging channels need a lookup
+            composite = c.centers[rows, None] | c.centers[None, cols] | centers_from_channels_lut(em)
+            scores += popcount64(composite).astype(np.float32) * w['composite_centers']
+
+        return scores
+
+    def top_k(self, k: int = 10, block_size: int = 256, chunk_size: int = 65536,
+              rows: Optional[slice] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best k matches per chart (self excluded)
+        Returns: (indices [R, k] int64, scores [R, k] float32), best first;
+        k shrinks to n - 1, so fewer than two charts give [R, 0]
+        """
+        n = len(self.charts)
+        k = max(0, min(k, n - 1))
+        rows = rows or slice(0, n)
+        row_start, row_stop = rows.start or 0, rows.stop if rows.stop is not None else n
+
+        out_idx = np.empty((row_stop - row_start, k), dtype=np.int64)
+        out_scores = np.empty((row_stop - row_start, k), dtype=np.float32)
+        if k == 0:
+            return out_idx, out_scores
+
+        for r0 in range(row_start, row_stop, block_size):
+            r1 = min(r0 + block_size, row_stop)
+            best_idx = np.empty((r1 - r0, 0), dtype=np.int64)
+            best_scores = np.empty((r1 - r0, 0), dtype=np.float32)
+
+            for c0 in range(0, n, chunk_size):
+                c1 = min(c0 + chunk_size, n)
+                scores = self.score_block(slice(r0, r1), slice(c0, c1))
+
+                # Mask the diagonal where this chunk overlaps the row block
+                lo, hi = max(r0, c0), min(r1, c1)
+                if lo < hi:
+                    diag = np.arange(lo, hi)
+                    scores[diag - r0, diag - c0] = -np.inf
+
+                cand_idx = np.concatenate([best_idx, np.broadcast_to(np.arange(c0, c1), scores.shape)], axis=1)
+                cand_scores = np.concatenate([best_scores, scores], axis=1)
+                keep = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+                best_idx = np.take_along_axis(cand_idx, keep, axis=1)
+                best_scores = np.take_along_axis(cand_scores, keep, axis=1)
+
+            order = np.argsort(-best_scores, axis=1, kind='stable')
+            out_idx[r0 - row_start:r1 - row_start] = np.take_along_axis(best_idx, order, axis=1)
+            out_scores[r0 - row_start:r1 - row_start] = np.take_along_axis(best_scores, order, axis=1)
+
+        return out_idx, out_scores
+
+    def pair_detail(self, i: int, j: int) -> Dict:
+        """Human-readable breakdown for one pair"""
+        c = self.charts
+        em = (int(c.lo_only[i]) & int(c.hi_only[j])) | (int(c.hi_only[i]) & int(c.lo_only[j]))
+        composite = int(c.full[i]) | int(c.full[j]) | em
+
+        same_activation = [
+            name for f, name in enumerate(c.fields)
+            if c.gates[i, f] and c.gates[i, f] == c.gates[j, f]
+            and c.lines[i, f] == c.lines[j, f] and c.colors[i, f] == c.colors[j, f]
+        ]
+
+        return {
+            'a': c.ids[i],
+            'b': c.ids[j],
+            'score': float(self.score_block(slice(i, i + 1), slice(j, j + 1))[0, 0]),
+            'shared_gates': mask_gates(int(c.gate_masks[i]) & int(c.gate_masks[j])),
+            'electromagnetic_channels': mask_channels(em),
+            'composite_channels': mask_channels(composite),
+            'composite_centers': mask_centers(int(centers_from_channels(np.array([composite], dtype=np.uint64))[0])),
+            'same_line_and_color_fields': same_activation
+        }
+
+
+def top_matches(charts: List[Dict], k: int = 10, ids: Optional[Sequence] = None) -> List[List[Tuple]]:
+    """Convenience wrapper: [(id, score), ...] best matches per chart"""
+    engine = CompatibilityEngine(ChartMatrix.from_charts(charts, ids=ids))
+    idx, scores = engine.top_k(k)
+    all_ids = engine.charts.ids
+    return [[(all_ids[j], float(s)) for j, s in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(idx, scores)]
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+COLUMNAR CHART STORE
+Memory-mapped, append-only storage for population-level analytics
+
+Layout on disk (one directory per store):
+
+    meta.json               row count, fields, cohort labels
+    <field>.<attr>.u8       one uint8 per chart   (attr: gate/line/color/tone/base)
+    cohort.u16              one uint16 per chart  (index into meta['cohorts'])
+
+Columns are appended in chunks and read back through np.memmap, so scans
+over millions of charts never build per-chart dicts. meta['count'] is
+written after the columns, and opening a store trims every column back to
+it, so a crash mid-append never leaves columns with misaligned rows. Histogram sizes come
+from the `statistics` block KnowledgeBaseEnricher.generate_statistics()
+writes into the enriched KB.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ATTRS = ('gate', 'line', 'color', 'tone', 'base')
+
+DEFAULT_FIELDS = ['mind', 'heart', 'body', 'soul', 'spirit', 'shadow', 'observer', 'unity', 'source']
+
+# Rows per pass when scanning (bounds temporary memory for 10M+ row stores)
+SCAN_ROWS = 1 << 22
+
+# top_combinations packs 8 bits per column into a signed int64 key
+MAX_PACKED_COLUMNS = 7
+
+
+def cardinalities_from_statistics(stats: Dict) -> Dict[str, int]:
+    """Bin counts per attribute from the enriched KB's statistics block"""
+    gates = stats.get('gates', 64)
+    return {
+        'gate': gates,
+        'line': 6,
+        'color': stats.get('colors', 6),
+        'tone': stats.get('tones', 6),
+        'base': stats.get('bases', 5)
+    }
+
+
+class ChartStore:
+    """Append-only columnar store of chart activations"""
+
+    def __init__(self, path: str, fields: Sequence[str] = DEFAULT_FIELDS,
+                 statistics: Optional[Dict] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.path / 'meta.json'
+
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            self._truncate_columns()
+        else:
+            self.meta = {
+                'count': 0,
+                'fields': list(fields),
+                'cohorts': [],
+                'cardinalities': cardinalities_from_statistics(statistics or {})
+            }
+            self._write_meta()
+
+        self._cohort_ids = {label: i for i, label in enumerate(self.meta['cohorts'])}
+
+    # ─── layout ───────────────────────────────────────────────────────
+
+    @property
+    def fields(self) -> List[str]:
+        return self.meta['fields']
+
+    @property
+    def cardinalities(self) -> Dict[str, int]:
+        return self.meta['cardinalities']
+
+    def __len__(self) -> int:
+        return self.meta['count']
+
+    def _column_path(self, name: str) -> Path:
+        suffix = 'u16' if name == 'cohort' else 'u8'
+        return self.path / f'{name}.{suffix}'
+
+    def _column_names(self) -> List[str]:
+        return [f'{field}.{attr}' for field in self.fields for attr in ATTRS] + ['cohort']
+
+    def _truncate_columns(self):
+        """Drop rows an interrupted append wrote past meta['count']"""
+        for name in self._column_names():
+            path = self._column_path(name)
+            size = len(self) * (2 if name == 'cohort' else 1)
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+
+    def _write_meta(self):
+        tmp = self.path / 'meta.json.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, self.path / 'meta.json')
+
+    # ─── writes ───────────────────────────────────────────────────────
+
+    def append(self, charts: Iterable[Dict], cohorts: Optional[Iterable[str]] = None,
+               chunk_rows: int = 100000) -> int:
+        """Append birth_data dicts in chunks; returns rows written"""
+        written = 0
+        cohort_iter = iter(cohorts) if cohorts is not None else None
+        batch, batch_cohorts = [], []
+
+        for chart in charts:
+            batch.append(chart)
+            batch_cohorts.append(next(cohort_iter) if cohort_iter is not None else '')
+            if len(batch) >= chunk_rows:
+                written += self._append_batch(batch, batch_cohorts)
+                batch, batch_cohorts = [], []
+
+        if batch:
+            written += self._append_batch(batch, batch_cohorts)
+        return written
+
+    def _append_batch(self, charts: List[Dict], cohorts: List[str]) -> int:
+        n = len(charts)
+        columns = {f'{field}.{attr}': np.zeros(n, dtype=np.uint8) for field in self.fields for attr in ATTRS}
+
+        for i, chart in enumerate(charts):
+            for field, data in chart['fields'].items():
+                if field not in self.meta['fields']:
+                    continue
+                for attr in ATTRS:
+                    # 0 marks an absent field; color/tone/base default to 1 like CoordinateCalculator
+                    columns[f'{field}.{attr}'][i] = data.get(attr, 1 if attr in ('color', 'tone', 'base') else 0)
+
+        columns['cohort'] = np.array([self._cohort_id(c) for c in cohorts], dtype=np.uint16)
+        return self.append_columns(columns)
+
+    def append_columns(self, columns: Dict[str, np.ndarray]) -> int:
+        """Append pre-built column arrays (all the same length); missing columns are zero-filled"""
+        n = len(next(iter(columns.values())))
+        for name in self._column_names():
+            dtype = np.uint16 if name == 'cohort' else np.uint8
+            values = np.asarray(columns.get(name, np.zeros(n, dtype=dtype)), dtype=dtype)
+            if len(values) != n:
+                raise ValueError(f'column {name} has {len(values)} rows, expected {n}')
+            with open(self._column_path(name), 'ab') as f:
+                values.tofile(f)
+
+        # Row count is published last, so readers never see a partial chunk
+        self.meta['count'] += n
+        self._write_meta()
+        return n
+
+    def _cohort_id(self, label: str) -> int:
+        if label not in self._cohort_ids:
+            self._cohort_ids[label] = len(self.meta['cohorts'])
+            self.meta['cohorts'].append(label)
+        return self._cohort_ids[label]
+
+    # ─── reads ────────────────────────────────────────────────────────
+
+    def column(self, field: str, attr: str = 'gate') -> np.ndarray:
+        """Read-only memmap of one column"""
+        name = 'cohort' if field == 'cohort' else f'{field}.{attr}'
+        dtype = np.uint16 if name == 'cohort' else np.uint8
+        if len(self) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(len(self),))
+
+    def _scan(self, *arrays: np.ndarray) -> Iterable[Tuple[np.ndarray, ...]]:
+        for start in range(0, len(self), SCAN_ROWS):
+            yield tuple(np.asarray(a[start:start + SCAN_ROWS]) for a in arrays)
+
+    def histogram(self, field: str, attr: str = 'gate') -> np.ndarray:
+        """Counts per value 1..cardinality (index 0 = value 1)"""
+        size = self.cardinalities[attr] + 1
+        counts = np.zeros(size, dtype=np.int64)
+        for (values,) in self._scan(self.column(field, attr)):
+            counts += np.bincount(values, minlength=size)[:size]
+        return counts[1:]
+
+    def gate_frequency(self, fields: Optional[Sequence[str]] = None) -> np.ndarray:
+        """How often each gate 1-64 is active across the given fields"""
+        return sum(self.histogram(field, 'gate') for field in (fields or self.fields))
+
+    def group_by(self, field: str, attr: str = 'gate', by: str = 'cohort') -> Dict[str, np.ndarray]:
+        """Histogram of field.attr per cohort label"""
+        size = self.cardinalities[attr] + 1
+        n_groups = max(1, len(self.meta['cohorts']))
+        counts = np.zeros(n_groups * size, dtype=np.int64)
+
+        for values, groups in self._scan(self.column(field, attr), self.column(by)):
+            counts += np.bincount(groups.astype(np.int64) * size + values, minlength=n_groups * size)
+        counts = counts.reshape(n_groups, size)[:, 1:]
+
+        return {label: counts[i] for i, label in enumerate(self.meta['cohorts'] or [''])}
+
+    def distribution(self, field: str, attr: str = 'gate') -> np.ndarray:
+        """Histogram normalised to proportions"""
+        counts = self.histogram(field, attr)
+        total = counts.sum()
+        return counts / total if total else counts.astype(float)
+
+    def top_combinations(self, columns: Sequence[Tuple[str, str]], top: int = 10) -> List[Tuple[Tuple[int, ...], int]]:
+        """
+        Most common value tuples across several columns
+        e.g. crosses: [('soul', 'gate'), ('body', 'gate'), ...]
+        Up to MAX_PACKED_COLUMNS columns are packed into one int64 key; more
+        fall back to np.unique over rows (slower, same result)
+        """
+        if not columns or len(self) == 0:
+            return []
+
+        packed = len(columns) <= MAX_PACKED_COLUMNS
+        keys_seen, counts_seen = [], []
+        for chunk in self._scan(*(self.column(f, a) for f, a in columns)):
+            if packed:
+                key = np.zeros(len(chunk[0]), dtype=np.int64)
+                for values in chunk:
+                    key = (key << 8) | values.astype(np.int64)
+                uniq, counts = np.unique(key, return_counts=True)
+            else:
+                uniq, counts = np.unique(np.column_stack(chunk), axis=0, return_counts=True)
+            keys_seen.append(uniq)
+            counts_seen.append(counts)
+
+        uniq, inverse = np.unique(np.concatenate(keys_seen), axis=None if packed else 0, return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=np.concatenate(counts_seen)).astype(np.int64)
+        order = np.argsort(-totals, kind='stable')[:top]
+
+        results = []
+        for i in order:
+            if packed:
+                key = int(uniq[i])
+                values = tuple((key >> (8 * (len(columns) - 1 - j))) & 0xFF for j in range(len(columns)))
+            else:
+                values = tuple(int(v) for v in uniq[i])
+            results.append((values, int(totals[i])))
+        return results
+
+    def summary(self) -> Dict:
+        """Store-level statistics, shaped like the KB statistics block"""
+        return {
+            'charts': len(self),
+            'fields': self.fields,
+            'cohorts': len(self.meta['cohorts']),
+            'cardinalities': self.cardinalities,
+            'bytes_on_disk': sum(p.stat().st_size for p in self.path.iterdir() if p.is_file())
+        }
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+DESIGN-DATE SOLVER
+Personality (birth) and design (88° of solar arc earlier) activations, in batches
+
+The design moment is when the Sun's apparent longitude was exactly 88°
+behind its longitude at birth - 86 to 92 days earlier. Solving for it
+is root-finding on the solar longitude, done here with safeguarded Newton
+iterations over whole NumPy arrays of births at once:
+
+    solver = DesignSolver()
+    result = solver.solve(np.array(['1990-09-19T04:34'], dtype='datetime64[s]'))
+    result['design_utc'], result['design']['soul']['gate']
+
+Every iterate stays inside a bracket known to contain the root (bisection
+when a Newton step would leave it), so each birth converges to |residual|
+< tol degrees or solve() raises - there is no silent non-convergence.
+NaT births (and births the ephemeris cannot place) are masked instead:
+they come back as NaT / NaN with gate 0, and the rest of the batch solves.
+
+Longitudes map onto the 64-gate wheel (gate 41 starts at 302°, each gate
+5.625°) and split into line / color / tone / base exactly as stored in
+birth_data['fields'], so CoordinateCalculator takes the output unchanged.
+
+The built-in ephemeris is a vectorized solar theory (Meeus ch. 25, ~0.01°)
+covering the Sun and Earth, i.e. the 'soul' field. Other fields need a
+planetary ephemeris: pass any object with bodies and longitudes(jd_ut,
+bodies), e.g. SwissEphemeris when pyswisseph is installed.
+"""
+
+import argparse
+import json
+import math
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from deterministic_responder import FIELD_PLANETS
+
+# ═══════════════════════════════════════════════════════════════════
+# WHEEL
+# ═══════════════════════════════════════════════════════════════════
+
+DESIGN_ARC = 88.0
+
+# Gates in zodiacal order from WHEEL_START
+GATE_ORDER = np.array([
+    41, 19, 13, 49, 30, 55, 37, 63, 22, 36, 25, 17, 21, 51, 42, 3,
+    27, 24, 2, 23, 8, 20, 16, 35, 45, 12, 15, 52, 39, 53, 62, 56,
+    31, 33, 7, 4, 29, 59, 40, 64, 47, 6, 46, 18, 48, 57, 32, 50,
+    28, 44, 1, 43, 14, 34, 9, 5, 26, 11, 10, 58, 38, 54, 61, 60,
+], dtype=np.int64)
+
+WHEEL_START = 302.0
+
+# 64 gates × 6 lines × 6 colors × 6 tones × 5 bases
+BASES_PER_WHEEL = 64 * 6 * 6 * 6 * 5
+
+def activations(longitude) -> Dict[str, np.ndarray]:
+    """
+    Ecliptic longitude (degrees) → gate/line/color/tone/base plus degree/minute/second
+    Non-finite longitudes map to gate 0 (no activation) with every other attribute 0
+    """
+    longitude = np.mod(np.asarray(longitude, dtype=np.float64), 360.0)
+    finite = np.isfinite(longitude)
+    longitude = np.where(finite, longitude, 0.0)
+    n = np.floor(np.mod(longitude - WHEEL_START, 360.0) * (BASES_PER_WHEEL / 360.0)).astype(np.int64)
+    n %= BASES_PER_WHEEL
+
+    n, base = np.divmod(n, 5)
+    n, tone = np.divmod(n, 6)
+    n, color = np.divmod(n, 6)
+    n, line = np.divmod(n, 6)
+
+    arcseconds = np.floor(longitude * 3600).astype(np.int64)
+    columns = {
+        'gate': GATE_ORDER[n],
+        'line': line + 1,
+        'color': color + 1,
+        'tone': tone + 1,
+        'base': base + 1,
+        'degree': arcseconds // 3600,
+        'minute': arcseconds // 60 % 60,
+        'second': arcseconds % 60,
+    }
+    if not finite.all():
+        columns = {attr: np.where(finite, values, 0) for attr, values in columns.items()}
+    columns['longitude'] = np.where(finite, longitude, np.nan)
+    return columns
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TIME
+# ═══════════════════════════════════════════════════════════════════
+
+UNIX_EPOCH_JD = 2440587.5
+J2000 = 2451545.0
+
+
+def julian_day(timestamps) -> np.ndarray:
+    """UTC datetime64 (or ISO strings) → Julian day (UT); NaT → NaN"""
+    timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+    return np.where(np.isnat(timestamps), np.nan, timestamps.astype(np.int64) / 86400.0 + UNIX_EPOCH_JD)
+
+
+def to_datetime64(jd) -> np.ndarray:
+    """Julian day (UT) → datetime64[s]; NaN → NaT"""
+    jd = np.asarray(jd, dtype=np.float64)
+    finite = np.isfinite(jd)
+    seconds = np.round((np.where(finite, jd, UNIX_EPOCH_JD) - UNIX_EPOCH_JD) * 86400.0).astype(np.int64)
+    return np.where(finite, seconds.astype('datetime64[s]'), np.datetime64('NaT', 's'))
+
+
+def delta_t_seconds(jd) -> np.ndarray:
+    """TT - UT (Espenak & Meeus polynomials, 1900-2150; parabola outside)"""
+    y = 2000.0 + (np.asarray(jd, dtype=np.float64) - J2000) / 365.25
+    u = (y - 1820.0) / 100.0
+    t = {
+        1900: y - 1900, 1920: y - 1920, 1950: y - 1950, 1975: y - 1975, 2000: y - 2000,
+    }
+    choices = [
+        -2.79 + 1.494119 * t[1900] - 0.0598939 * t[1900] ** 2 + 0.0061966 * t[1900] ** 3 - 0.000197 * t[1900] ** 4,
+        21.20 + 0.84493 * t[1920] - 0.076100 * t[1920] ** 2 + 0.0020936 * t[1920] ** 3,
+        29.07 + 0.407 * t[1950] - t[1950] ** 2 / 233 + t[1950] ** 3 / 2547,
+        45.45 + 1.067 * t[1975] - t[1975] ** 2 / 260 - t[1975] ** 3 / 718,
+        63.86 + 0.3345 * t[2000] - 0.060374 * t[2000] ** 2 + 0.0017275 * t[2000] ** 3
+        + 0.000651814 * t[2000] ** 4 + 0.00002373599 * t[2000] ** 5,
+        62.92 + 0.32217 * t[2000] + 0.005589 * t[2000] ** 2,
+        -20 + 32 * u ** 2 - 0.5628 * (2150 - y),
+    ]
+    conditions = [
+        (y >= 1900) & (y < 1920), (y >= 1920) & (y < 1941), (y >= 1941) & (y < 1961),
+        (y >= 1961) & (y < 1986), (y >= 1986) & (y < 2005), (y >= 2005) & (y < 2050),
+        (y >= 2050) & (y < 2150),
+    ]
+    return np.select(conditions, choices, default=-20 + 32 * u ** 2)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# EPHEMERIS
+# ═══════════════════════════════════════════════════════════════════
+
+def solar_longitude(jd_ut, with_rate: bool = False, delta_t: Optional[np.ndarray] = None):
+    """
+    Apparent geocentric solar longitude in degrees (Meeus ch. 25, ~0.01°)
+    with_rate: also return dλ/dt in degrees per day (for Newton steps)
+    delta_t: precomputed TT - UT seconds (it drifts ~0.1 s over a solve)
+    """
+    jd_ut = np.asarray(jd_ut, dtype=np.float64)
+    if delta_t is None:
+        delta_t = delta_t_seconds(jd_ut)
+    T = (jd_ut + delta_t / 86400.0 - J2000) / 36525.0
+    rad = math.pi / 180
+
+    L0 = 280.46646 + 36000.76983 * T + 0.0003032 * T * T
+    M = (357.52911 + 35999.05029 * T - 0.0001537 * T * T) * rad
+    c1 = 1.914602 - 0.004817 * T - 0.000014 * T * T
+    c2 = 0.019993 - 0.000101 * T
+    c3 = 0.000289
+    C = c1 * np.sin(M) + c2 * np.sin(2 * M) + c3 * np.sin(3 * M)
+    omega = (125.04 - 1934.136 * T) * rad
+    longitude = np.mod(L0 + C - 0.00569 - 0.00478 * np.sin(omega), 360.0)
+    if not with_rate:
+        return longitude
+
+    dC_dM = (c1 * np.cos(M) + 2 * c2 * np.cos(2 * M) + 3 * c3 * np.cos(3 * M)) * rad
+    rate = (36000.76983 + 2 * 0.0003032 * T + dC_dM * 35999.05029
+            + 0.00478 * np.cos(omega) * 1934.136 * rad) / 36525.0
+    return longitude, rate
+
+
+class SolarEphemeris:
+    """Built-in, fully vectorized; Sun and Earth only"""
+    bodies = ('sun', 'earth')
+
+    def longitudes(self, jd_ut: np.ndarray, bodies: Sequence[str]) -> Dict[str, np.ndarray]:
+        sun = solar_longitude(jd_ut)
+        out = {}
+        for body in bodies:
+            if body == 'sun':
+                out[body] = sun
+            elif body == 'earth':
+                out[body] = np.mod(sun + 180.0, 360.0)
+            else:
+                raise ValueError(f'SolarEphemeris has no {body!r}; use SwissEphemeris for planets')
+        return out
+
+
+class SwissEphemeris:
+    """
+    pyswisseph (optional dependency) for every body; one swe.calc_ut call per
+    element, so batches cost a C call per birth rather than a Python chart build
+    """
+    bodies = ('sun', 'earth', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn',
+              'uranus', 'neptune', 'pluto', 'north_node', 'south_node')
+
+    def __init__(self, ephemeris_path: Optional[str] = None):
+        import swisseph as swe
+        self.swe = swe
+        if ephemeris_path:
+            swe.set_ephe_path(ephemeris_path)
+        self._ids = {
+            'sun': swe.SUN, 'moon': swe.MOON, 'mercury': swe.MERCURY, 'venus': swe.VENUS,
+            'mars': swe.MARS, 'jupiter': swe.JUPITER, 'saturn': swe.SATURN, 'uranus': swe.URANUS,
+            'neptune': swe.NEPTUNE, 'pluto': swe.PLUTO, 'north_node': swe.TRUE_NODE,
+        }
+
+    def _body(self, jd_ut: np.ndarray, body_id: int) -> np.ndarray:
+        calc = self.swe.calc_ut
+        finite = np.isfinite(jd_ut)
+        out = np.full(len(jd_ut), np.nan)
+        out[finite] = np.fromiter((calc(float(jd), body_id)[0][0] for jd in jd_ut[finite]),
+                                  dtype=np.float64, count=int(finite.sum()))
+        return out
+
+    def longitudes(self, jd_ut: np.ndarray, bodies: Sequence[str]) -> Dict[str, np.ndarray]:
+        jd_ut = np.atleast_1d(np.asarray(jd_ut, dtype=np.float64))
+        out = {}
+        for body in bodies:
+            if body in ('earth', 'south_node'):
+                opposite = 'sun' if body == 'earth' else 'north_node'
+                out[body] = np.mod(self._body(jd_ut, self._ids[opposite]) + 180.0, 360.0)
+            else:
+                out[body] = self._body(jd_ut, self._ids[body])
+        return out
+
+
+# ═══════════════════════════════════════════════════════════════════
+# SOLVER
+# ═══════════════════════════════════════════════════════════════════
+
+class ConvergenceError(RuntimeError):
+    pass
+
+
+def _wrap180(degrees: np.ndarray) -> np.ndarray:
+    return np.mod(degrees + 180.0, 360.0) - 180.0
+
+
+def solve_design_jd(jd_birth, arc: float = DESIGN_ARC, tol: float = 1e-7,
+                    max_iter: int = 60, sun=None) -> np.ndarray:
+    """
+    Julian days (UT) when the Sun was `arc` degrees behind its birth longitude
+    sun: jd → apparent solar longitude; defaults to the built-in theory, whose
+    analytic rate drives the Newton steps (other callables fall back to the
+    mean solar rate, still safeguarded by the bracket)
+    Rows whose birth jd or solar longitude is not finite come back NaN.
+    """
+    jd_birth = np.atleast_1d(np.asarray(jd_birth, dtype=np.float64))
+    mean_days = arc / 0.9856
+    if sun is None:
+        target = np.mod(solar_longitude(jd_birth) - arc, 360.0)
+        delta_t = delta_t_seconds(jd_birth - mean_days)
+        evaluate = lambda jd, rows: solar_longitude(jd, with_rate=True, delta_t=delta_t[rows])
+    else:
+        target = np.mod(sun(jd_birth) - arc, 360.0)
+        evaluate = lambda jd, rows: (sun(jd), np.full(len(jd), 0.9856))
+
+    # The Sun moves 0.95-1.02°/day, so 88° lies 86-93 days back; pad the bracket generously
+    lo = jd_birth - mean_days * 1.08
+    hi = jd_birth - mean_days * 0.92
+    valid = np.isfinite(jd_birth) & np.isfinite(target)
+    jd = np.where(valid, jd_birth - mean_days, np.nan)
+    residual = np.full(len(jd_birth), np.inf)
+
+    active = np.flatnonzero(valid)
+    if not len(active):
+        return jd
+    for _ in range(max_iter):
+        longitude, rate = evaluate(jd[active], active)
+        f = _wrap180(longitude - target[active])
+        residual[active] = f
+
+        done = np.abs(f) < tol
+        # Shrink the bracket around the root (longitude increases with time)
+        below = f < 0
+        lo[active] = np.where(below, jd[active], lo[active])
+        hi[active] = np.where(below, hi[active], jd[active])
+
+        step = jd[active] - f / rate
+        inside = (step > lo[active]) & (step < hi[active])
+        jd[active] = np.where(done, jd[active], np.where(inside, step, 0.5 * (lo[active] + hi[active])))
+
+        active = active[~done]
+        if not len(active):
+            return jd
+
+    raise ConvergenceError(
+        f'{len(active)} of {int(valid.sum())} design dates above tol={tol}° after {max_iter} iterations '
+        f'(worst residual {np.abs(residual[active]).max():.3g}°)'
+    )
+
+
+class DesignSolver:
+    """Personality + design activations for arrays of UTC birth moments"""
+
+    def __init__(self, ephemeris=None, fields: Optional[Dict[str, str]] = None,
+                 arc: float = DESIGN_ARC, tol: float = 1e-7):
+        """
+        ephemeris: SolarEphemeris (default), SwissEphemeris, or anything with
+        .bodies and .longitudes(jd_ut, bodies)
+        fields: field name → body; defaults to every field the ephemeris covers
+        """
+        self.ephemeris = ephemeris or SolarEphemeris()
+        fields = fields if fields is not None else FIELD_PLANETS
+        self.fields = {f: body for f, body in fields.items() if body in self.ephemeris.bodies}
+        self.arc = arc
+        self.tol = tol
+
+    def _sun(self):
+        if isinstance(self.ephemeris, SolarEphemeris):
+            return None
+        return lambda jd: self.ephemeris.longitudes(jd, ['sun'])['sun']
+
+    def _activations(self, jd: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+        bodies = sorted(set(self.fields.values()))
+        longitudes = self.ephemeris.longitudes(jd, bodies)
+        return {field: activations(longitudes[body]) for field, body in self.fields.items()}
+
+    def solve(self, birth_utc) -> Dict:
+        """
+        birth_utc: datetime64 array (or ISO strings) in UTC
+        Returns {birth_jd, design_jd, design_utc, personality: {field: {attr: array}},
+        design: {...}}
+
+        Only the fields the ephemeris covers are returned: with the default
+        SolarEphemeris that is 'soul' alone. SwissEphemeris covers every
+        field, but its _body is a per-element Python loop over swe.calc_ut,
+        so large batches are bound by that loop rather than by NumPy.
+        NaT births give NaT design_utc, NaN jds and gate 0 in every field;
+        they do not fail the rest of the batch.
+        """
+        jd_birth = np.atleast_1d(julian_day(birth_utc))
+        jd_design = solve_design_jd(jd_birth, self.arc, self.tol, sun=self._sun())
+        return {
+            'birth_jd': jd_birth,
+            'design_jd': jd_design,
+            'design_utc': to_datetime64(jd_design),
+            'personality': self._activations(jd_birth),
+            'design': self._activations(jd_design),
+        }
+
+    def chart(self, birth_utc) -> Dict:
+        """One birth → {'personality': fields, 'design': fields, 'design_utc'} as birth_data-style dicts"""
+        result = self.solve(np.array([birth_utc], dtype='datetime64[s]'))
+        chart = {'design_utc': str(result['design_utc'][0])}
+        for side in ('personality', 'design'):
+            chart[side] = {
+                field: {
+                    'planet': self.fields[field],
+                    **{attr: (float(values[0]) if attr == 'longitude' else int(values[0]))
+                       for attr, values in columns.items()}
+                }
+                for field, columns in result[side].items()
+            }
+        return chart
+
+    def chart_for_birth(self, birth_data: Dict, gazetteer=None) -> Optional[Dict]:
+        """birth_data with local birth_date/birth_time/location → chart (via gazetteer.Gazetteer)"""
+        if gazetteer is None:
+            from gazetteer import Gazetteer
+            gazetteer = Gazetteer.load()
+        resolved = gazetteer.resolve_birth(birth_data)
+        if resolved is None:
+            return None
+        chart = self.chart(resolved['utc'][:19])
+        chart['birth'] = resolved
+        return chart
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Personality and design activations for a birth')
+    parser.add_argument('birth_date', help='YYYY-MM-DD (local)')
+    parser.add_argument('birth_time', help='HH:MM (local)')
+    parser.add_argument('location', help="e.g. 'San Francisco, CA'")
+    parser.add_argument('--swiss', action='store_true', help='use pyswisseph for all planets')
+    args = parser.parse_args()
+
+    solver = DesignSolver(SwissEphemeris() if args.swiss else None)
+    chart = solver.chart_for_birth({
+        'birth_date': args.birth_date, 'birth_time': args.birth_time, 'location': args.location
+    })
+    if chart is None:
+        print(f"❌ No match for {args.location!r}")
+        raise SystemExit(1)
+    print(json.dumps(chart, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,10 +10,14 @@ Architecture:
 4. Assemble response → Compositional rules
 """
 
+import hashlib
 import json
 import re
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from bodygraph import GATE_CENTERS, chart_definition
+from kb_model import KnowledgeBaseModel
 
 # ═══════════════════════════════════════════════════════════════════
 # LAYER 1: DATA TABLES (Meaning Fragments)
@@ -82,6 +86,19 @@ PLANETS = {
     }
 }
 
+# The planet whose activation fills each field
+FIELD_PLANETS = {
+    'mind': 'mercury',
+    'heart': 'moon',
+    'body': 'mars',
+    'soul': 'sun',
+    'spirit': 'jupiter',
+    'shadow': 'saturn',
+    'observer': 'uranus',
+    'unity': 'neptune',
+    'source': 'pluto'
+}
+
 ZODIAC_SIGNS = {
     'aries': {
         'element': 'Fire',
@@ -233,30 +250,43 @@ HOUSES = {
 }
 
 # Load from knowledge base
+KB_PATH = '/mnt/user-data/outputs/knowledge_base_enriched.json'
+
 def load_gates():
     """Load gate data from enriched KB"""
-    with open('/mnt/user-data/outputs/knowledge_base_enriched.json', 'r') as f:
+    with open(KB_PATH, 'r') as f:
         kb = json.load(f)
     return kb['gates']
 
 def load_colors():
     """Load color (motivation) data"""
-    with open('/mnt/user-data/outputs/knowledge_base_enriched.json', 'r') as f:
+    with open(KB_PATH, 'r') as f:
         kb = json.load(f)
     return kb['colors']
 
 def load_tones():
     """Load tone (sense) data"""
-    with open('/mnt/user-data/outputs/knowledge_base_enriched.json', 'r') as f:
+    with open(KB_PATH, 'r') as f:
         kb = json.load(f)
     return kb['tones']
 
 def load_bases():
     """Load base (environment) data"""
-    with open('/mnt/user-data/outputs/knowledge_base_enriched.json', 'r') as f:
+    with open(KB_PATH, 'r') as f:
         kb = json.load(f)
     return kb['bases']
 
+def load_model() -> KnowledgeBaseModel:
+    """Load the typed, int-indexed KB model (one file read)"""
+    return KnowledgeBaseModel.load(KB_PATH)
+
+
+def load_versioned_model() -> Tuple[KnowledgeBaseModel, str]:
+    """The model plus the sha256 of the KB file it came from (what a snapshot reports as its version)"""
+    with open(KB_PATH, 'rb') as f:
+        raw = f.read()
+    return KnowledgeBaseModel.from_dict(json.loads(raw)), hashlib.sha256(raw).hexdigest()
+
 
 # ═══════════════════════════════════════════════════════════════════
 # LAYER 2: GRAMMAR PARSER (Detect Intent + Field)
@@ -291,8 +321,8 @@ class GrammarParser:
         """Parse user input and extract meaning"""
         text_lower = text.lower()
         
-        # Detect field
-        field = self.detect_field(text_lower)
+        # Detect field (with how sure we are about it)
+        field, confidence = self.detect_field_with_confidence(text_lower)
         
         # Detect emotional state
         state = self.detect_state(text_lower)
@@ -302,22 +332,39 @@ class GrammarParser:
         
         return {
             'field': field,
+            'confidence': confidence,
             'state': state,
             'question_type': question_type,
             'original_text': text
         }
     
-    def detect_field(self, text: str) -> str:
-        """Detect which consciousness field is being referenced"""
+    def score_fields(self, text: str) -> Dict[str, int]:
+        """Count keyword hits per field (fields with no hits are omitted)"""
         scores = {}
         for field, keywords in self.FIELD_KEYWORDS.items():
             score = sum(1 for kw in keywords if kw in text)
             if score > 0:
                 scores[field] = score
+        return scores
+    
+    def detect_field(self, text: str) -> str:
+        """Detect which consciousness field is being referenced"""
+        return self.detect_field_with_confidence(text)[0]
+    
+    def detect_field_with_confidence(self, text: str) -> Tuple[str, float]:
+        """
+        Detect field plus a confidence in [0, 1]
+        
+        Confidence is the winning field's share of all keyword hits,
+        so one unambiguous hit scores 1.0 and a two-way tie 0.5.
+        The 'mind' default (no hits at all) scores 0.0.
+        """
+        scores = self.score_fields(text)
         
         if scores:
-            return max(scores, key=scores.get)
-        return 'mind'  # default
+            field = max(scores, key=scores.get)
+            return field, scores[field] / sum(scores.values())
+        return 'mind', 0.0  # default
     
     def detect_state(self, text: str) -> str:
         """Detect emotional/consciousness state"""
@@ -353,13 +400,24 @@ class CoordinateCalculator:
     With degree/minute/second precision
     """
     
-    def __init__(self, birth_data: Dict):
-        """Initialize with birth data"""
+    def __init__(self, birth_data: Dict, coordinates: Optional[Dict] = None,
+                 model: Optional[KnowledgeBaseModel] = None):
+        """
+        Initialize with birth data
+        
+        coordinates: optional precomputed {field_name: coordinate} (as stored
+        on user_anchors.coordinates) served instead of recalculating
+        model: optional already-built KB model (e.g. from a kb_snapshot
+        snapshot) instead of reading KB_PATH
+        """
         self.birth_data = birth_data
-        self.gates = load_gates()
-        self.colors = load_colors()
-        self.tones = load_tones()
-        self.bases = load_bases()
+        self.coordinates = coordinates or {}
+        self.model = model or load_model()
+        # Int-indexed: gates[1..64], colors/tones[1..6], bases[1..5]
+        self.gates = self.model.gates
+        self.colors = self.model.colors
+        self.tones = self.model.tones
+        self.bases = self.model.bases
     
     def calculate_coordinate(self, field_name: str) -> Dict:
         """
@@ -369,6 +427,9 @@ class CoordinateCalculator:
             degree, minute, second
         }
         """
+        if field_name in self.coordinates:
+            return dict(self.coordinates[field_name])
+        
         # Get field data from birth chart
         field = self.birth_data['fields'][field_name]
         
@@ -393,18 +454,7 @@ class CoordinateCalculator:
     
     def get_planet_for_field(self, field_name: str) -> str:
         """Map field to planet"""
-        field_planet_map = {
-            'mind': 'mercury',
-            'heart': 'moon',
-            'body': 'mars',
-            'soul': 'sun',
-            'spirit': 'jupiter',
-            'shadow': 'saturn',
-            'observer': 'uranus',
-            'unity': 'neptune',
-            'source': 'pluto'
-        }
-        return field_planet_map.get(field_name, 'mercury')
+        return FIELD_PLANETS.get(field_name, 'mercury')
     
     def calculate_sign(self, field: Dict) -> str:
         """Calculate zodiac sign from gate position"""
@@ -434,24 +484,34 @@ class MeaningCollapseEngine:
     No AI. Just structured synthesis.
     """
     
-    def __init__(self):
-        self.gates = load_gates()
-        self.colors = load_colors()
-        self.tones = load_tones()
-        self.bases = load_bases()
+    def __init__(self, table=None, model: Optional[KnowledgeBaseModel] = None):
+        """
+        table: optional prebuilt MeaningTable (see meaning_table.py); when
+        given, collapse() is a single array index instead of object lookups
+        model: optional already-built KB model instead of reading KB_PATH
+        """
+        self.table = table
+        self.model = model or load_model()
+        self.gates = self.model.gates
+        self.colors = self.model.colors
+        self.tones = self.model.tones
+        self.bases = self.model.bases
     
     def collapse(self, coordinate: Dict, state: str = 'gift') -> Dict:
         """
         Collapse meaning from coordinate
         Returns semantic layers
         """
-        gate_data = self.gates[str(coordinate['gate'])]
+        if self.table is not None:
+            return self.table.collapse(coordinate, state)
+        
+        gate = self.gates[coordinate['gate']]
         planet_data = PLANETS[coordinate['planet']]
         sign_data = ZODIAC_SIGNS[coordinate['sign']]
         house_data = HOUSES[coordinate['house']]
-        color_data = self.colors[str(coordinate['color'])]
-        tone_data = self.tones[str(coordinate['tone'])]
-        base_data = self.bases[str(coordinate['base'])]
+        color = self.colors[coordinate['color']]
+        tone = self.tones[coordinate['tone']]
+        base = self.bases[coordinate['base']]
         
         # Layer 1: Planet energy
         planet_fragment = planet_data['sentence_fragment']
@@ -464,17 +524,17 @@ class MeaningCollapseEngine:
         house_context = house_data['context']
         
         # Layer 4: Gate theme
-        gate_name = gate_data['name']
-        gate_keywords = gate_data.get('keywords', ['essence'])
+        gate_name = gate.name
+        gate_keywords = list(gate.keywords) if gate.keywords is not None else ['essence']
         
         # Layer 5: Color motivation
-        color_name = color_data['name']
+        color_name = color.name
         
         # Layer 6: Tone perception
-        tone_name = tone_data['name']
+        tone_name = tone.name
         
         # Layer 7: Base environment
-        base_name = base_data['name']
+        base_name = base.name
         
         return {
             'planet': {'fragment': planet_fragment, 'action': planet_action},
@@ -522,6 +582,15 @@ class ResponseCompositor:
         gate_statement = f"This activates {gate['name']}, bringing the quality of {gate['keywords'][0]}."
         response_parts.append(gate_statement)
         
+        # Bodygraph: the gate's center, defined or open, and how this chart decides
+        center = meaning_layers.get('center')
+        if center:
+            if center['defined']:
+                where = f"It lives in your {center['name']} center, which is defined: a consistent, reliable part of you."
+            else:
+                where = f"It lives in your {center['name']} center, which is open: here you take in and amplify others."
+            response_parts.append(f"{where} As a {center['type']}, let {center['authority']} authority make the call.")
+        
         # Depth layers
         depth = f"Your motivation stems from {color['name'].lower()}, perceived through {tone['name'].lower()}, grounded in {base['name'].lower()}."
         response_parts.append(depth)
@@ -543,21 +612,63 @@ class ResponseCompositor:
 # LAYER 6: MAIN RESPONDER
 # ═══════════════════════════════════════════════════════════════════
 
+# Bump when respond() output changes for the same inputs (templates, layers, shape)
+RESPONSE_SCHEMA_VERSION = 2
+
+
 class DeterministicResponder:
     """
     Complete responder system
     No LLM. Pure structure.
     """
     
-    def __init__(self, birth_data: Dict):
+    def __init__(self, birth_data: Dict, coordinates: Optional[Dict] = None, snapshot=None):
+        """
+        snapshot: optional kb_snapshot.KnowledgeBaseSnapshot; the responder
+        then uses its tables and prebuilt engine for its whole lifetime
+        """
         self.parser = GrammarParser()
-        self.calculator = CoordinateCalculator(birth_data)
-        self.engine = MeaningCollapseEngine()
+        if snapshot is not None:
+            self.calculator = CoordinateCalculator(birth_data, coordinates, model=snapshot.model)
+            self.engine = snapshot.engine
+            self.kb_version = snapshot.version
+        else:
+            model, self.kb_version = load_versioned_model()
+            self.calculator = CoordinateCalculator(birth_data, coordinates, model=model)
+            self.engine = MeaningCollapseEngine(model=model)
         self.compositor = ResponseCompositor()
+        self._bodygraph = None
     
-    def respond(self, user_input: str) -> Dict:
+    @classmethod
+    def from_anchor(cls, anchor_coordinates: Dict, snapshot=None) -> 'DeterministicResponder':
+        """Build from a stored anchor document ({schema_version, fields})"""
+        fields = anchor_coordinates['fields']
+        return cls({'fields': fields}, coordinates=fields, snapshot=snapshot)
+    
+    def bodygraph(self) -> Dict:
         """
-        Generate deterministic response
+        Chart definition (computed once): type, authority, definition,
+        channels, defined_centers, open_centers
+        """
+        if self._bodygraph is None:
+            self._bodygraph = chart_definition(self.calculator.birth_data)
+        return self._bodygraph
+    
+    def center_layer(self, coordinate: Dict) -> Dict:
+        """The coordinate's center in this chart, for the compositor"""
+        bodygraph = self.bodygraph()
+        name = GATE_CENTERS[coordinate['gate']]
+        return {
+            'name': name,
+            'defined': name in bodygraph['defined_centers'],
+            'type': bodygraph['type'],
+            'authority': bodygraph['authority'],
+        }
+    
+    def collapse(self, user_input: str) -> Tuple[Dict, Dict, Dict]:
+        """
+        Parse, locate and collapse without composing
+        Returns: (parsed, coordinate, meaning_layers)
         """
         # Parse input
         parsed = self.parser.parse(user_input)
@@ -565,8 +676,34 @@ class DeterministicResponder:
         # Calculate coordinate for detected field
         coordinate = self.calculator.calculate_coordinate(parsed['field'])
         
-        # Collapse meaning
-        meaning_layers = self.engine.collapse(coordinate, parsed['state'])
+        # Collapse meaning, plus where the gate sits in this bodygraph
+        meaning_layers = dict(self.engine.collapse(coordinate, parsed['state']))
+        meaning_layers['center'] = self.center_layer(coordinate)
+        
+        return parsed, coordinate, meaning_layers
+    
+    def etag(self, user_input: str, parsed: Optional[Dict] = None) -> str:
+        """
+        Validator for respond(user_input), computed without collapsing or composing
+        respond() is a pure function of the KB version, the detected field's
+        coordinate, its center layer and the parsed (field, state,
+        question_type, confidence), so equal tags mean byte-identical responses.
+        """
+        parsed = parsed or self.parser.parse(user_input)
+        coordinate = self.calculator.calculate_coordinate(parsed['field'])
+        key = json.dumps(
+            [RESPONSE_SCHEMA_VERSION, self.kb_version, parsed['field'], parsed['state'],
+             parsed['question_type'], parsed['confidence'], coordinate,
+             self.center_layer(coordinate)],
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def respond(self, user_input: str) -> Dict:
+        """
+        Generate deterministic response
+        """
+        parsed, coordinate, meaning_layers = self.collapse(user_input)
         
         # Compose response
         response_text = self.compositor.compose(meaning_layers, parsed['question_type'])
@@ -575,9 +712,11 @@ class DeterministicResponder:
             'response': response_text,
             'metadata': {
                 'field': parsed['field'],
+                'confidence': parsed['confidence'],
                 'state': parsed['state'],
                 'coordinate': coordinate,
-                'layers': meaning_layers
+                'layers': meaning_layers,
+                'bodygraph': self.bodygraph()
             }
         }
 
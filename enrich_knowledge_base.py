@@ -7,8 +7,94 @@ Integrates all uploaded data sources into unified consciousness database
 import json
 import csv
 import re
+from collections import OrderedDict
 from pathlib import Path
 
+from kb_model import KnowledgeBaseModel
+
+# Base power expression patterns, shared by every gate
+POWER_TEMPLATES = {
+    'distortion': {
+        'feels': 'Experiencing {shadow}, feeling {theme} is blocked',
+        'looks': 'Struggling with {theme}, inconsistent expression',
+        'scenarios': 'When {theme} feels impossible • Inner conflict'
+    },
+    'resonance': {
+        'feels': 'Natural {gift} flowing, confident in {theme}',
+        'looks': 'Demonstrating {gift} regularly, inspiring others',
+        'scenarios': 'Living {theme} authentically • Making positive impact'
+    },
+    'convergence': {
+        'feels': 'Effortless {mastery}, magnetic presence',
+        'looks': 'Others seek your {mastery}, natural mastery',
+        'scenarios': '{mastery} without effort • Teaching through being'
+    }
+}
+
+
+def power_params(gate_data):
+    """Template parameters (shadow, gift, mastery, theme) for one gate"""
+    theme = gate_data.get('name', 'expression').lower()
+    keywords = gate_data.get('keywords', [])
+    
+    return {
+        'shadow': keywords[0] if len(keywords) > 0 else 'blocked',
+        'gift': keywords[1] if len(keywords) > 1 else 'flowing',
+        'mastery': f"{theme} mastery",
+        'theme': theme
+    }
+
+
+def render_power_expressions(templates, params):
+    """Render the nested distortion/resonance/convergence strings for one gate"""
+    return {
+        state: {aspect: template.format(**params) for aspect, template in aspects.items()}
+        for state, aspects in templates.items()
+    }
+
+
+class PowerExpressions:
+    """
+    Lazy view over power expressions
+    
+    Renders a gate's strings on first access from kb['power_templates'] +
+    gate['power_params'] and keeps recently used ones in a small cache.
+    Gates that still carry pre-rendered power_expressions are served as is.
+    """
+    
+    def __init__(self, kb, cache_size=256):
+        self.kb = kb
+        self.templates = kb.get('power_templates', POWER_TEMPLATES)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+    
+    def __getitem__(self, gate_num):
+        key = str(gate_num)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        
+        gate_data = self.kb['gates'][key]
+        if 'power_expressions' in gate_data:
+            return gate_data['power_expressions']
+        
+        rendered = render_power_expressions(self.templates, gate_data['power_params'])
+        self._cache[key] = rendered
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rendered
+    
+    def expanded_gates(self):
+        """Gates dict with power_expressions rendered in place (legacy layout)"""
+        gates = {}
+        for gate_num, gate_data in self.kb['gates'].items():
+            gate = {k: v for k, v in gate_data.items() if k != 'power_params'}
+            if 'power_params' in gate_data:
+                gate['power_expressions'] = self[gate_num]
+            gates[gate_num] = gate
+        return gates
+
+
 class KnowledgeBaseEnricher:
     def __init__(self, base_kb_path):
         """Load existing knowledge base"""
@@ -90,63 +176,30 @@ class KnowledgeBaseEnricher:
         return first_sentence
     
     def add_power_expressions(self):
-        """Add Shadow/Gift/Mastery expressions to gates"""
+        """Add Shadow/Gift/Mastery expressions to gates (as template parameters)"""
         print("\n⚡ ADDING POWER FIELD EXPRESSIONS...")
         
-        # Base power expression patterns
-        power_templates = {
-            'distortion': {
-                'feels': 'Experiencing {shadow}, feeling {theme} is blocked',
-                'looks': 'Struggling with {theme}, inconsistent expression',
-                'scenarios': 'When {theme} feels impossible • Inner conflict'
-            },
-            'resonance': {
-                'feels': 'Natural {gift} flowing, confident in {theme}',
-                'looks': 'Demonstrating {gift} regularly, inspiring others',
-                'scenarios': 'Living {theme} authentically • Making positive impact'
-            },
-            'convergence': {
-                'feels': 'Effortless {mastery}, magnetic presence',
-                'looks': 'Others seek your {mastery}, natural mastery',
-                'scenarios': '{mastery} without effort • Teaching through being'
-            }
-        }
+        # One shared template set; gates only carry their parameters
+        self.kb['power_templates'] = POWER_TEMPLATES
         
         gates_updated = 0
+        gates_compacted = 0
         for gate_num, gate_data in self.kb['gates'].items():
-            # Generate power expressions if not already present
-            if 'power_expressions' not in gate_data:
-                theme = gate_data.get('name', 'expression').lower()
-                keywords = gate_data.get('keywords', [])
-                
-                shadow = keywords[0] if len(keywords) > 0 else 'blocked'
-                gift = keywords[1] if len(keywords) > 1 else 'flowing'
-                mastery = f"{theme} mastery"
-                
-                gate_data['power_expressions'] = {
-                    'distortion': {
-                        'feels': power_templates['distortion']['feels'].format(
-                            shadow=shadow, theme=theme
-                        ),
-                        'looks': power_templates['distortion']['looks'].format(theme=theme),
-                        'scenarios': power_templates['distortion']['scenarios'].format(theme=theme)
-                    },
-                    'resonance': {
-                        'feels': power_templates['resonance']['feels'].format(
-                            gift=gift, theme=theme
-                        ),
-                        'looks': power_templates['resonance']['looks'].format(gift=gift),
-                        'scenarios': power_templates['resonance']['scenarios'].format(theme=theme)
-                    },
-                    'convergence': {
-                        'feels': power_templates['convergence']['feels'].format(mastery=mastery),
-                        'looks': power_templates['convergence']['looks'].format(mastery=mastery),
-                        'scenarios': power_templates['convergence']['scenarios'].format(mastery=mastery)
-                    }
-                }
+            params = power_params(gate_data)
+            
+            if 'power_expressions' in gate_data:
+                # Legacy fully rendered strings: keep only if they can't be reproduced
+                if render_power_expressions(POWER_TEMPLATES, params) == gate_data['power_expressions']:
+                    del gate_data['power_expressions']
+                    gate_data['power_params'] = params
+                    gates_compacted += 1
+            elif 'power_params' not in gate_data:
+                gate_data['power_params'] = params
                 gates_updated += 1
         
         print(f"   ✓ Added power expressions to {gates_updated} gates")
+        if gates_compacted:
+            print(f"   ✓ Compacted {gates_compacted} pre-rendered gates to template parameters")
     
     def add_zodiac_archetypes(self):
         """Add zodiac sign key phrases"""
@@ -230,31 +283,36 @@ class KnowledgeBaseEnricher:
         self.kb['zodiac'] = zodiac
         print(f"   ✓ Added 12 zodiac archetypes")
     
+    def model(self):
+        """Typed view (kb_model.KnowledgeBaseModel) of the KB as enriched so far"""
+        return KnowledgeBaseModel.from_dict(self.kb)
+    
     def generate_statistics(self):
         """Generate KB statistics"""
+        model = self.model()
         stats = {
-            'gates': len(self.kb.get('gates', {})),
-            'colors': len(self.kb.get('colors', {})),
-            'tones': len(self.kb.get('tones', {})),
-            'bases': len(self.kb.get('bases', {})),
+            **{k: v for k, v in model.counts().items() if k != 'incarnation_crosses'},
             'centers': len(self.kb.get('centers', {})),
-            'incarnation_crosses': len(self.kb.get('incarnation_crosses', {})),
+            'incarnation_crosses': len(model.crosses),
             'zodiac_signs': len(self.kb.get('zodiac', {})),
             'total_combinations': 64 * 6 * 6 * 6 * 5  # gates × lines × colors × tones × bases
         }
         
         # Calculate line coverage
-        total_lines = 0
-        for gate in self.kb['gates'].values():
-            total_lines += len(gate.get('lines', {}))
+        total_lines = model.line_count()
         
         stats['lines_extracted'] = total_lines
         stats['line_coverage'] = f"{(total_lines / 384) * 100:.1f}%"
         
         return stats
     
-    def export(self, output_path):
-        """Export enriched knowledge base"""
+    def export(self, output_path, expand_power_expressions=False):
+        """
+        Export enriched knowledge base
+        
+        expand_power_expressions: write fully rendered power_expressions per
+        gate (pre-template layout) for consumers that can't render templates
+        """
         # Update version
         self.kb['version'] = '2.0.0-enriched'
         self.kb['enriched'] = True
@@ -262,8 +320,13 @@ class KnowledgeBaseEnricher:
         # Add statistics
         self.kb['statistics'] = self.generate_statistics()
         
+        kb = self.kb
+        if expand_power_expressions:
+            kb = {k: v for k, v in self.kb.items() if k != 'power_templates'}
+            kb['gates'] = PowerExpressions(self.kb).expanded_gates()
+        
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.kb, f, indent=2, ensure_ascii=False)
+            json.dump(kb, f, indent=2, ensure_ascii=False)
         
         print(f"\n💾 EXPORTED ENRICHED KB: {output_path}")
         print(f"   Size: {Path(output_path).stat().st_size / 1024:.1f} KB")
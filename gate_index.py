@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+GATE → USERS INVERTED INDEX
+Posting lists for transit-triggered fan-out
+
+For every (gate, line) the index keeps a sorted uint32 array of internal
+user numbers; a gate-level posting (line 0) covers "any line". Users keep
+their external ids (user_anchors.user_id) through a dense id ↔ int map.
+
+    index.postings(59)          # everyone with gate 59 active
+    index.postings(59, 3)       # ... on line 3
+    for batch in index.fan_out(59): notify(batch)
+
+Postings live in one flat array plus offsets. Anchor writes go to small
+per-key add/remove sets that reads merge in, and compact() folds them back
+into the flat arrays with one vectorized rebuild.
+
+Writers (upsert/remove/compact) serialize on a lock. Readers take no lock:
+offsets, postings and the pending deltas are published together as one
+tuple of values that are never mutated afterwards (writers copy on write),
+so a read sees one consistent version from a single attribute load.
+"""
+
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_FIELDS = ['mind', 'heart', 'body', 'soul', 'spirit', 'shadow', 'observer', 'unity', 'source']
+
+# key = gate * 8 + line, line 0 = any line
+N_KEYS = 65 * 8
+
+# Pending changes before reads start paying noticeably for the merge
+COMPACT_EVERY = 100000
+
+_EMPTY = np.zeros(0, dtype=np.uint32)
+
+
+def posting_key(gate: int, line: Optional[int] = None) -> int:
+    return int(gate) * 8 + (int(line) if line else 0)
+
+
+def _build_postings(gate_lines: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(offsets [N_KEYS+1], postings) from a [users, fields] array of gate*8+line keys"""
+    n, f = gate_lines.shape
+    users = np.repeat(np.arange(n, dtype=np.uint32), f)
+    line_keys = gate_lines.reshape(-1)
+    active = line_keys != 0
+    users, line_keys = users[active], line_keys[active]
+
+    keys = np.concatenate([line_keys, line_keys & np.uint16(~7 & 0xFFFF)])
+    users = np.concatenate([users, users])
+
+    # Stable radix sort on the 16-bit key keeps users ascending within each key
+    order = np.argsort(keys, kind='stable')
+    keys, users = keys[order], users[order]
+
+    # A user repeats a key when two fields share a gate (and line); duplicates are adjacent
+    keep = np.ones(len(keys), dtype=bool)
+    keep[1:] = (keys[1:] != keys[:-1]) | (users[1:] != users[:-1])
+    keys, users = keys[keep], users[keep]
+
+    offsets = np.searchsorted(keys, np.arange(N_KEYS + 1)).astype(np.int64)
+    return offsets, users
+
+
+class GateIndex:
+    """Inverted (gate, line) → users index with incremental updates"""
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, compact_every: int = COMPACT_EVERY):
+        self.fields = list(fields)
+        self.compact_every = compact_every
+        self.user_ids: List[str] = []
+        self._numbers: Dict[str, int] = {}
+
+        # Current activations per user (gate*8+line per field, 0 = absent)
+        self._gate_lines = np.zeros((0, len(self.fields)), dtype=np.uint16)
+
+        # (offsets [N_KEYS+1], postings, {key: frozenset added}, {key: frozenset removed})
+        self._state: Tuple[np.ndarray, np.ndarray, Dict[int, frozenset], Dict[int, frozenset]] = (
+            np.zeros(N_KEYS + 1, dtype=np.int64), _EMPTY, {}, {})
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    # ─── bulk build ───────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, user_ids: Sequence[str], gates: np.ndarray, lines: np.ndarray,
+              fields: Sequence[str] = DEFAULT_FIELDS, **kwargs) -> 'GateIndex':
+        """From [N, F] gate and line arrays (0 = field absent), e.g. ChartStore columns"""
+        index = cls(fields, **kwargs)
+        index.user_ids = list(user_ids)
+        index._numbers = {user_id: i for i, user_id in enumerate(index.user_ids)}
+        gates = np.asarray(gates, dtype=np.uint16)
+        index._gate_lines = np.where(gates > 0, gates * 8 + np.asarray(lines, dtype=np.uint16), 0).astype(np.uint16)
+        index.compact()
+        return index
+
+    @classmethod
+    def from_anchors(cls, anchors: Iterable[Tuple[str, Dict]], fields: Sequence[str] = DEFAULT_FIELDS,
+                     **kwargs) -> 'GateIndex':
+        """From (user_id, {field: {gate, line, ...}}) pairs, e.g. stored anchor coordinates"""
+        user_ids, rows = [], []
+        for user_id, chart_fields in anchors:
+            user_ids.append(user_id)
+            rows.append([
+                (chart_fields[f]['gate'], chart_fields[f]['line']) if f in chart_fields else (0, 0)
+                for f in fields
+            ])
+        pairs = np.array(rows, dtype=np.uint16).reshape(len(rows), len(fields), 2)
+        return cls.build(user_ids, pairs[..., 0], pairs[..., 1], fields, **kwargs)
+
+    # ─── incremental updates ──────────────────────────────────────────
+
+    def _number(self, user_id: str) -> int:
+        # Caller holds _lock
+        number = self._numbers.get(user_id)
+        if number is None:
+            number = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self._numbers[user_id] = number
+            if number >= len(self._gate_lines):
+                grown = np.zeros((max(1024, 2 * len(self._gate_lines)), len(self.fields)), dtype=np.uint16)
+                grown[:len(self._gate_lines)] = self._gate_lines
+                self._gate_lines = grown
+        return number
+
+    @staticmethod
+    def _keys(row: np.ndarray) -> set:
+        line_keys = {int(k) for k in row if k}
+        return line_keys | {k & ~7 for k in line_keys}
+
+    def upsert(self, user_id: str, chart_fields: Dict):
+        """Add or replace one user's activations ({field: {gate, line, ...}})"""
+        row = np.array([
+            chart_fields[f]['gate'] * 8 + chart_fields[f]['line'] if f in chart_fields else 0
+            for f in self.fields
+        ], dtype=np.uint16)
+        with self._lock:
+            number = self._number(user_id)
+            old = self._keys(self._gate_lines[number])
+            # Store the row first: _apply may compact, which rebuilds from _gate_lines
+            self._gate_lines[number] = row
+            self._apply(number, old, self._keys(row))
+
+    def remove(self, user_id: str):
+        with self._lock:
+            number = self._numbers.get(user_id)
+            if number is None:
+                return
+            old = self._keys(self._gate_lines[number])
+            self._gate_lines[number] = 0
+            self._apply(number, old, set())
+
+    def _apply(self, number: int, old: set, new: set):
+        # Caller holds _lock. Invariant: a number is never in both added[key] and removed[key]
+        offsets, postings, added, removed = self._state
+        added, removed = dict(added), dict(removed)
+        for key in old - new:
+            if number in added.get(key, ()):
+                added[key] = added[key] - {number}
+            else:
+                removed[key] = removed.get(key, frozenset()) | {number}
+        for key in new - old:
+            if number in removed.get(key, ()):
+                removed[key] = removed[key] - {number}
+            else:
+                added[key] = added.get(key, frozenset()) | {number}
+        self._state = (offsets, postings, added, removed)
+
+        self.pending += len(old ^ new)
+        if self.pending >= self.compact_every:
+            self._compact()
+
+    def compact(self):
+        """Fold pending changes into the flat posting arrays"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        offsets, postings = _build_postings(self._gate_lines[:len(self.user_ids)])
+        self._state = (offsets, postings, {}, {})
+        self.pending = 0
+
+    # ─── reads ────────────────────────────────────────────────────────
+
+    def postings(self, gate: int, line: Optional[int] = None) -> np.ndarray:
+        """Sorted internal user numbers with gate (and line) active"""
+        key = posting_key(gate, line)
+        offsets, postings, added, removed = self._state
+        base = postings[offsets[key]:offsets[key + 1]]
+
+        removed = removed.get(key)
+        if removed:
+            base = base[~np.isin(base, np.fromiter(removed, dtype=np.uint32, count=len(removed)))]
+        added = added.get(key)
+        if added:
+            base = np.union1d(base, np.fromiter(added, dtype=np.uint32, count=len(added)))
+        return base
+
+    def count(self, gate: int, line: Optional[int] = None) -> int:
+        return len(self.postings(gate, line))
+
+    def users_with(self, gate: int, line: Optional[int] = None) -> List[str]:
+        ids = self.user_ids
+        return [ids[i] for i in self.postings(gate, line)]
+
+    def fan_out(self, gate: int, line: Optional[int] = None, batch_size: int = 10000) -> Iterator[List[str]]:
+        """External user ids with the gate active, in batches (e.g. for a notification queue)"""
+        numbers = self.postings(gate, line)
+        ids = self.user_ids
+        for start in range(0, len(numbers), batch_size):
+            yield [ids[i] for i in numbers[start:start + batch_size]]
+
+    def gate_counts(self) -> np.ndarray:
+        """Users per gate 1-64 (index 0 = gate 1), from the compacted postings"""
+        if self.pending:
+            self.compact()
+        offsets = self._state[0]
+        gate_keys = np.arange(1, 65) * 8
+        return offsets[gate_keys + 1] - offsets[gate_keys]
+
+    # ─── persistence ──────────────────────────────────────────────────
+
+    def save(self, path: str):
+        with self._lock:
+            if self.pending:
+                self._compact()
+            offsets, postings, _, _ = self._state
+            np.savez(
+                path,
+                fields=np.array(self.fields),
+                user_ids=np.array(self.user_ids),
+                gate_lines=self._gate_lines[:len(self.user_ids)],
+                offsets=offsets,
+                postings=postings,
+            )
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'GateIndex':
+        with np.load(path) as data:
+            index = cls([str(f) for f in data['fields']], **kwargs)
+            index.user_ids = [str(u) for u in data['user_ids']]
+            index._numbers = {user_id: i for i, user_id in enumerate(index.user_ids)}
+            index._gate_lines = data['gate_lines'].copy()
+            index._state = (data['offsets'], data['postings'], {}, {})
+        return index
+
+    def stats(self) -> Dict:
+        offsets, postings, _, _ = self._state
+        return {
+            'users': len(self.user_ids),
+            'postings': int(len(postings)),
+            'postings_bytes': int(postings.nbytes + offsets.nbytes),
+            'pending_changes': self.pending,
+        }
@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+OFFLINE GAZETTEER
+Birth location → coordinates → historical UTC offset, with no network geocoder
+
+    gazetteer = Gazetteer.load()                     # bundled seed places
+    place = gazetteer.resolve('San Francisco, CA')   # exact / alias / fuzzy name
+    place = gazetteer.nearest(37.77, -122.42)        # k-d tree on unit vectors
+    utc = local_to_utc('1990-09-18', '21:34', place.timezone)
+
+Places come from gazetteer_places.csv (a seed of major cities) or from a
+GeoNames dump (cities500.txt, cities15000.txt, ...) via from_geonames();
+save() writes a compact .npz (packed UTF-8 strings, float32 coordinates)
+that loads in milliseconds.
+
+UTC offsets come from the IANA tz database, read from the bundled tzdata
+package (so every host applies the same rules release) with the system
+zoneinfo as fallback; historical rules - DST changes, war time, local
+mean time before standardisation - apply to old birth dates.
+
+Batch APIs (resolve_many, nearest_many, to_utc_many) deduplicate inputs and
+vectorize the tree descent so a million signup rows resolve in seconds.
+"""
+
+import argparse
+import csv
+import difflib
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from functools import lru_cache
+from importlib import resources
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+try:
+    import tzdata  # bundled IANA rules, pinned in requirements.txt
+except ImportError:
+    tzdata = None
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer_places.csv')
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Points per k-d tree leaf (leaves hold LEAF_SIZE/2 .. LEAF_SIZE points)
+LEAF_SIZE = 16
+
+# Queries per vectorized batch (bounds the [batch, leaf, 3] temporaries)
+QUERY_BATCH = 1 << 16
+
+FUZZY_CUTOFF = 0.85
+
+US_STATES = {
+    'alabama': 'AL', 'alaska': 'AK', 'arizona': 'AZ', 'arkansas': 'AR', 'california': 'CA',
+    'colorado': 'CO', 'connecticut': 'CT', 'delaware': 'DE', 'district of columbia': 'DC',
+    'florida': 'FL', 'georgia': 'GA', 'hawaii': 'HI', 'idaho': 'ID', 'illinois': 'IL',
+    'indiana': 'IN', 'iowa': 'IA', 'kansas': 'KS', 'kentucky': 'KY', 'louisiana': 'LA',
+    'maine': 'ME', 'maryland': 'MD', 'massachusetts': 'MA', 'michigan': 'MI', 'minnesota': 'MN',
+    'mississippi': 'MS', 'missouri': 'MO', 'montana': 'MT', 'nebraska': 'NE', 'nevada': 'NV',
+    'new hampshire': 'NH', 'new jersey': 'NJ', 'new mexico': 'NM', 'new york': 'NY',
+    'north carolina': 'NC', 'north dakota': 'ND', 'ohio': 'OH', 'oklahoma': 'OK', 'oregon': 'OR',
+    'pennsylvania': 'PA', 'rhode island': 'RI', 'south carolina': 'SC', 'south dakota': 'SD',
+    'tennessee': 'TN', 'texas': 'TX', 'utah': 'UT', 'vermont': 'VT', 'virginia': 'VA',
+    'washington': 'WA', 'west virginia': 'WV', 'wisconsin': 'WI', 'wyoming': 'WY',
+}
+
+COUNTRY_ALIASES = {
+    'usa': 'US', 'united states': 'US', 'united states of america': 'US', 'america': 'US',
+    'uk': 'GB', 'united kingdom': 'GB', 'great britain': 'GB', 'britain': 'GB',
+    'england': 'GB', 'scotland': 'GB', 'wales': 'GB', 'northern ireland': 'GB',
+    'canada': 'CA', 'mexico': 'MX', 'brazil': 'BR', 'argentina': 'AR', 'france': 'FR',
+    'germany': 'DE', 'deutschland': 'DE', 'spain': 'ES', 'italy': 'IT', 'portugal': 'PT',
+    'netherlands': 'NL', 'holland': 'NL', 'switzerland': 'CH', 'austria': 'AT', 'ireland': 'IE',
+    'russia': 'RU', 'china': 'CN', 'japan': 'JP', 'india': 'IN', 'australia': 'AU',
+    'new zealand': 'NZ', 'south africa': 'ZA', 'south korea': 'KR', 'korea': 'KR',
+}
+
+
+class Place(NamedTuple):
+    id: int
+    name: str
+    admin1: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+    timezone: str
+
+    @property
+    def label(self) -> str:
+        return ', '.join(part for part in (self.name, self.admin1, self.country) if part)
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII key: 'São Paulo' → 'sao paulo', 'St. Louis' → 'saint louis'"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r'[^a-z0-9]+', ' ', text).strip()
+    return re.sub(r'^(st|ste|saint) ', 'saint ', text)
+
+
+def to_unit(lat, lon) -> np.ndarray:
+    """Degrees → [n, 3] unit vectors (chord distance is monotonic in great-circle distance)"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.asarray(chord) / 2))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# K-D TREE
+# ═══════════════════════════════════════════════════════════════════
+
+class KDTree:
+    """
+    Balanced k-d tree in flat arrays over 3-D unit vectors
+    Inner node i has children 2i+1 / 2i+2; leaf j owns perm[leaf_start[j]:leaf_start[j+1]].
+    Each leaf also keeps its cell bounds, so a batch query whose nearest-in-leaf
+    ball fits inside the cell is exact without backtracking.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        n = len(self.points)
+        self.depth = max(0, math.ceil(math.log2(n / leaf_size))) if n else 0
+        n_inner = (1 << self.depth) - 1
+        n_leaves = 1 << self.depth
+
+        self.split_dim = np.zeros(n_inner, dtype=np.int8)
+        self.split_val = np.zeros(n_inner, dtype=np.float64)
+        self.perm = np.arange(n, dtype=np.int64)
+        self.leaf_start = np.zeros(n_leaves + 1, dtype=np.int64)
+        self.leaf_lo = np.full((n_leaves, 3), -np.inf)
+        self.leaf_hi = np.full((n_leaves, 3), np.inf)
+
+        # Level-order build: (node, lo, hi, cell_lo, cell_hi)
+        level = [(0, 0, n, self.leaf_lo[0].copy(), self.leaf_hi[0].copy())]
+        for _ in range(self.depth):
+            children = []
+            for node, lo, hi, cell_lo, cell_hi in level:
+                mid = (lo + hi) // 2
+                dim, value = 0, 0.0
+                if hi > lo:
+                    coords = self.points[self.perm[lo:hi]]
+                    dim = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+                    if mid < hi:
+                        order = np.argpartition(coords[:, dim], mid - lo)
+                        self.perm[lo:hi] = self.perm[lo:hi][order]
+                        value = float(self.points[self.perm[mid], dim])
+                self.split_dim[node] = dim
+                self.split_val[node] = value
+
+                left_hi, right_lo = cell_hi.copy(), cell_lo.copy()
+                left_hi[dim] = value
+                right_lo[dim] = value
+                children.append((2 * node + 1, lo, mid, cell_lo, left_hi))
+                children.append((2 * node + 2, mid, hi, right_lo, cell_hi))
+            level = children
+
+        for node, lo, hi, cell_lo, cell_hi in level:
+            leaf = node - n_inner
+            self.leaf_start[leaf] = lo
+            self.leaf_start[leaf + 1] = hi
+            self.leaf_lo[leaf] = cell_lo
+            self.leaf_hi[leaf] = cell_hi
+        self.max_leaf = int(np.diff(self.leaf_start).max()) if n else 0
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    # ─── single query ─────────────────────────────────────────────────
+
+    def query(self, point: np.ndarray) -> Tuple[int, float]:
+        """(index, chord distance) of the nearest point"""
+        best = [-1, np.inf]
+        self._search(0, 0, np.asarray(point, dtype=np.float64), best)
+        return best[0], math.sqrt(best[1])
+
+    def _search(self, node: int, level: int, q: np.ndarray, best: List):
+        if level == self.depth:
+            leaf = node - ((1 << self.depth) - 1)
+            ids = self.perm[self.leaf_start[leaf]:self.leaf_start[leaf + 1]]
+            if len(ids):
+                d2 = ((self.points[ids] - q) ** 2).sum(axis=1)
+                i = int(d2.argmin())
+                if d2[i] < best[1]:
+                    best[0], best[1] = int(ids[i]), float(d2[i])
+            return
+
+        diff = q[self.split_dim[node]] - self.split_val[node]
+        near, far = (2 * node + 2, 2 * node + 1) if diff >= 0 else (2 * node + 1, 2 * node + 2)
+        self._search(near, level + 1, q, best)
+        if diff * diff < best[1]:
+            self._search(far, level + 1, q, best)
+
+    # ─── batch query ──────────────────────────────────────────────────
+
+    def query_many(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest index and chord distance for each of [n, 3] points"""
+        points = np.asarray(points, dtype=np.float64)
+        index = np.full(len(points), -1, dtype=np.int64)
+        dist = np.full(len(points), np.inf)
+        for start in range(0, len(points), QUERY_BATCH):
+            stop = start + QUERY_BATCH
+            index[start:stop], dist[start:stop] = self._query_batch(points[start:stop])
+        return index, dist
+
+    def _query_batch(self, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.arange(len(q))
+        node = np.zeros(len(q), dtype=np.int64)
+        for _ in range(self.depth):
+            go_right = q[rows, self.split_dim[node]] >= self.split_val[node]
+            node = 2 * node + 1 + go_right
+        leaf = node - ((1 << self.depth) - 1)
+
+        # Nearest point inside each query's own leaf
+        slots = self.leaf_start[leaf][:, None] + np.arange(self.max_leaf)
+        valid = slots < self.leaf_start[leaf + 1][:, None]
+        candidates = self.perm[np.minimum(slots, len(self.perm) - 1)]
+        d2 = ((self.points[candidates] - q[:, None, :]) ** 2).sum(axis=2)
+        d2[~valid] = np.inf
+        best = d2.argmin(axis=1)
+        index = candidates[rows, best]
+        dist = np.sqrt(d2[rows, best])
+
+        # Exact when the ball around q reaches no other cell; otherwise backtrack
+        r = dist[:, None]
+        exact = ((q - r >= self.leaf_lo[leaf]) & (q + r <= self.leaf_hi[leaf])).all(axis=1)
+        pending = np.nonzero(~exact)[0]
+        if len(pending):
+            index[pending], dist[pending] = self._backtrack(q[pending], index[pending], dist[pending])
+        return index, dist
+
+    def _backtrack(self, q: np.ndarray, index: np.ndarray, dist: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized branch-and-bound: walk (query, node) pairs level by level,
+        keeping every child whose half-space is closer than the current best
+        """
+        bound2 = dist ** 2
+        pair_q = np.arange(len(q))
+        pair_node = np.zeros(len(q), dtype=np.int64)
+        for _ in range(self.depth):
+            diff = q[pair_q, self.split_dim[pair_node]] - self.split_val[pair_node]
+            keep_left = (diff < 0) | (diff * diff <= bound2[pair_q])
+            keep_right = (diff >= 0) | (diff * diff <= bound2[pair_q])
+            pair_q = np.concatenate([pair_q[keep_left], pair_q[keep_right]])
+            pair_node = np.concatenate([2 * pair_node[keep_left] + 1, 2 * pair_node[keep_right] + 2])
+        leaf = pair_node - ((1 << self.depth) - 1)
+
+        slots = self.leaf_start[leaf][:, None] + np.arange(self.max_leaf)
+        valid = slots < self.leaf_start[leaf + 1][:, None]
+        candidates = self.perm[np.minimum(slots, len(self.perm) - 1)]
+        d2 = ((self.points[candidates] - q[pair_q][:, None, :]) ** 2).sum(axis=2)
+        d2[~valid] = np.inf
+        best = d2.argmin(axis=1)
+        pair_d2 = d2[np.arange(len(leaf)), best]
+        pair_index = candidates[np.arange(len(leaf)), best]
+
+        # Per query: the pair with the smallest distance
+        order = np.lexsort((pair_d2, pair_q))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pair_q[order][1:] != pair_q[order][:-1]
+        winners = order[first]
+        index = index.copy()
+        dist = dist.copy()
+        index[pair_q[winners]] = pair_index[winners]
+        dist[pair_q[winners]] = np.sqrt(pair_d2[winners])
+        return index, dist
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TIME ZONES
+# ═══════════════════════════════════════════════════════════════════
+
+def parse_local(birth_date: str, birth_time: Optional[str] = None) -> datetime:
+    """'1990-09-18' + '21:34' (or '21:34:05') → naive local datetime (noon if time unknown)"""
+    time_part = birth_time or '12:00'
+    if time_part.count(':') == 1:
+        time_part += ':00'
+    return datetime.fromisoformat(f'{birth_date}T{time_part}')
+
+
+@lru_cache(maxsize=None)
+def zone(tz: str) -> ZoneInfo:
+    """Time zone from the bundled tzdata package, else the system database"""
+    if tzdata is not None:
+        try:
+            source = resources.files('tzdata.zoneinfo').joinpath(*tz.split('/'))
+            with source.open('rb') as f:
+                return ZoneInfo.from_file(f, key=tz)
+        except (OSError, ValueError):
+            pass
+    return ZoneInfo(tz)
+
+
+def local_to_utc(birth_date: str, birth_time: Optional[str], tz: str, fold: int = 0) -> datetime:
+    """
+    Local wall time in tz → aware UTC datetime, using the rules in force on that date
+    fold picks the first (0) or second (1) occurrence of a repeated wall time at a
+    DST fall-back; wall times skipped by a spring-forward resolve per PEP 495.
+    """
+    local = parse_local(birth_date, birth_time).replace(tzinfo=zone(tz), fold=fold)
+    return local.astimezone(timezone.utc)
+
+
+def utc_offset_minutes(tz: str, local: datetime, fold: int = 0) -> int:
+    offset = local.replace(tzinfo=zone(tz), fold=fold).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+def to_utc_many(dates: Sequence[str], times: Sequence[Optional[str]],
+                timezones: Sequence[str]) -> np.ndarray:
+    """datetime64[s] UTC for each (date, time, tz) row; NaT where the row is invalid"""
+    out = np.empty(len(dates), dtype='datetime64[s]')
+    cache: Dict[Tuple, np.datetime64] = {}
+    nat = np.datetime64('NaT', 's')
+    for i, key in enumerate(zip(dates, times, timezones)):
+        value = cache.get(key)
+        if value is None:
+            try:
+                utc = local_to_utc(*key)
+                value = np.datetime64(utc.replace(tzinfo=None), 's')
+            except (ValueError, KeyError, TypeError):
+                value = nat
+            cache[key] = value
+        out[i] = value
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════
+# GAZETTEER
+# ═══════════════════════════════════════════════════════════════════
+
+def _pack(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Strings → (utf-8 blob, int64 offsets)"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+class Gazetteer:
+    """Places with a name index (exact, prefix, fuzzy) and a k-d tree for nearest lookup"""
+
+    def __init__(self, names: List[str], admin1: List[str], countries: List[str],
+                 lat: np.ndarray, lon: np.ndarray, population: np.ndarray,
+                 timezones: List[str], tz_index: np.ndarray,
+                 aliases: Iterable[Tuple[int, str]] = ()):
+        self.names = names
+        self.admin1 = admin1
+        self.countries = countries
+        self.lat = np.asarray(lat, dtype=np.float32)
+        self.lon = np.asarray(lon, dtype=np.float32)
+        self.population = np.asarray(population, dtype=np.int64)
+        self.timezones = timezones
+        self.tz_index = np.asarray(tz_index, dtype=np.uint16)
+        self.aliases = list(aliases)
+
+        # Sorted (key, place) pairs for bisect; names first, then aliases
+        entries = sorted(
+            [(normalize(name), i) for i, name in enumerate(names)] +
+            [(normalize(alias), i) for i, alias in self.aliases]
+        )
+        self._keys = [key for key, _ in entries]
+        self._key_places = np.array([i for _, i in entries], dtype=np.int64)
+        self._buckets: Dict[str, List[str]] = {}
+        for key in dict.fromkeys(self._keys):
+            if key:
+                self._buckets.setdefault(key[0], []).append(key)
+
+        self.tree = KDTree(to_unit(self.lat, self.lon))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def place(self, i: int) -> Place:
+        return Place(int(i), self.names[i], self.admin1[i], self.countries[i],
+                     float(self.lat[i]), float(self.lon[i]), int(self.population[i]),
+                     self.timezones[self.tz_index[i]])
+
+    # ─── construction ─────────────────────────────────────────────────
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'Gazetteer':
+        names, admin1, countries, lat, lon, population, tz_index, aliases = [], [], [], [], [], [], [], []
+        timezones: Dict[str, int] = {}
+        for i, row in enumerate(rows):
+            names.append(row['name'])
+            admin1.append(row.get('admin1') or '')
+            countries.append(row.get('country') or '')
+            lat.append(float(row['lat']))
+            lon.append(float(row['lon']))
+            population.append(int(row.get('population') or 0))
+            tz_index.append(timezones.setdefault(row['timezone'], len(timezones)))
+            aliases.extend((i, alias) for alias in row.get('alt_names') or () if alias)
+        return cls(names, admin1, countries, np.array(lat), np.array(lon), np.array(population),
+                   list(timezones), np.array(tz_index), aliases)
+
+    @classmethod
+    def from_csv(cls, path: str = SEED_PATH) -> 'Gazetteer':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            rows = [dict(row, alt_names=(row.get('alt_names') or '').split('|')) for row in csv.DictReader(f)]
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_geonames(cls, path: str, min_population: int = 0, max_aliases: int = 8) -> 'Gazetteer':
+        """From a GeoNames cities*.txt dump (tab-separated, 19 columns)"""
+        def rows():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    cols = line.rstrip('\n').split('\t')
+                    if len(cols) < 18 or int(cols[14] or 0) < min_population:
+                        continue
+                    # alternatenames carries every language; keep the Latin-script ones
+                    alts = [a for a in cols[3].split(',') if a and a.isascii()][:max_aliases]
+                    yield {
+                        'name': cols[1], 'admin1': cols[10], 'country': cols[8],
+                        'lat': cols[4], 'lon': cols[5], 'population': cols[14] or 0,
+                        'timezone': cols[17], 'alt_names': [cols[2]] + alts,
+                    }
+        return cls.from_rows(rows())
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'Gazetteer':
+        """From a saved .npz, or the bundled seed CSV when no path is given"""
+        if path is None or not path.endswith('.npz'):
+            return cls.from_csv(path or SEED_PATH)
+        with np.load(path) as data:
+            strings = {name: _unpack(data[f'{name}_blob'], data[f'{name}_offsets'])
+                       for name in ('names', 'admin1', 'countries', 'timezones', 'aliases')}
+            aliases = zip(data['alias_places'].tolist(), strings['aliases'])
+            return cls(strings['names'], strings['admin1'], strings['countries'],
+                       data['lat'], data['lon'], data['population'],
+                       strings['timezones'], data['tz_index'], aliases)
+
+    def save(self, path: str):
+        arrays = {}
+        for name, values in (('names', self.names), ('admin1', self.admin1), ('countries', self.countries),
+                             ('timezones', self.timezones), ('aliases', [a for _, a in self.aliases])):
+            arrays[f'{name}_blob'], arrays[f'{name}_offsets'] = _pack(values)
+        np.savez_compressed(
+            path, lat=self.lat, lon=self.lon, population=self.population, tz_index=self.tz_index,
+            alias_places=np.array([i for i, _ in self.aliases], dtype=np.int64), **arrays
+        )
+
+    # ─── name lookup ──────────────────────────────────────────────────
+
+    def _exact(self, key: str) -> np.ndarray:
+        lo = bisect_left(self._keys, key)
+        hi = bisect_right(self._keys, key, lo)
+        return np.unique(self._key_places[lo:hi])
+
+    def search(self, prefix: str, limit: int = 10) -> List[Place]:
+        """Typeahead: places whose name or alias starts with prefix, most populous first"""
+        key = normalize(prefix)
+        if not key:
+            return []
+        lo = bisect_left(self._keys, key)
+        hi = bisect_left(self._keys, key + '\x7f', lo)
+        ids = np.unique(self._key_places[lo:hi])
+        ids = ids[np.argsort(-self.population[ids], kind='stable')[:limit]]
+        return [self.place(i) for i in ids]
+
+    def _qualifies(self, i: int, qualifiers: List[str]) -> bool:
+        admin1, country = self.admin1[i].lower(), self.countries[i].lower()
+        for q in qualifiers:
+            code = (US_STATES.get(q) or COUNTRY_ALIASES.get(q) or q).lower()
+            if code not in (admin1, country):
+                return False
+        return True
+
+    def resolve(self, query: str, fuzzy: bool = True) -> Optional[Place]:
+        """
+        'San Francisco, CA' → Place; None when nothing matches
+        The first comma-separated part is the place name, the rest narrow it by
+        admin1 code, state name or country; when qualifiers are given and no
+        candidate satisfies them the query is unresolved (None) rather than
+        silently answered with a same-name place elsewhere. Ties go to the
+        larger population; misspellings fall back to difflib over names
+        sharing the first letter.
+        """
+        i = self.resolve_id(query, fuzzy)
+        return self.place(i) if i >= 0 else None
+
+    def resolve_id(self, query: str, fuzzy: bool = True) -> int:
+        parts = [normalize(p) for p in query.split(',')]
+        parts = [p for p in parts if p]
+        if not parts:
+            return -1
+        key, qualifiers = parts[0], parts[1:]
+
+        ids = self._exact(key)
+        if not len(ids) and fuzzy:
+            close = difflib.get_close_matches(key, self._buckets.get(key[0], []), n=5, cutoff=FUZZY_CUTOFF)
+            ids = np.unique(np.concatenate([self._exact(k) for k in close])) if close else ids
+        if not len(ids):
+            return -1
+
+        if qualifiers:
+            # 'Paris, TX' must not become Paris, FR: a wrong zone shifts the birth by hours
+            ids = np.asarray([i for i in ids if self._qualifies(i, qualifiers)], dtype=np.int64)
+            if not len(ids):
+                return -1
+        return int(ids[np.argmax(self.population[ids])])
+
+    def resolve_many(self, queries: Iterable[str], fuzzy: bool = True) -> np.ndarray:
+        """Place ids (-1 = unresolved); each distinct query string is resolved once"""
+        cache: Dict[str, int] = {}
+        out = []
+        for query in queries:
+            i = cache.get(query)
+            if i is None:
+                i = cache[query] = self.resolve_id(query, fuzzy) if query else -1
+            out.append(i)
+        return np.array(out, dtype=np.int64)
+
+    # ─── coordinate lookup ────────────────────────────────────────────
+
+    def nearest(self, lat: float, lon: float) -> Tuple[Place, float]:
+        """(nearest place, great-circle km)"""
+        i, chord = self.tree.query(to_unit(lat, lon))
+        return self.place(i), float(chord_to_km(chord))
+
+    def nearest_many(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """Place ids and km for arrays of coordinates (duplicates are queried once)"""
+        coords = np.stack([np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)], axis=1)
+        unique, inverse = np.unique(coords, axis=0, return_inverse=True)
+        ids, chord = self.tree.query_many(to_unit(unique[:, 0], unique[:, 1]))
+        inverse = inverse.reshape(-1)
+        return ids[inverse], chord_to_km(chord)[inverse]
+
+    def timezone_of(self, i: int) -> str:
+        return self.timezones[self.tz_index[i]]
+
+    # ─── birth data ───────────────────────────────────────────────────
+
+    def resolve_birth(self, birth_data: Dict) -> Optional[Dict]:
+        """
+        Location and UTC moment for a birth_data dict
+        Uses birth_data['lat'/'lon'] when present, else birth_data['location'].
+        """
+        if birth_data.get('lat') is not None and birth_data.get('lon') is not None:
+            place, distance = self.nearest(birth_data['lat'], birth_data['lon'])
+            lat, lon = float(birth_data['lat']), float(birth_data['lon'])
+        else:
+            place = self.resolve(birth_data.get('location') or '')
+            if place is None:
+                return None
+            lat, lon, distance = place.lat, place.lon, 0.0
+
+        local = parse_local(birth_data['birth_date'], birth_data.get('birth_time'))
+        utc = local_to_utc(birth_data['birth_date'], birth_data.get('birth_time'), place.timezone)
+        return {
+            'place': place.label,
+            'lat': round(lat, 4),
+            'lon': round(lon, 4),
+            'distance_km': round(distance, 1),
+            'timezone': place.timezone,
+            'utc_offset_minutes': utc_offset_minutes(place.timezone, local),
+            'utc': utc.isoformat(),
+            'time_known': bool(birth_data.get('birth_time')),
+        }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CLI
+# ═══════════════════════════════════════════════════════════════════
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline place and time zone lookup')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='compile a GeoNames dump or CSV into a compact .npz')
+    build.add_argument('source')
+    build.add_argument('out')
+    build.add_argument('--min-population', type=int, default=0)
+
+    resolve = sub.add_parser('resolve', help='look up a place name (and optionally a local birth time)')
+    resolve.add_argument('location')
+    resolve.add_argument('--date')
+    resolve.add_argument('--time')
+
+    nearest = sub.add_parser('nearest', help='nearest place to a coordinate')
+    nearest.add_argument('lat', type=float)
+    nearest.add_argument('lon', type=float)
+
+    for p in (resolve, nearest):
+        p.add_argument('--gazetteer', help='.npz or .csv (default: bundled seed)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if args.source.endswith('.csv'):
+            gazetteer = Gazetteer.from_csv(args.source)
+        else:
+            gazetteer = Gazetteer.from_geonames(args.source, args.min_population)
+        gazetteer.save(args.out)
+        print(f"✅ {len(gazetteer):,} places → {args.out} ({os.path.getsize(args.out):,} bytes)")
+        return
+
+    gazetteer = Gazetteer.load(args.gazetteer)
+    if args.command == 'nearest':
+        place, km = gazetteer.nearest(args.lat, args.lon)
+        print(json.dumps({**place._asdict(), 'distance_km': round(km, 1)}, indent=2, ensure_ascii=False))
+        return
+
+    if args.date:
+        result = gazetteer.resolve_birth({'location': args.location, 'birth_date': args.date,
+                                          'birth_time': args.time})
+    else:
+        place = gazetteer.resolve(args.location)
+        result = place._asdict() if place else None
+    if result is None:
+        print(f"❌ No match for {args.location!r}")
+        sys.exit(1)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+TYPED KNOWLEDGE BASE MODEL
+__slots__ objects for gates, lines, colors, tones, bases and crosses
+
+Built once from the enriched KB dict. Tables are int-indexed lists with an
+unused slot 0, so a coordinate maps straight to an object:
+
+    model.gates[coordinate['gate']].name
+    model.colors[coordinate['color']].motivation
+
+No str() keys, no per-gate dicts for alt_names/lines/power_expressions,
+and repeated strings (keywords, template phrases) are interned.
+"""
+
+import json
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+POWER_STATES = ('distortion', 'resonance', 'convergence')
+
+
+def _s(value) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _words(values) -> Optional[Tuple[str, ...]]:
+    return tuple(_s(v) for v in values) if values is not None else None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# GATES
+# ═══════════════════════════════════════════════════════════════════
+
+class Line:
+    __slots__ = ('number', 'title', 'text', 'keywords', 'type')
+
+    def __init__(self, number: int, title: str = '', text: str = '',
+                 keywords: Sequence[str] = (), type: str = ''):
+        self.number = number
+        self.title = _s(title)
+        self.text = text
+        self.keywords = _words(keywords)
+        self.type = _s(type)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Line':
+        return cls(int(data['number']), data.get('title', ''), data.get('text', ''),
+                   data.get('keywords', ()), data.get('type', ''))
+
+
+class Expression:
+    """How one power state feels, looks, and plays out"""
+    __slots__ = ('feels', 'looks', 'scenarios')
+
+    def __init__(self, feels: str, looks: str, scenarios: str):
+        self.feels = feels
+        self.looks = looks
+        self.scenarios = scenarios
+
+
+class GatePower:
+    """One gate's rendered distortion/resonance/convergence expressions"""
+    __slots__ = POWER_STATES
+
+    def __init__(self, distortion: Expression, resonance: Expression, convergence: Expression):
+        self.distortion = distortion
+        self.resonance = resonance
+        self.convergence = convergence
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'GatePower':
+        return cls(*(Expression(**data[state]) for state in POWER_STATES))
+
+    def __getitem__(self, state: str) -> Expression:
+        return getattr(self, state)
+
+
+def power_renderer(templates: Optional[Dict], params: Dict[int, Dict],
+                   cache_size: int = 256) -> Callable[[int], GatePower]:
+    """
+    gate number → GatePower, rendered on first access with
+    enrich_knowledge_base.render_power_expressions and kept for recently used gates
+    """
+    from enrich_knowledge_base import POWER_TEMPLATES, render_power_expressions
+    templates = templates or POWER_TEMPLATES
+
+    @lru_cache(maxsize=cache_size)
+    def render(number: int) -> GatePower:
+        return GatePower.from_dict(render_power_expressions(templates, params[number]))
+
+    return render
+
+
+# Lines 1-6, index 0 unused; shared by every gate without extracted lines
+NO_LINES: Tuple[Optional[Line], ...] = (None,) * 7
+
+
+class Gate:
+    __slots__ = ('number', 'name', 'human_design_name', 'iching_name', 'keywords',
+                 'yijing', 'hexagram', 'lines', 'power_params', '_power', '_render')
+
+    def __init__(self, number: int, name: str, keywords: Optional[Sequence[str]] = None,
+                 human_design_name: str = '', iching_name: str = '', yijing: str = '',
+                 hexagram: str = '', lines: Tuple[Optional[Line], ...] = NO_LINES,
+                 power: Optional[GatePower] = None, power_params: Optional[Dict] = None):
+        self.number = number
+        self.name = _s(name)
+        self.keywords = _words(keywords)  # None when the KB has no keywords key
+        self.human_design_name = _s(human_design_name)
+        self.iching_name = _s(iching_name)
+        self.yijing = _s(yijing)
+        self.hexagram = hexagram
+        self.lines = lines
+        self._power = power
+        self.power_params = power_params  # rendered into power on first access
+        self._render: Optional[Callable[[int], GatePower]] = None  # set by the model
+
+    @property
+    def power(self) -> Optional[GatePower]:
+        if self._power is None and self._render is not None:
+            return self._render(self.number)
+        return self._power
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Gate':
+        lines = NO_LINES
+        if data.get('lines'):
+            slots = [None] * 7
+            for line in data['lines'].values():
+                slots[int(line['number'])] = Line.from_dict(line)
+            lines = tuple(slots)
+
+        power = params = None
+        if 'power_expressions' in data:
+            power = GatePower.from_dict(data['power_expressions'])
+        elif 'power_params' in data:
+            params = data['power_params']
+
+        alt_names = data.get('alt_names', {})
+        return cls(
+            int(data['number']), data['name'], data.get('keywords'),
+            alt_names.get('human_design', ''), alt_names.get('iching_traditional', ''),
+            data.get('yijing', ''), data.get('hexagram', ''), lines, power, params
+        )
+
+    def __repr__(self) -> str:
+        return f'Gate({self.number}, {self.name!r})'
+
+
+# ═══════════════════════════════════════════════════════════════════
+# COLOR / TONE / BASE
+# ═══════════════════════════════════════════════════════════════════
+
+class Facet:
+    """Shared shape of the color, tone and base tables"""
+    __slots__ = ('number', 'name', 'description', 'keywords')
+    quality = ''  # name of the per-table attribute (motivation, sense, environment)
+
+    def __init__(self, number: int, name: str, description: str = '', keywords: Sequence[str] = ()):
+        self.number = number
+        self.name = _s(name)
+        self.description = description
+        self.keywords = _words(keywords)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Facet':
+        facet = cls(int(data['number']), data['name'], data.get('description', ''), data.get('keywords', ()))
+        setattr(facet, cls.quality, _s(data.get(cls.quality, '')))
+        return facet
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.number}, {self.name!r})'
+
+
+class Color(Facet):
+    __slots__ = ('motivation',)
+    quality = 'motivation'
+
+
+class Tone(Facet):
+    __slots__ = ('sense',)
+    quality = 'sense'
+
+
+class Base(Facet):
+    __slots__ = ('environment',)
+    quality = 'environment'
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CROSSES
+# ═══════════════════════════════════════════════════════════════════
+
+class Cross:
+    __slots__ = ('key', 'angle', 'name', 'sun', 'earth', 'north_node', 'south_node',
+                 'description', 'life_purpose')
+
+    def __init__(self, key: str, angle: str, name: str, gates: Dict[str, int],
+                 description: str = '', life_purpose: str = ''):
+        self.key = key
+        self.angle = _s(angle)
+        self.name = name
+        self.sun = gates.get('sun')
+        self.earth = gates.get('earth')
+        self.north_node = gates.get('north_node')
+        self.south_node = gates.get('south_node')
+        self.description = description
+        self.life_purpose = life_purpose
+
+    @classmethod
+    def from_dict(cls, key: str, data: Dict) -> 'Cross':
+        return cls(key, data.get('angle', ''), data.get('name', ''), data.get('gates', {}),
+                   data.get('description', ''), data.get('life_purpose', ''))
+
+    def __repr__(self) -> str:
+        return f'Cross({self.angle!r}, {self.name!r})'
+
+
+# ═══════════════════════════════════════════════════════════════════
+# MODEL
+# ═══════════════════════════════════════════════════════════════════
+
+def _table(section: Dict, cls, size: int) -> List:
+    table = [None] * (size + 1)
+    for data in section.values():
+        item = cls.from_dict(data)
+        table[item.number] = item
+    return table
+
+
+class KnowledgeBaseModel:
+    """
+    Typed, int-indexed view of the enriched KB
+    gates[1..64], colors[1..6], tones[1..6], bases[1..5]; index 0 is None
+    """
+    __slots__ = ('version', 'gates', 'colors', 'tones', 'bases', 'crosses', 'crosses_by_sun')
+
+    def __init__(self, version: str, gates: List, colors: List, tones: List, bases: List,
+                 crosses: List[Cross]):
+        self.version = version
+        self.gates = gates
+        self.colors = colors
+        self.tones = tones
+        self.bases = bases
+        self.crosses = crosses
+        self.crosses_by_sun: List[Tuple[Cross, ...]] = [()] * 65
+        for gate in range(1, 65):
+            self.crosses_by_sun[gate] = tuple(c for c in crosses if c.sun == gate)
+
+    @classmethod
+    def from_dict(cls, kb: Dict) -> 'KnowledgeBaseModel':
+        gates = [None] * 65
+        for data in kb['gates'].values():
+            gate = Gate.from_dict(data)
+            gates[gate.number] = gate
+
+        # One renderer per model, shared by the gates stored as template parameters
+        params = {gate.number: gate.power_params for gate in gates if gate and gate.power_params is not None}
+        if params:
+            render = power_renderer(kb.get('power_templates'), params)
+            for number in params:
+                gates[number]._render = render
+
+        crosses = [Cross.from_dict(key, data) for key, data in kb.get('incarnation_crosses', {}).items()]
+        return cls(
+            kb.get('version', ''), gates,
+            _table(kb['colors'], Color, 6),
+            _table(kb['tones'], Tone, 6),
+            _table(kb['bases'], Base, 5),
+            crosses
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'KnowledgeBaseModel':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def line_count(self) -> int:
+        return sum(1 for gate in self.gates if gate for line in gate.lines if line)
+
+    def counts(self) -> Dict[str, int]:
+        present = lambda table: sum(1 for item in table if item is not None)
+        return {
+            'gates': present(self.gates),
+            'colors': present(self.colors),
+            'tones': present(self.tones),
+            'bases': present(self.bases),
+            'incarnation_crosses': len(self.crosses)
+        }
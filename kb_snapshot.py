@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+KNOWLEDGE BASE SNAPSHOTS
+Hot reload of the enriched KB without restarts or reader locks
+
+A KnowledgeBaseSnapshot is one immutable, fully-built version of the KB:
+the parsed tables, their typed kb_model view, a MeaningCollapseEngine over
+them and any derived
+indexes (e.g. the meaning table). KnowledgeBaseStore holds the current
+snapshot in a single attribute:
+
+    snapshot = store.current()     # plain attribute read, no lock
+    responder = DeterministicResponder(birth_data, snapshot=snapshot)
+
+A watcher thread polls the KB file; when its content hash changes it builds
+the next snapshot off the request path and then publishes it with one
+reference assignment. Requests that already took the old snapshot finish on
+it, and derived caches are simply dropped along with it.
+
+To roll out a KB edit, write the new file next to the old one and
+os.replace() it in, so the watcher never reads a half-written file.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional
+
+from deterministic_responder import KB_PATH, MeaningCollapseEngine
+from kb_model import KnowledgeBaseModel
+
+REQUIRED_SECTIONS = ('gates', 'colors', 'tones', 'bases')
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class KnowledgeBaseSnapshot:
+    """One immutable KB version plus everything derived from it"""
+
+    def __init__(self, kb: Dict, version: str, path: str = KB_PATH):
+        missing = [section for section in REQUIRED_SECTIONS if section not in kb]
+        if missing:
+            raise ValueError(f'KB is missing sections: {", ".join(missing)}')
+
+        self.kb = MappingProxyType(kb)
+        self.model = KnowledgeBaseModel.from_dict(kb)
+        self.version = version
+        self.path = path
+        self.loaded_at = time.time()
+        self.engine = MeaningCollapseEngine(model=self.model)
+        self.derived: Dict = {}
+
+    @classmethod
+    def from_bytes(cls, raw: bytes, path: str = KB_PATH) -> 'KnowledgeBaseSnapshot':
+        return cls(json.loads(raw), hashlib.sha256(raw).hexdigest(), path)
+
+    @classmethod
+    def load(cls, path: str = KB_PATH) -> 'KnowledgeBaseSnapshot':
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read(), path)
+
+    def cached(self, name: str, builder: Callable[['KnowledgeBaseSnapshot'], object]):
+        """
+        Derived value memoized on this snapshot (so keyed by KB version)
+        Concurrent first calls may both build; the first result wins.
+        """
+        if name not in self.derived:
+            self.derived.setdefault(name, builder(self))
+        return self.derived[name]
+
+
+def build_meaning_table(snapshot: KnowledgeBaseSnapshot):
+    """Warmer: materialize the meaning table and let the engine use it"""
+    from meaning_table import MeaningTable
+
+    table = MeaningTable.build(snapshot.engine, snapshot.path)
+    table.kb_sha256 = snapshot.version
+    snapshot.engine.table = table
+    return table
+
+
+class KnowledgeBaseStore:
+    """Current KB snapshot plus a polling watcher that swaps in new versions"""
+
+    def __init__(
+        self,
+        path: str = KB_PATH,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        warmers: Optional[Dict[str, Callable[[KnowledgeBaseSnapshot], object]]] = None,
+    ):
+        """
+        warmers: {name: builder(snapshot)} run on every new snapshot before it
+        is published; results land in snapshot.derived[name]
+        """
+        self.path = path
+        self.poll_interval = poll_interval
+        self.warmers = dict(warmers or {})
+        self._snapshot: Optional[KnowledgeBaseSnapshot] = None
+        self._listeners: List[Callable] = []
+        self._stat = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_build_ms = 0.0
+
+    def current(self) -> Optional[KnowledgeBaseSnapshot]:
+        """The live snapshot (None until the first successful load); never blocks"""
+        return self._snapshot
+
+    def on_swap(self, listener: Callable[[Optional[KnowledgeBaseSnapshot], KnowledgeBaseSnapshot], None]):
+        """Call listener(old, new) after each swap, e.g. to clear external caches"""
+        self._listeners.append(listener)
+
+    # ─── reload ───────────────────────────────────────────────────────
+
+    def _file_stat(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the KB if it changed on disk; returns True when a new snapshot was published
+        A broken file is recorded in last_error and the old snapshot stays live.
+        """
+        with self._reload_lock:
+            stat = None
+            try:
+                stat = self._file_stat()
+                if not force and stat == self._stat:
+                    return False
+
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                version = hashlib.sha256(raw).hexdigest()
+                old = self._snapshot
+                if not force and old is not None and old.version == version:
+                    # Touched but unchanged content
+                    self._stat = stat
+                    return False
+
+                started = time.perf_counter()
+                snapshot = KnowledgeBaseSnapshot.from_bytes(raw, self.path)
+                for name, builder in self.warmers.items():
+                    snapshot.derived[name] = builder(snapshot)
+                self.last_build_ms = (time.perf_counter() - started) * 1000
+            except Exception as exc:
+                # Unreadable JSON, a KB the model cannot build from, or a failing
+                # warmer; a bad file is not retried until it changes
+                self._stat = stat
+                self.failures += 1
+                self.last_error = f'{type(exc).__name__}: {exc}'
+                return False
+
+            # The swap itself: one reference assignment, atomic for readers
+            self._snapshot = snapshot
+            self._stat = stat
+            self.reloads += 1
+            self.last_error = None
+
+        for listener in self._listeners:
+            listener(old, snapshot)
+        return True
+
+    # ─── watcher ──────────────────────────────────────────────────────
+
+    def start(self) -> 'KnowledgeBaseStore':
+        """Load once synchronously, then poll in a daemon thread"""
+        self.reload()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='kb-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception as exc:
+                # e.g. a failing on_swap listener; the next pass still runs
+                self.failures += 1
+                self.last_error = f'{type(exc).__name__}: {exc}'
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            'path': self.path,
+            'version': snapshot.version if snapshot else None,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'derived': sorted(snapshot.derived) if snapshot else [],
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_build_ms': round(self.last_build_ms, 1),
+            'watching': self._thread is not None and self._thread.is_alive(),
+        }
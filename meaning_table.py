@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+MATERIALIZED MEANING TABLE
+Every gate × line × color × tone × base collapse, precomputed
+
+MeaningCollapseEngine.collapse() is a pure function of the coordinate tuple
+plus planet/sign/house/state. The tuple-dependent layers (gate name, gate
+keywords, color, tone, base) are materialized for all 69,120 tuples into a
+dense uint16 array of interned fragment ids:
+
+    table[gate-1, line-1, color-1, tone-1, base-1] → [5 fragment ids]
+
+Planet, sign and house come from the small static tables in
+deterministic_responder, and state passes straight through. At runtime a
+collapse is one flat index computation plus five list reads.
+
+Build:  python meaning_table.py build [--out meaning_table.npz] [--budget BYTES]
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from deterministic_responder import (
+    HOUSES, KB_PATH, PLANETS, ZODIAC_SIGNS, MeaningCollapseEngine
+)
+
+SHAPE = (64, 6, 6, 6, 5)  # gate, line, color, tone, base
+SLOTS = ('gate_name', 'gate_keywords', 'color_name', 'tone_name', 'base_name')
+AXES = ('gate', 'line', 'color', 'tone', 'base')
+
+DEFAULT_ARTIFACT = 'meaning_table.npz'
+
+# Resident bytes allowed for the table + fragment pool
+MEANING_TABLE_BUDGET_BYTES = 2 * 1024 * 1024
+
+# Strides for the flat index: ((((g*6 + l)*6 + c)*6 + t)*5 + b)
+_STRIDES = np.array([6 * 6 * 6 * 5, 6 * 6 * 5, 6 * 5, 5, 1], dtype=np.int64)
+
+
+def kb_fingerprint(kb_path: str = KB_PATH) -> str:
+    """Content hash of the KB file the table was built from"""
+    with open(kb_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class MeaningTable:
+    """Dense fragment-id table over the full coordinate space"""
+
+    def __init__(self, table: np.ndarray, fragments: List, kb_sha256: str = ''):
+        self.table = np.ascontiguousarray(table, dtype=np.uint16).reshape(-1, len(SLOTS))
+        # Slicing a flat memoryview yields plain ints, ~3x faster than numpy row unpacking
+        self._ids = memoryview(self.table.reshape(-1))
+        # Keyword lists were interned as tuples; everything else is a string
+        self.fragments = [tuple(f) if isinstance(f, list) else f for f in fragments]
+        self.kb_sha256 = kb_sha256
+
+    # ─── build ────────────────────────────────────────────────────────
+
+    @classmethod
+    def build(cls, engine: Optional[MeaningCollapseEngine] = None, kb_path: str = KB_PATH) -> 'MeaningTable':
+        """Run the real collapse over all 69,120 tuples and intern the results"""
+        engine = engine or MeaningCollapseEngine()
+        fragments: List = []
+        ids: Dict = {}
+
+        def intern(value) -> int:
+            key = tuple(value) if isinstance(value, list) else value
+            if key not in ids:
+                ids[key] = len(fragments)
+                fragments.append(key)
+            return ids[key]
+
+        table = np.zeros(SHAPE + (len(SLOTS),), dtype=np.uint16)
+        for index in np.ndindex(*SHAPE):
+            gate, line, color, tone, base = (i + 1 for i in index)
+            layers = engine.collapse({
+                'planet': 'sun', 'sign': 'aries', 'house': 1,
+                'gate': gate, 'line': line, 'color': color, 'tone': tone, 'base': base
+            })
+            table[index] = (
+                intern(layers['gate']['name']),
+                intern(layers['gate']['keywords']),
+                intern(layers['color']['name']),
+                intern(layers['tone']['name']),
+                intern(layers['base']['name'])
+            )
+
+        if len(fragments) > np.iinfo(np.uint16).max:
+            raise ValueError(f'{len(fragments)} fragments do not fit uint16 ids')
+
+        return cls(table, fragments, kb_fingerprint(kb_path))
+
+    # ─── artifact ─────────────────────────────────────────────────────
+
+    def save(self, path: str = DEFAULT_ARTIFACT):
+        np.savez_compressed(
+            path,
+            table=self.table.reshape(SHAPE + (len(SLOTS),)),
+            fragments=np.array(json.dumps([list(f) if isinstance(f, tuple) else f for f in self.fragments],
+                                          ensure_ascii=False)),
+            kb_sha256=np.array(self.kb_sha256)
+        )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_ARTIFACT) -> 'MeaningTable':
+        with np.load(path) as data:
+            return cls(data['table'], json.loads(str(data['fragments'])), str(data['kb_sha256']))
+
+    def is_current(self, kb_path: str = KB_PATH) -> bool:
+        return self.kb_sha256 == kb_fingerprint(kb_path)
+
+    def nbytes(self) -> int:
+        """Approximate resident size: id array + fragment pool"""
+        pool = sum(len(f.encode('utf-8')) if isinstance(f, str) else sum(len(k.encode('utf-8')) for k in f)
+                   for f in self.fragments)
+        return int(self.table.nbytes) + pool
+
+    # ─── lookup ───────────────────────────────────────────────────────
+
+    def index(self, coordinate: Dict) -> int:
+        """Flat index; KeyError for a value outside the KB's tables, as the engine's lookups would"""
+        gate, line = coordinate['gate'], coordinate['line']
+        color, tone, base = coordinate.get('color', 1), coordinate.get('tone', 1), coordinate.get('base', 1)
+        for axis, value, size in zip(AXES, (gate, line, color, tone, base), SHAPE):
+            if not 1 <= value <= size:
+                raise KeyError(f'{axis} {value!r} not in 1..{size}')
+        return ((((gate - 1) * 6 + line - 1) * 6 + color - 1) * 6 + tone - 1) * 5 + base - 1
+
+    def indices(self, gates, lines, colors, tones, bases) -> np.ndarray:
+        """Vectorized flat indices for arrays of coordinates"""
+        coords = np.stack([gates, lines, colors, tones, bases], axis=-1).astype(np.int64) - 1
+        outside = (coords < 0) | (coords >= SHAPE)
+        if outside.any():
+            row, axis = np.argwhere(np.atleast_2d(outside))[0]
+            value = np.atleast_2d(coords)[row, axis] + 1
+            raise KeyError(f'{AXES[axis]} {value} not in 1..{SHAPE[axis]} (row {row})')
+        return coords @ _STRIDES
+
+    def fragment_ids(self, flat_indices: np.ndarray) -> np.ndarray:
+        """[n, 5] fragment ids for a batch of flat indices (one gather)"""
+        return self.table[flat_indices]
+
+    def collapse(self, coordinate: Dict, state: str = 'gift') -> Dict:
+        """Same output as MeaningCollapseEngine.collapse()"""
+        start = self.index(coordinate) * len(SLOTS)
+        gate_name, keywords, color, tone, base = self._ids[start:start + len(SLOTS)]
+        planet_data = PLANETS[coordinate['planet']]
+        f = self.fragments
+
+        return {
+            'planet': {'fragment': planet_data['sentence_fragment'], 'action': planet_data['action']},
+            'sign': {'filter': ZODIAC_SIGNS[coordinate['sign']]['filter']},
+            'house': {'context': HOUSES[coordinate['house']]['context']},
+            'gate': {'name': f[gate_name], 'keywords': list(f[keywords])},
+            'color': {'name': f[color]},
+            'tone': {'name': f[tone]},
+            'base': {'name': f[base]},
+            'state': state
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the materialized meaning table')
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--out', default=DEFAULT_ARTIFACT)
+    parser.add_argument('--budget', type=int, default=MEANING_TABLE_BUDGET_BYTES)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        table = MeaningTable.build()
+        table.save(args.out)
+        print(f"💾 Built {args.out}: {len(table.table):,} entries, {len(table.fragments)} fragments")
+    else:
+        table = MeaningTable.load(args.out)
+
+    size = table.nbytes()
+    print(f"   Resident: {size / 1024:.1f} KB (budget {args.budget / 1024:.1f} KB)")
+    if not table.is_current():
+        print("⚠️  Table was built from a different KB version")
+    if size > args.budget:
+        print("❌ Meaning table exceeds its size budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+MEMORY ACCOUNTING
+What one KB, one responder and one chart cost in bytes
+
+Three views:
+- deep sizes      deep_sizeof() over the live object graph (shared objects
+                  can be excluded, e.g. a KB snapshot every tenant reuses)
+- allocation peaks  tracemalloc peak while running load_*, parse_pdf and
+                  KnowledgeBaseEnricher.export
+- tenant RSS      resident set growth while loading N tenants in-process
+
+Budgets in MEMORY_BUDGETS are checked by `budget`, which exits non-zero when
+a change pushes any measurement past its limit:
+
+    python memory_accounting.py report
+    python memory_accounting.py budget [--budget responder=2000000 ...]
+    python memory_accounting.py tenants --n 200 [--shared-kb]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, MappingProxyType, MethodType, ModuleType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from deterministic_responder import (
+    FIELD_PLANETS, KB_PATH, CoordinateCalculator, DeterministicResponder,
+    load_bases, load_colors, load_gates, load_model, load_tones
+)
+from kb_model import KnowledgeBaseModel
+
+# Per-measurement limits in bytes
+MEMORY_BUDGETS = {
+    'kb': 512 * 1024,
+    'model': 384 * 1024,
+    'snapshot': 1024 * 1024,
+    'meaning_table': 1024 * 1024,
+    'responder': 1024 * 1024,
+    'responder_shared_kb': 16 * 1024,
+    'chart': 16 * 1024,
+    'peak_load_kb': 4 * 1024 * 1024,
+    'peak_export': 4 * 1024 * 1024,
+    'tenant_rss_growth': 1024 * 1024,
+}
+
+# ═══════════════════════════════════════════════════════════════════
+# DEEP SIZE
+# ═══════════════════════════════════════════════════════════════════
+
+def _referents(obj) -> Iterable:
+    if isinstance(obj, (dict, MappingProxyType)):
+        for key, value in obj.items():
+            yield key
+            yield value
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+    elif isinstance(obj, np.ndarray):
+        # getsizeof already counts owned data; views point at their base
+        if obj.base is not None and not isinstance(obj, np.memmap):
+            yield obj.base
+    else:
+        if hasattr(obj, '__dict__'):
+            yield obj.__dict__
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(obj, name):
+                    yield getattr(obj, name)
+
+
+_ATOMIC = (str, bytes, int, float, bool, type(None), memoryview)
+
+# Code and classes are shared by every instance, so they are never counted
+_SHARED = (type, ModuleType, FunctionType, MethodType, BuiltinFunctionType)
+
+
+def deep_sizeof(obj, exclude: Iterable = ()) -> int:
+    """
+    Bytes reachable from obj, each object counted once
+    exclude: objects whose whole graph is shared and must not be charged to
+    obj, e.g. a KB snapshot every tenant reuses
+    """
+    seen = set()
+    if exclude:
+        _walk(list(exclude), seen)
+    return _walk([obj], seen)
+
+
+def _walk(stack: List, seen: set) -> int:
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _SHARED):
+            continue
+        seen.add(id(current))
+        if isinstance(current, np.memmap):
+            # Mapped pages belong to the page cache, not this object
+            total += sys.getsizeof(current) - current.nbytes if current.flags.owndata else sys.getsizeof(current)
+            continue
+        total += sys.getsizeof(current)
+        if not isinstance(current, _ATOMIC):
+            stack.extend(_referents(current))
+    return total
+
+
+def traced_peak(fn: Callable, *args, **kwargs) -> Tuple[object, int]:
+    """Run fn under tracemalloc; returns (result, peak bytes allocated during the call)"""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        result = fn(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return result, peak
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux /proc, else peak RSS from getrusage)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ═══════════════════════════════════════════════════════════════════
+# MEASUREMENTS
+# ═══════════════════════════════════════════════════════════════════
+
+def random_chart(rng: random.Random) -> Dict:
+    """Synthetic birth_data with every field activated"""
+    return {
+        'fields': {
+            field: {
+                'planet': planet,
+                'gate': rng.randint(1, 64), 'line': rng.randint(1, 6),
+                'color': rng.randint(1, 6), 'tone': rng.randint(1, 6), 'base': rng.randint(1, 5)
+            }
+            for field, planet in FIELD_PLANETS.items()
+        }
+    }
+
+
+def chart_document(birth_data: Dict, model: Optional[KnowledgeBaseModel] = None) -> Dict:
+    """The cached per-user chart: all coordinates, as stored on user_anchors"""
+    calculator = CoordinateCalculator(birth_data, model=model)
+    return {'schema_version': 1, 'fields': {f: calculator.calculate_coordinate(f) for f in birth_data['fields']}}
+
+
+def load_kb() -> Dict:
+    return {'gates': load_gates(), 'colors': load_colors(), 'tones': load_tones(), 'bases': load_bases()}
+
+
+def _quiet(fn: Callable, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def measure_export(kb_path: str = KB_PATH) -> int:
+    from enrich_knowledge_base import KnowledgeBaseEnricher
+
+    def run():
+        enricher = KnowledgeBaseEnricher(kb_path)
+        with tempfile.TemporaryDirectory() as tmp:
+            enricher.export(os.path.join(tmp, 'kb.json'))
+
+    return traced_peak(_quiet, run)[1]
+
+
+def measure_parse_pdf(pdf_path: str) -> int:
+    from parse_knowledge_base import KnowledgeBaseParser
+    return traced_peak(_quiet, KnowledgeBaseParser().parse_pdf, pdf_path)[1]
+
+
+def report(pdf_path: Optional[str] = None, meaning_table: bool = False) -> Dict:
+    """All measurements, in bytes"""
+    from kb_snapshot import KnowledgeBaseSnapshot
+
+    rng = random.Random(0)
+    chart = random_chart(rng)
+    snapshot = KnowledgeBaseSnapshot.load()
+
+    _, peak_load = traced_peak(load_kb)
+    model, peak_model = traced_peak(load_model)
+    results = {
+        # The whole parsed JSON document vs. its typed model
+        'kb': deep_sizeof(snapshot.kb),
+        'model': deep_sizeof(model),
+        'snapshot': deep_sizeof(snapshot),
+        'responder': deep_sizeof(DeterministicResponder(chart)),
+        'responder_shared_kb': deep_sizeof(DeterministicResponder(chart, snapshot=snapshot), exclude=[snapshot]),
+        'chart': deep_sizeof(chart_document(chart, model=snapshot.model), exclude=[snapshot]),
+        'peak_load_kb': peak_load,
+        'peak_load_model': peak_model,
+        'peak_export': measure_export(),
+    }
+    for name, fn in (('gates', load_gates), ('colors', load_colors), ('tones', load_tones), ('bases', load_bases)):
+        results[f'peak_load_{name}'] = traced_peak(fn)[1]
+
+    if pdf_path:
+        results['peak_parse_pdf'] = measure_parse_pdf(pdf_path)
+    if meaning_table:
+        from kb_snapshot import build_meaning_table
+        results['meaning_table'] = build_meaning_table(snapshot).nbytes()
+
+    return results
+
+
+def tenant_rss(n: int, shared_kb: bool = False, seed: int = 0) -> Dict:
+    """
+    Load n tenants (chart document + responder each) and measure RSS growth
+    shared_kb: tenants share one KB snapshot instead of loading their own
+    """
+    from kb_snapshot import KnowledgeBaseSnapshot
+
+    rng = random.Random(seed)
+    snapshot = KnowledgeBaseSnapshot.load() if shared_kb else None
+    before = rss_bytes()
+
+    tenants = []
+    for _ in range(n):
+        document = chart_document(random_chart(rng), model=snapshot.model if snapshot else None)
+        tenants.append((document, DeterministicResponder.from_anchor(document, snapshot=snapshot)))
+
+    after = rss_bytes()
+    return {
+        'tenants': n,
+        'shared_kb': shared_kb,
+        'rss_before': before,
+        'rss_after': after,
+        'rss_growth_per_tenant': (after - before) // max(1, n),
+    }
+
+
+def check_budgets(results: Dict, budgets: Dict[str, int] = MEMORY_BUDGETS) -> List[str]:
+    """Human-readable violations; empty when everything fits"""
+    return [
+        f'{name}: {results[name]:,} bytes > budget {limit:,}'
+        for name, limit in budgets.items()
+        if name in results and results[name] > limit
+    ]
+
+
+def _parse_budgets(overrides: List[str]) -> Dict[str, int]:
+    budgets = dict(MEMORY_BUDGETS)
+    for override in overrides:
+        name, _, value = override.partition('=')
+        budgets[name] = int(value)
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory accounting for the KB, responders and charts')
+    parser.add_argument('command', choices=['report', 'budget', 'tenants'])
+    parser.add_argument('--pdf', help='also measure parse_pdf on this PDF')
+    parser.add_argument('--meaning-table', action='store_true', help='also build and size the meaning table')
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=BYTES')
+    parser.add_argument('--n', type=int, default=100, help='tenants to load')
+    parser.add_argument('--shared-kb', action='store_true')
+    args = parser.parse_args()
+
+    budgets = _parse_budgets(args.budget)
+
+    if args.command == 'tenants':
+        results = tenant_rss(args.n, args.shared_kb)
+        print(json.dumps(results, indent=2))
+        violations = check_budgets({'tenant_rss_growth': results['rss_growth_per_tenant']}, budgets)
+    else:
+        results = report(args.pdf, args.meaning_table)
+        print(json.dumps(results, indent=2))
+        violations = check_budgets(results, budgets) if args.command == 'budget' else []
+
+    for violation in violations:
+        print(f"❌ {violation}")
+    if violations:
+        sys.exit(1)
+    if args.command != 'report':
+        print("✅ Within memory budgets")
+
+
+if __name__ == '__main__':
+    main()
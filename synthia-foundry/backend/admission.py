@@ -0,0 +1,176 @@
+"""
+Admission control for the llama endpoint.
+
+Bounded concurrency (the model runs one generation at a time per slot), a
+bounded wait queue in front of it, and a per-client token bucket. Anything
+that can't be served soon is rejected immediately with a Retry-After hint
+instead of piling up in the threadpool.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class AdmissionRejected(Exception):
+    """Request refused before reaching the model (429 or 503)"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {'Retry-After': str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst`"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take one token; return 0.0 on success, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Gatekeeper for model calls
+
+    Usage:
+        with controller.admit(client_id) as queue_wait:
+            ... call the model ...
+
+    Internal callers that already yield to live traffic (the idle-hours
+    precompute) pass rate_limited=False and only contend for a slot.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        max_queue: int = 8,
+        queue_timeout: float = 30.0,
+        client_rate: float = 0.5,
+        client_burst: float = 5.0,
+        max_clients: int = 10000,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+
+        # Moving average of service time, used for Retry-After estimates
+        self._service_ewma = 1.0
+
+        self._counters = {
+            'admitted': 0,
+            'rejected_rate_limited': 0,
+            'rejected_queue_full': 0,
+            'rejected_queue_timeout': 0,
+        }
+
+    @contextmanager
+    def admit(self, client_id: str, rate_limited: bool = True) -> Iterator[float]:
+        """Hold a model slot for the duration of the block; yields seconds spent queued"""
+        if rate_limited:
+            self._check_rate(client_id)
+        queue_wait = self._acquire()
+        started = time.monotonic()
+        try:
+            yield queue_wait
+        finally:
+            self._release(time.monotonic() - started)
+
+    def _check_rate(self, client_id: str):
+        with self._cond:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.client_rate, self.client_burst)
+                self._buckets[client_id] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+
+            wait = bucket.take()
+            if wait > 0.0:
+                self._counters['rejected_rate_limited'] += 1
+                raise AdmissionRejected(429, 'rate limit exceeded', wait)
+
+    def _acquire(self) -> float:
+        with self._cond:
+            if self._active < self.max_concurrency and self._waiting == 0:
+                self._active += 1
+                self._counters['admitted'] += 1
+                return 0.0
+
+            if self._waiting >= self.max_queue:
+                self._counters['rejected_queue_full'] += 1
+                raise AdmissionRejected(503, 'model queue full', self._estimated_drain())
+
+            self._waiting += 1
+            enqueued = time.monotonic()
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self._active < self.max_concurrency,
+                    timeout=self.queue_timeout,
+                )
+            finally:
+                self._waiting -= 1
+
+            if not admitted:
+                self._counters['rejected_queue_timeout'] += 1
+                raise AdmissionRejected(503, 'timed out waiting for model', self._estimated_drain())
+
+            self._active += 1
+            self._counters['admitted'] += 1
+            return time.monotonic() - enqueued
+
+    def _release(self, service_time: float):
+        with self._cond:
+            self._active -= 1
+            self._service_ewma = 0.8 * self._service_ewma + 0.2 * service_time
+            self._cond.notify()
+
+    def _estimated_drain(self) -> float:
+        """Rough time until the current queue clears"""
+        return self._service_ewma * (self._waiting + 1) / self.max_concurrency
+
+    def stats(self) -> Dict:
+        """Queue depth and rejection counters, for the stats endpoint"""
+        with self._cond:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queue_depth': self._waiting,
+                'tracked_clients': len(self._buckets),
+                'avg_service_seconds': round(self._service_ewma, 4),
+                **self._counters,
+            }
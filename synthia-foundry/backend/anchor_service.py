@@ -0,0 +1,133 @@
+"""
+Anchor service: compute chart coordinates once, serve them from the DB.
+
+When a birth_timestamp is written, every field's coordinate is computed
+with CoordinateCalculator and stored on user_anchors.coordinates as
+
+    {"schema_version": N, "fields": {field_name: calculate_coordinate(field_name)}}
+
+Readers build a DeterministicResponder straight from that document. Bumping
+COORDINATES_SCHEMA_VERSION makes stale documents recompute lazily the next
+time they are read.
+
+An optional gate_index.GateIndex is kept in step with every write, so a
+transit on a gate can fan out to the users who carry it without a table
+scan; build_gate_index() seeds one from the stored anchors. The service
+owns it: vc_llama_api builds it at startup (GATE_INDEX=1) before serving.
+"""
+
+from typing import Callable, Dict, Optional
+
+from hybrid_router import DeterministicResponder
+from deterministic_responder import CoordinateCalculator
+from repository import Repository
+
+COORDINATES_SCHEMA_VERSION = 1
+
+
+class AnchorService:
+    """Writes and reads precomputed chart coordinates for user_anchors"""
+
+    def __init__(
+        self,
+        repository: Repository,
+        chart_source: Optional[Callable[[str], Dict]] = None,
+        schema_version: int = COORDINATES_SCHEMA_VERSION,
+        gate_index=None,
+        kb_store=None,
+    ):
+        """
+        chart_source: birth_timestamp -> {field_name: {gate, line, ...}}, used
+        when an anchor is stored without explicit fields (e.g. an ephemeris)
+        gate_index: optional gate_index.GateIndex updated on every anchor write
+        kb_store: optional kb_snapshot.KnowledgeBaseStore whose live model the
+        calculator reuses instead of reading KB_PATH on every write
+        """
+        self.repository = repository
+        self.chart_source = chart_source
+        self.schema_version = schema_version
+        self.gate_index = gate_index
+        self.kb_store = kb_store
+
+    def _write(self, user_id: str, birth_timestamp: str, coordinates: Dict):
+        self.repository.upsert_anchor(user_id, birth_timestamp, coordinates)
+        if self.gate_index is not None:
+            self.gate_index.upsert(str(user_id), coordinates['fields'])
+
+    def build_gate_index(self, **kwargs):
+        """GateIndex over every stored anchor (kept current by later writes)"""
+        from gate_index import GateIndex
+
+        anchors = (
+            # Postgres hands back uuid.UUID; the index keys on the string form
+            (str(user_id), coordinates['fields'])
+            for user_id, coordinates in self.repository.iter_anchor_coordinates()
+            if coordinates and coordinates.get('fields')
+        )
+        self.gate_index = GateIndex.from_anchors(anchors, **kwargs)
+        return self.gate_index
+
+    def compute(self, fields: Dict) -> Dict:
+        """Anchor document for raw per-field activations"""
+        snapshot = self.kb_store.current() if self.kb_store is not None else None
+        calculator = CoordinateCalculator({'fields': fields}, model=snapshot.model if snapshot else None)
+        return {
+            'schema_version': self.schema_version,
+            'fields': {name: calculator.calculate_coordinate(name) for name in fields},
+        }
+
+    def store_anchor(self, user_id: str, birth_timestamp: str, fields: Optional[Dict] = None) -> Dict:
+        """Compute all coordinates for a birth and upsert them with the anchor"""
+        if fields is None:
+            if self.chart_source is None:
+                raise ValueError('no fields given and no chart_source configured')
+            fields = self.chart_source(birth_timestamp)
+
+        coordinates = self.compute(fields)
+        self._write(user_id, birth_timestamp, coordinates)
+        return coordinates
+
+    def is_current(self, coordinates: Optional[Dict]) -> bool:
+        return bool(coordinates) and coordinates.get('schema_version') == self.schema_version
+
+    def ensure_current(self, anchor: Dict) -> Optional[Dict]:
+        """
+        Coordinates for an anchor row, recomputing (and persisting) on a version bump
+        Returns None when there is nothing to compute from.
+        """
+        coordinates = anchor.get('coordinates')
+        if self.is_current(coordinates):
+            return coordinates
+
+        if self.chart_source is not None:
+            fields = self.chart_source(anchor['birth_timestamp'])
+        elif coordinates and coordinates.get('fields'):
+            # Stored coordinates carry the raw gate/line/color/tone/base keys
+            fields = coordinates['fields']
+        else:
+            return None
+
+        coordinates = self.compute(fields)
+        self._write(anchor['user_id'], anchor['birth_timestamp'], coordinates)
+        return coordinates
+
+    def load_coordinates(self, user_id: str) -> Optional[Dict]:
+        anchor = self.repository.get_anchor(user_id)
+        return self.ensure_current(anchor) if anchor else None
+
+    def responder_for(self, user_id: str) -> Optional[DeterministicResponder]:
+        coordinates = self.load_coordinates(user_id)
+        return DeterministicResponder.from_anchor(coordinates) if coordinates else None
+
+
+def responder_factory(birth_data: Dict, kb_store=None) -> DeterministicResponder:
+    """
+    Router/assembler factory accepting raw birth_data or a stored anchor document
+
+    kb_store: optional kb_snapshot.KnowledgeBaseStore; the responder is pinned
+    to whichever snapshot is live when it is built
+    """
+    snapshot = kb_store.current() if kb_store is not None else None
+    if 'schema_version' in birth_data:
+        return DeterministicResponder.from_anchor(birth_data, snapshot=snapshot)
+    return DeterministicResponder(birth_data, snapshot=snapshot)
@@ -0,0 +1,206 @@
+"""
+Content-addressed storage for foundry_assets uploads.
+
+Uploads are streamed to a temp file in fixed-size chunks while being
+hashed: one sha256 over the whole object plus one per chunk. Nothing is
+ever read fully into memory. When the write finishes, the object is
+renamed into place under its hash:
+
+    <root>/objects/ab/abcdef...        (sha256 of the content)
+    <root>/tmp/                        (in-progress uploads, same filesystem)
+
+If that hash is already stored, the temp file is dropped instead, so
+repeated bundle uploads cost no extra disk. The manifest (size, sha256,
+chunk size, per-chunk hashes) comes out of the same pass and is what
+foundry_assets.manifest stores.
+
+Objects are immutable, so they can be served straight from disk with a
+strong ETag and a long-lived Cache-Control.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Iterable, List
+
+# Hash/manifest granularity (also the read size when copying from a stream)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class AssetWriter:
+    """Incremental upload: write() blocks of any size, then commit() or abort()"""
+
+    def __init__(self, store: 'AssetStore'):
+        self.store = store
+        self.chunk_size = store.chunk_size
+        fd, self.temp_path = tempfile.mkstemp(dir=store.tmp_dir, prefix='upload-')
+        self._file = os.fdopen(fd, 'wb')
+        self._digest = hashlib.sha256()
+        self._chunk = hashlib.sha256()
+        self._chunk_fill = 0
+        self.chunks: List[str] = []
+        self.size = 0
+
+    def write(self, data: bytes):
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+
+        view = memoryview(data)
+        while view:
+            take = min(len(view), self.chunk_size - self._chunk_fill)
+            self._chunk.update(view[:take])
+            self._chunk_fill += take
+            view = view[take:]
+            if self._chunk_fill == self.chunk_size:
+                self.chunks.append(self._chunk.hexdigest())
+                self._chunk = hashlib.sha256()
+                self._chunk_fill = 0
+
+    def commit(self) -> Dict:
+        """Move into place (or drop as a duplicate); returns the manifest"""
+        if self._chunk_fill or not self.chunks:
+            self.chunks.append(self._chunk.hexdigest())
+        sha256 = self._digest.hexdigest()
+        self._file.flush()
+        # Durability only matters for bytes that will be kept
+        if not self.store.exists(sha256):
+            os.fsync(self._file.fileno())
+        self._file.close()
+
+        deduplicated = self.store._place(self.temp_path, sha256)
+        return {
+            'sha256': sha256,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'chunks': self.chunks,
+            'deduplicated': deduplicated,
+        }
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'AssetWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+
+class AssetStore:
+    """Immutable objects on disk, addressed by sha256"""
+
+    def __init__(self, root: str, chunk_size: int = CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.stats = {'uploads': 0, 'deduplicated': 0, 'bytes_received': 0, 'bytes_stored': 0}
+
+    def path(self, sha256: str) -> str:
+        if not _SHA256.match(sha256):
+            raise ValueError(f'not a sha256 hex digest: {sha256!r}')
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        try:
+            return os.path.isfile(self.path(sha256))
+        except ValueError:
+            return False
+
+    def open_writer(self) -> AssetWriter:
+        return AssetWriter(self)
+
+    def _place(self, temp_path: str, sha256: str) -> bool:
+        """Rename temp_path to its object path; True when the object already existed"""
+        target = self.path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            self.stats['uploads'] += 1
+            self.stats['bytes_received'] += size
+            if os.path.exists(target):
+                os.unlink(temp_path)
+                self.stats['deduplicated'] += 1
+                return True
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, target)
+            self.stats['bytes_stored'] += size
+            return False
+
+    def put_stream(self, stream: BinaryIO) -> Dict:
+        with self.open_writer() as writer:
+            while True:
+                block = stream.read(self.chunk_size)
+                if not block:
+                    break
+                writer.write(block)
+            return writer.commit()
+
+    def put_blocks(self, blocks: Iterable[bytes]) -> Dict:
+        with self.open_writer() as writer:
+            for block in blocks:
+                writer.write(block)
+            return writer.commit()
+
+    def put_file(self, path: str) -> Dict:
+        with open(path, 'rb') as f:
+            return self.put_stream(f)
+
+    def verify(self, manifest: Dict) -> bool:
+        """Re-hash a stored object chunk by chunk against its manifest"""
+        path = self.path(manifest['sha256'])
+        chunk_size = manifest.get('chunk_size', self.chunk_size)
+        digest = hashlib.sha256()
+        chunks = []
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    break
+                digest.update(block)
+                chunks.append(hashlib.sha256(block).hexdigest())
+        chunks = chunks or [hashlib.sha256(b'').hexdigest()]
+        return digest.hexdigest() == manifest['sha256'] and chunks == manifest.get('chunks', chunks)
+
+    def sweep_tmp(self, older_than: float = 3600.0) -> int:
+        """Remove abandoned uploads (e.g. after a crash mid-stream)"""
+        removed = 0
+        cutoff = time.time() - older_than
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def summary(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['bytes_saved'] = stats['bytes_received'] - stats['bytes_stored']
+        return stats
+
+
+def asset_record(asset_name: str, store: AssetStore, manifest: Dict) -> Dict:
+    """foundry_assets row for an uploaded object"""
+    return {
+        'asset_name': asset_name,
+        'file_path': store.path(manifest['sha256']),
+        'manifest': {k: v for k, v in manifest.items() if k != 'deduplicated'},
+    }
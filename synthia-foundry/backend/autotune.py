@@ -0,0 +1,254 @@
+"""
+Benchmark llama settings on this host and persist the fastest.
+
+n_threads, n_batch and n_ctx are constructor arguments, so every grid
+point loads the model (cheap after the first time: the GGUF is mmapped
+and stays in the page cache), runs one warm-up completion, then streams
+a representative prompt set `--repeats` times. Prompt evaluation and
+generation are timed separately with inference_metrics.timed_completion;
+a configuration is scored by tokens per second over the whole set
+(prompt + generated tokens / wall time), which is what the service's
+request mix pays for. Within a few percent of the fastest, the larger
+context wins: it is what the context assembler gets to fill.
+
+Context sizes smaller than the longest prompt plus MAX_TOKENS are not
+tried, and n_batch values above n_ctx are dropped.
+
+The winner is written to a JSON file keyed by machine type (CPU model,
+usable cores, memory) and model file, so one tuning run covers every
+identical VM; ModelLoader settings in vc_llama_api come from it at
+startup unless LLAMA_N_THREADS / LLAMA_N_BATCH / LLAMA_N_CTX override.
+
+    LLAMA_MODEL_PATH=model.gguf python autotune.py run
+    python autotune.py show
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from inference_metrics import timed_completion
+from loadtest import PROMPT_WORDS, make_prompt
+from model_loader import available_cores, resolve_factory
+
+AUTOTUNE_PATH = 'autotune.json'
+MAX_TOKENS = 256
+
+BATCH_SIZES = (64, 128, 256, 512, 1024)
+CONTEXT_SIZES = (1024, 2048, 4096)
+
+
+def _cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _memory_gb() -> Optional[int]:
+    try:
+        return round(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 2 ** 30)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def machine_type() -> Dict:
+    return {'cpu': _cpu_model(), 'cores': available_cores(), 'memory_gb': _memory_gb()}
+
+
+def tuning_key(model_path: str, machine: Optional[Dict] = None) -> str:
+    """Machine type + model file name: identical VMs share one entry"""
+    machine = machine or machine_type()
+    digest = hashlib.blake2b(json.dumps(machine, sort_keys=True).encode('utf-8'), digest_size=6).hexdigest()
+    return f'{digest}/{os.path.basename(model_path)}'
+
+
+def thread_counts(cores: int) -> List[int]:
+    """Powers of two up to the core count, plus the count itself and one below it"""
+    counts = {cores, max(1, cores - 1)}
+    counts.update(2 ** i for i in range(cores.bit_length()) if 2 ** i <= cores)
+    return sorted(counts)
+
+
+def load_tuned_config(model_path: str, path: str = AUTOTUNE_PATH) -> Dict:
+    """Best known {n_threads, n_batch, n_ctx} for this host and model ({} if untuned)"""
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    entry = entries.get(tuning_key(model_path))
+    return dict(entry['config']) if entry else {}
+
+
+def save_tuned_config(model_path: str, config: Dict, results: List[Dict], path: str = AUTOTUNE_PATH):
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    entries[tuning_key(model_path)] = {
+        'machine': machine_type(),
+        'model': os.path.basename(model_path),
+        'config': config,
+        'tuned_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+    temp = f'{path}.tmp'
+    with open(temp, 'w') as f:
+        json.dump(entries, f, indent=2)
+    os.replace(temp, path)
+
+
+# ─── benchmark ───
+
+def representative_prompts(count: int = 6, seed: int = 7, log_path: Optional[str] = None) -> List[str]:
+    """Prompts from the request log when there is one, else the load test's size classes"""
+    if log_path and os.path.exists(log_path):
+        from precompute import RequestLog
+        top = RequestLog(log_path).top_signatures(count)
+        if top:
+            return [prompt for _, _, prompt in top]
+    rng = random.Random(seed)
+    sizes = itertools.cycle(PROMPT_WORDS.values())
+    return [make_prompt(rng, next(sizes)) for _ in range(count)]
+
+
+def measure(llm, prompts: Sequence[str], max_tokens: int, repeats: int) -> Dict:
+    prompt_tokens = generated = 0
+    prompt_eval_s = wall_s = 0.0
+    for _ in range(repeats):
+        for prompt in prompts:
+            n_prompt = len(llm.tokenize(prompt.encode('utf-8')))
+            started = time.perf_counter()
+            _, timing = timed_completion(
+                llm(prompt, max_tokens=max_tokens, stream=True),
+                prompt_tokens=n_prompt,
+                started=started,
+            )
+            prompt_tokens += n_prompt
+            generated += timing['generated_tokens']
+            prompt_eval_s += timing['prompt_eval_ms'] / 1000
+            wall_s += timing['total_ms'] / 1000
+    generation_s = wall_s - prompt_eval_s
+    return {
+        'tokens_per_second': round((prompt_tokens + generated) / wall_s, 2) if wall_s else None,
+        'prompt_tokens_per_second': round(prompt_tokens / prompt_eval_s, 2) if prompt_eval_s else None,
+        'generation_tokens_per_second': round(generated / generation_s, 2) if generation_s > 0 else None,
+        'wall_seconds': round(wall_s, 3),
+    }
+
+
+def grid(threads: Iterable[int], batches: Iterable[int], contexts: Iterable[int], min_ctx: int) -> List[Dict]:
+    return [
+        {'n_threads': t, 'n_batch': b, 'n_ctx': c}
+        for c in contexts if c >= min_ctx
+        for t in threads
+        for b in batches if b <= c
+    ]
+
+
+def autotune(
+    factory: Callable,
+    model_path: str,
+    prompts: Sequence[str],
+    configs: Sequence[Dict],
+    max_tokens: int = MAX_TOKENS,
+    repeats: int = 2,
+    log: Callable[[str], None] = lambda line: print(line, file=sys.stderr),
+) -> List[Dict]:
+    """Measure every config; results sorted fastest first (failed loads last)"""
+    results = []
+    for config in configs:
+        try:
+            llm = factory(model_path=model_path, use_mmap=True, **config)
+            llm(prompts[0], max_tokens=8)
+            result = dict(config, **measure(llm, prompts, max_tokens, repeats))
+        except Exception as exc:
+            result = dict(config, tokens_per_second=None, error=f'{type(exc).__name__}: {exc}')
+        finally:
+            llm = None  # release the context before loading the next one
+        results.append(result)
+        log(json.dumps(result))
+    return sorted(results, key=lambda r: -(r['tokens_per_second'] or 0))
+
+
+def pick_best(results: Sequence[Dict], tolerance: float = 0.03) -> Optional[Dict]:
+    """
+    Fastest config, preferring the larger context (more room for chart and
+    chunks) and then fewer threads among those within `tolerance` of it
+    """
+    measured = [r for r in results if r['tokens_per_second']]
+    if not measured:
+        return None
+    cutoff = max(r['tokens_per_second'] for r in measured) * (1 - tolerance)
+    close = [r for r in measured if r['tokens_per_second'] >= cutoff]
+    return max(close, key=lambda r: (r['n_ctx'], -r['n_threads'], r['tokens_per_second']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune n_threads / n_batch / n_ctx for this host')
+    parser.add_argument('--model-path', default=os.getenv('LLAMA_MODEL_PATH', 'tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf'))
+    parser.add_argument('--out', default=os.getenv('LLAMA_AUTOTUNE_PATH', AUTOTUNE_PATH))
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='benchmark the grid and save the best config')
+    run.add_argument('--threads', help='comma-separated n_threads (default: powers of two up to the core count)')
+    run.add_argument('--batches', default=','.join(map(str, BATCH_SIZES)))
+    run.add_argument('--contexts', default=','.join(map(str, CONTEXT_SIZES)))
+    run.add_argument('--prompts', type=int, default=6, help='representative prompts per round')
+    run.add_argument('--request-log', default=os.getenv('REQUEST_LOG_PATH'), help='draw prompts from this log')
+    run.add_argument('--max-tokens', type=int, default=MAX_TOKENS)
+    run.add_argument('--repeats', type=int, default=2)
+    run.add_argument('--dry-run', action='store_true', help='report without saving')
+
+    sub.add_parser('show', help='print the saved config for this host and model')
+    args = parser.parse_args()
+
+    if args.command == 'show':
+        print(json.dumps({
+            'key': tuning_key(args.model_path),
+            'machine': machine_type(),
+            'config': load_tuned_config(args.model_path, args.out) or None,
+        }, indent=2))
+        return
+
+    factory = resolve_factory(os.getenv('LLAMA_MODEL_FACTORY'))
+    prompts = representative_prompts(args.prompts, log_path=args.request_log)
+    threads = [int(n) for n in args.threads.split(',')] if args.threads else thread_counts(available_cores())
+    probe = factory(model_path=args.model_path, n_ctx=max(map(int, args.contexts.split(','))), use_mmap=True)
+    longest = max(len(probe.tokenize(prompt.encode('utf-8'))) for prompt in prompts)
+    probe = None
+    configs = grid(
+        threads,
+        [int(n) for n in args.batches.split(',')],
+        [int(n) for n in args.contexts.split(',')],
+        min_ctx=longest + args.max_tokens,
+    )
+    if not configs:
+        parser.error(f'no context size fits the prompts ({longest} tokens) plus --max-tokens')
+    print(f'{len(configs)} configurations x {len(prompts)} prompts x {args.repeats} repeats', file=sys.stderr)
+
+    results = autotune(factory, args.model_path, prompts, configs, args.max_tokens, args.repeats)
+    best = pick_best(results)
+    if best is None:
+        sys.exit('every configuration failed to load')
+    config = {key: best[key] for key in ('n_threads', 'n_batch', 'n_ctx')}
+    if not args.dry_run:
+        save_tuned_config(args.model_path, config, results, args.out)
+    print(json.dumps({'key': tuning_key(args.model_path), 'best': best, 'saved': not args.dry_run}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Token-budget-aware prompt assembly.
+
+Fills the model's context window by priority instead of concatenating
+everything and letting llama.cpp truncate:
+
+1. the birth anchor
+2. the deterministic responder's collapsed layers for the detected field
+3. the top-k knowledge chunks by axis_resonance
+4. any free-form extra_context
+
+Whatever doesn't fit in the remaining budget is dropped whole. A prompt
+that alone exceeds n_ctx - max_tokens keeps only its tail (the question
+usually comes last) and the result says so with truncated=True.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence
+
+from hybrid_router import DeterministicResponder
+
+# Tokens kept back for the newlines and framing between sections
+SECTION_OVERHEAD = 2
+
+
+def estimate_tokens(text: str) -> List[int]:
+    """Fallback tokenizer (~4 chars per token) for when no model is at hand"""
+    return [0] * max(1, len(text) // 4)
+
+
+def format_layers(field: str, layers: Dict) -> str:
+    """Render collapsed meaning layers as a compact context block"""
+    text = (
+        f"[FIELD: {field} | STATE: {layers['state']}] "
+        f"{layers['planet']['fragment']} {layers['planet']['action']} "
+        f"{layers['sign']['filter']} {layers['house']['context']}; "
+        f"gate {layers['gate']['name']} ({', '.join(layers['gate']['keywords'])}); "
+        f"color {layers['color']['name']}, tone {layers['tone']['name']}, base {layers['base']['name']}"
+    )
+    center = layers.get('center')
+    if center:
+        state = 'defined' if center['defined'] else 'open'
+        text += f"; center {center['name']} ({state}); {center['type']}, {center['authority']} authority"
+    return text
+
+
+class ContextAssembler:
+    """Builds the model prompt within n_ctx minus the generation reserve"""
+
+    def __init__(
+        self,
+        tokenize: Callable[[str], Sequence[int]] = estimate_tokens,
+        n_ctx: int = 2048,
+        max_tokens: int = 256,
+        top_k: int = 3,
+        cache_size: int = 4096,
+        responder_factory: Callable[[Dict], DeterministicResponder] = DeterministicResponder,
+    ):
+        self.n_ctx = n_ctx
+        self.max_tokens = max_tokens
+        self.top_k = top_k
+        self.responder_factory = responder_factory
+        self.tokenize = tokenize
+        # Anchors, layer blocks and chunks repeat across requests; tokenize each once
+        self.count_tokens = lru_cache(maxsize=cache_size)(lambda text: len(tokenize(text)))
+
+    def assemble(
+        self,
+        prompt: str,
+        birth_anchor: Optional[str] = None,
+        birth_data: Optional[Dict] = None,
+        knowledge_chunks: Optional[List[Dict]] = None,
+        extra_context: Optional[str] = None,
+    ) -> Dict:
+        """
+        Assemble the prompt
+        Returns: {prompt, prompt_tokens, budget, included, dropped, truncated}
+        """
+        limit = self.n_ctx - self.max_tokens - SECTION_OVERHEAD
+        truncated = self.count_tokens(prompt) > limit
+        if truncated:
+            prompt = self.fit_tail(prompt, limit)
+
+        budget = limit - self.count_tokens(prompt)
+        remaining = budget
+        included, dropped, parts = [], [], []
+
+        for name, text in self.candidate_sections(prompt, birth_anchor, birth_data, knowledge_chunks, extra_context):
+            cost = self.count_tokens(text) + SECTION_OVERHEAD
+            if cost <= remaining:
+                parts.append(text)
+                included.append(name)
+                remaining -= cost
+            else:
+                dropped.append(name)
+
+        parts.append(prompt)
+        return {
+            'prompt': '\n'.join(parts),
+            'prompt_tokens': budget - remaining + self.count_tokens(prompt),
+            'budget': budget,
+            'included': included,
+            'dropped': dropped,
+            'truncated': truncated,
+        }
+
+    def fit_tail(self, text: str, limit: int) -> str:
+        """Longest suffix of text within limit tokens (binary search on the cut)"""
+        if limit <= 0:
+            return ''
+        lo, hi = 0, len(text)  # text[hi:] always fits
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # Uncached: the probes are one-off strings
+            if len(self.tokenize(text[mid:])) <= limit:
+                hi = mid
+            else:
+                lo = mid + 1
+        return text[hi:]
+
+    def candidate_sections(self, prompt, birth_anchor, birth_data, knowledge_chunks, extra_context):
+        """Yield (name, text) in priority order"""
+        if birth_anchor:
+            yield 'anchor', f"[ANCHOR: {birth_anchor}]"
+
+        layers = self.field_layers(prompt, birth_data)
+        if layers:
+            yield 'layers', layers
+
+        ranked = sorted(
+            (c for c in knowledge_chunks or [] if c.get('content')),
+            key=lambda c: c.get('axis_resonance') or 0.0,
+            reverse=True,
+        )
+        for i, chunk in enumerate(ranked[:self.top_k]):
+            yield f'chunk:{chunk.get("id", i)}', chunk['content']
+
+        if extra_context:
+            yield 'extra_context', extra_context
+
+    def field_layers(self, prompt: str, birth_data: Optional[Dict]) -> Optional[str]:
+        """Collapsed layers for the prompt's detected field, if the chart has it"""
+        if not birth_data or not birth_data.get('fields'):
+            return None
+
+        responder = self.responder_factory(birth_data)
+        field = responder.parser.detect_field(prompt.lower())
+        if field not in birth_data['fields']:
+            return None
+
+        parsed, _, layers = responder.collapse(prompt)
+        return format_layers(parsed['field'], layers)
@@ -0,0 +1,82 @@
+"""
+Stand-in for llama_cpp.Llama, for load tests without a GGUF file.
+
+Select it with LLAMA_MODEL_FACTORY=fake_llama:FakeLlama. It accepts the same
+constructor and call arguments the service uses, sleeps to simulate prompt
+evaluation and per-token generation, and supports stream=True. Latencies are
+tunable through the environment:
+
+    FAKE_LLAMA_LOAD_SECONDS          model load time                (0.5)
+    FAKE_LLAMA_PROMPT_MS_PER_TOKEN   prompt eval cost per token     (0.5)
+    FAKE_LLAMA_MS_PER_TOKEN          generation cost per token      (20)
+    FAKE_LLAMA_OUTPUT_TOKENS         tokens generated per call      (64, capped by max_tokens)
+    FAKE_LLAMA_JITTER                relative latency jitter        (0.1)
+
+Costs are for one thread and shrink sublinearly with n_threads, up to the
+number of cores, so thread-count tuning behaves roughly like the real model.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+
+def _env(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+class FakeLlama:
+    """Simulated llama_cpp.Llama (completion + tokenize only)"""
+
+    def __init__(self, model_path: str = "fake.gguf", n_ctx: int = 2048, n_threads: int = 8,
+                 n_batch: int = 512, seed: Optional[int] = None, **kwargs):
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads
+        self.n_batch = n_batch
+        self.prompt_ms_per_token = _env("FAKE_LLAMA_PROMPT_MS_PER_TOKEN", 0.5)
+        self.ms_per_token = _env("FAKE_LLAMA_MS_PER_TOKEN", 20)
+        self.output_tokens = int(_env("FAKE_LLAMA_OUTPUT_TOKENS", 64))
+        self.jitter = _env("FAKE_LLAMA_JITTER", 0.1)
+        self._random = random.Random(seed)
+        # Like the real model, one context serves one call at a time
+        self._lock = threading.Lock()
+
+        time.sleep(_env("FAKE_LLAMA_LOAD_SECONDS", 0.5))
+
+    @property
+    def speedup(self) -> float:
+        return max(1, min(self.n_threads, os.cpu_count() or 1)) ** 0.7
+
+    def tokenize(self, text: bytes, add_bos: bool = True) -> List[int]:
+        # ~4 bytes per token, like typical BPE vocabularies on English text
+        n = max(1, len(text) // 4) + (1 if add_bos else 0)
+        return list(range(n))
+
+    def _sleep_ms(self, ms: float):
+        ms *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, ms) / 1000)
+
+    def _tokens(self, prompt: str, max_tokens: int) -> Iterator[Dict]:
+        with self._lock:
+            prompt_tokens = len(self.tokenize(prompt.encode("utf-8")))
+            if prompt_tokens > self.n_ctx:
+                raise ValueError(f"Requested tokens ({prompt_tokens}) exceed context window of {self.n_ctx}")
+            self._sleep_ms(prompt_tokens * self.prompt_ms_per_token / self.speedup)
+
+            for i in range(min(max_tokens or 16, self.output_tokens)):
+                if i:
+                    self._sleep_ms(self.ms_per_token / self.speedup)
+                yield {"choices": [{"text": f" token{i}", "index": 0, "finish_reason": None}]}
+
+    def __call__(self, prompt: str, max_tokens: int = 16, stop=None, stream: bool = False, **kwargs):
+        chunks = self._tokens(prompt, max_tokens)
+        if stream:
+            return chunks
+        pieces = [chunk["choices"][0]["text"] for chunk in chunks]
+        return {
+            "choices": [{"text": "".join(pieces), "index": 0, "finish_reason": "length"}],
+            "usage": {"completion_tokens": len(pieces)},
+        }
@@ -0,0 +1,141 @@
+"""
+Hybrid router: deterministic responder first, LLM only as fallback.
+
+The grammar parser already knows which field a question is about; when it
+is confident (and the chart has that field) the DeterministicResponder
+answers in microseconds. Everything else goes to the llama model, unless
+an answer for the request's signature was precomputed offline (see
+precompute.py); fallbacks are appended to the request log that job reads.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+# deterministic_responder.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from deterministic_responder import DeterministicResponder, GrammarParser  # noqa: E402
+from precompute import signature  # noqa: E402
+
+DEFAULT_THRESHOLD = 0.6
+
+
+class HybridRouter:
+    """Route a prompt to the deterministic responder or the LLM"""
+
+    def __init__(
+        self,
+        llm_generate: Callable[..., str],
+        threshold: float = DEFAULT_THRESHOLD,
+        responder_factory: Callable[[Dict], DeterministicResponder] = DeterministicResponder,
+        precomputed=None,
+        request_log=None,
+    ):
+        """
+        precomputed: optional precompute.PrecomputedLookup consulted before the LLM
+        request_log: optional precompute.RequestLog of fallback signatures
+        """
+        self.llm_generate = llm_generate
+        self.threshold = threshold
+        self.responder_factory = responder_factory
+        self.precomputed = precomputed
+        self.request_log = request_log
+        self.parser = GrammarParser()
+
+        self._lock = threading.Lock()
+        self._counts = {'deterministic': 0, 'precomputed': 0, 'llm': 0, 'not_modified': 0}
+        self._fallback_reasons = {'no_chart': 0, 'low_confidence': 0, 'field_not_in_chart': 0}
+
+    def route(
+        self,
+        prompt: str,
+        birth_data: Optional[Dict] = None,
+        **llm_kwargs,
+    ) -> Dict:
+        """
+        Answer a prompt, returning the response and which path produced it
+        
+        llm_kwargs (birth_anchor, extra_context, client_id, ...) are only
+        used on the fallback path and are passed through to llm_generate.
+        """
+        parsed = self.parser.parse(prompt)
+        reason = self.fallback_reason(parsed, birth_data)
+
+        if reason is None:
+            result = self.responder_factory(birth_data).respond(prompt)
+            self._record('deterministic')
+            return {
+                'response': result['response'],
+                'route': 'deterministic',
+                'confidence': parsed['confidence'],
+                'metadata': result['metadata'],
+            }
+
+        key = signature(parsed, birth_data)
+        if self.request_log is not None:
+            self.request_log.record(key, prompt)
+        # Explicit extra_context asks for a bespoke answer; skip the shared one
+        if self.precomputed is not None and not llm_kwargs.get('extra_context'):
+            text = self.precomputed.get(key)
+            if text is not None:
+                self._record('precomputed', reason)
+                return {
+                    'response': text,
+                    'route': 'precomputed',
+                    'confidence': parsed['confidence'],
+                    'fallback_reason': reason,
+                    'signature': key,
+                }
+
+        text = self.llm_generate(prompt, birth_data=birth_data, **llm_kwargs)
+        self._record('llm', reason)
+        return {
+            'response': text,
+            'route': 'llm',
+            'confidence': parsed['confidence'],
+            'fallback_reason': reason,
+        }
+
+    def etag(self, prompt: str, birth_data: Optional[Dict] = None) -> Optional[str]:
+        """
+        ETag of the response route() would give, or None when it would go to
+        the LLM (those answers are not reproducible, so they get no validator)
+        """
+        parsed = self.parser.parse(prompt)
+        if self.fallback_reason(parsed, birth_data) is not None:
+            return None
+        return self.responder_factory(birth_data).etag(prompt, parsed)
+
+    def not_modified(self):
+        """Count a request answered 304 from its etag (nothing was composed)"""
+        self._record('not_modified')
+
+    def fallback_reason(self, parsed: Dict, birth_data: Optional[Dict]) -> Optional[str]:
+        """Why a parsed prompt can't be answered deterministically (None if it can)"""
+        if not birth_data or not birth_data.get('fields'):
+            return 'no_chart'
+        if parsed['confidence'] < self.threshold:
+            return 'low_confidence'
+        if parsed['field'] not in birth_data['fields']:
+            return 'field_not_in_chart'
+        return None
+
+    def _record(self, route: str, reason: Optional[str] = None):
+        with self._lock:
+            self._counts[route] += 1
+            if reason is not None:
+                self._fallback_reasons[reason] += 1
+
+    def stats(self) -> Dict:
+        """Request counts per route, for the stats endpoint"""
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                'threshold': self.threshold,
+                'total': total,
+                'routes': dict(self._counts),
+                'fallback_reasons': dict(self._fallback_reasons),
+                'deterministic_ratio': self._counts['deterministic'] / total if total else 0.0,
+            }
@@ -0,0 +1,181 @@
+"""
+Inference instrumentation for the llama endpoint.
+
+Each generation is streamed so the phases can be told apart:
+
+    queue wait      time spent in the admission queue
+    prompt eval     admission → first streamed token (evaluating anchor + context)
+    generation      first token → last token
+
+Per-request timings are aggregated into fixed-bucket histograms, served as
+JSON and in Prometheus text format, and can be echoed back on the response
+as a Server-Timing header.
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds; the last bucket is always +Inf
+MS_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+
+METRICS = {
+    # name: (buckets, help)
+    'queue_wait_ms': (MS_BUCKETS, 'Time spent waiting for a model slot'),
+    'prompt_tokens': (TOKEN_BUCKETS, 'Tokens in the assembled prompt'),
+    'prompt_eval_ms': (MS_BUCKETS, 'Slot acquired to first generated token'),
+    'generated_tokens': (TOKEN_BUCKETS, 'Tokens generated per request'),
+    'tokens_per_second': (RATE_BUCKETS, 'Generation throughput after the first token'),
+    'total_ms': (MS_BUCKETS, 'Queue wait plus prompt eval plus generation'),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (max seen past the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return round(self.max, 2)
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        total, out = 0, []
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class InferenceMetrics:
+    """Thread-safe histograms over per-request timings"""
+
+    def __init__(self, metrics: Dict[str, Tuple[Sequence[float], str]] = METRICS):
+        self.help = {name: text for name, (_, text) in metrics.items()}
+        self.histograms = {name: Histogram(buckets) for name, (buckets, _) in metrics.items()}
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, timing: Dict):
+        with self._lock:
+            self.requests += 1
+            for name, histogram in self.histograms.items():
+                if timing.get(name) is not None:
+                    histogram.observe(timing[name])
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                **{
+                    name: {
+                        'count': h.count,
+                        'mean': round(h.sum / h.count, 2) if h.count else None,
+                        'p50': h.quantile(0.50),
+                        'p95': h.quantile(0.95),
+                        'p99': h.quantile(0.99),
+                        'max': round(h.max, 2) if h.count else None,
+                    }
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def render_prometheus(self, prefix: str = 'llama_') -> str:
+        lines = []
+        with self._lock:
+            lines += [f'# TYPE {prefix}requests_total counter', f'{prefix}requests_total {self.requests}']
+            lines += [f'# TYPE {prefix}errors_total counter', f'{prefix}errors_total {self.errors}']
+            for name, h in self.histograms.items():
+                metric = prefix + name
+                lines.append(f'# HELP {metric} {self.help[name]}')
+                lines.append(f'# TYPE {metric} histogram')
+                for bound, total in h.cumulative():
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {total}')
+                lines.append(f'{metric}_sum {h.sum:g}')
+                lines.append(f'{metric}_count {h.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def timed_completion(
+    stream: Iterable[Dict],
+    prompt_tokens: Optional[int] = None,
+    queue_wait: float = 0.0,
+    started: Optional[float] = None,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Tuple[str, Dict]:
+    """
+    Drain a llama_cpp streaming completion, timing each phase
+    started: clock() when the model slot was acquired (defaults to now)
+    Returns: (text, timing)
+    """
+    started = clock() if started is None else started
+    first_token = None
+    pieces = []
+    generated = 0
+
+    for chunk in stream:
+        if first_token is None:
+            first_token = clock()
+        pieces.append(chunk['choices'][0]['text'])
+        generated += 1
+
+    finished = clock()
+    first_token = finished if first_token is None else first_token
+    generation_s = finished - first_token
+
+    timing = {
+        'queue_wait_ms': queue_wait * 1000,
+        'prompt_tokens': prompt_tokens,
+        'prompt_eval_ms': (first_token - started) * 1000,
+        'generated_tokens': generated,
+        # The first token is produced by prompt eval, so it is not counted here
+        'tokens_per_second': (generated - 1) / generation_s if generated > 1 and generation_s > 0 else None,
+        'total_ms': (queue_wait + finished - started) * 1000,
+    }
+    return ''.join(pieces), timing
+
+
+def server_timing(timing: Dict) -> Dict[str, str]:
+    """Response headers for one request's timing"""
+    generation_ms = timing['total_ms'] - timing['queue_wait_ms'] - timing['prompt_eval_ms']
+    headers = {
+        'Server-Timing': ', '.join([
+            f'queue;dur={timing["queue_wait_ms"]:.1f}',
+            f'prompt_eval;dur={timing["prompt_eval_ms"]:.1f}',
+            f'generation;dur={generation_ms:.1f}',
+            f'total;dur={timing["total_ms"]:.1f}',
+        ]),
+        'X-Generated-Tokens': str(timing['generated_tokens']),
+    }
+    if timing.get('prompt_tokens') is not None:
+        headers['X-Prompt-Tokens'] = str(timing['prompt_tokens'])
+    return headers
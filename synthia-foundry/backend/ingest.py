@@ -0,0 +1,362 @@
+"""
+Streaming ingestion for knowledge_chunks.
+
+Uploaded documents are read incrementally, split into chunks, scored for
+axis_resonance in vectorized batches, and written with
+Repository.insert_chunks:
+
+    reader ──► chunker ──► batches ──► scoring (process pool) ──► bulk insert
+
+Only a bounded number of batches is in flight at once: when scoring or the
+database falls behind, the reader stops pulling from the upload, so memory
+stays flat no matter how large the document is.
+
+Scoring: every gate gets a term vector from the KB (name, keywords, alt
+names, yijing). A batch's (chunk, term) counts come from one bincount and
+are projected onto those vectors with one [chunks, terms] @ [terms, 64]
+product, giving a 64-gate affinity profile per chunk;
+axis_resonance is the cosine between that profile and the user's chart
+(gates activated by their anchor coordinates). Without a chart the score
+stays NULL and only the top gates are kept in metadata.
+
+PDF uploads need PyPDF2 (in requirements.txt); PDF_SUPPORT says whether it
+is importable here.
+"""
+
+import codecs
+import importlib.util
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Target chunk size in characters (~300 tokens)
+CHUNK_CHARS = 1200
+
+# Chunks per scoring batch / per insert
+BATCH_CHUNKS = 256
+
+READ_BLOCK = 64 * 1024
+
+TOP_GATES = 3
+
+PDF_SUPPORT = importlib.util.find_spec('PyPDF2') is not None
+
+_WORD = re.compile(r'[a-z]{3,}')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+STOPWORDS = frozenset('''
+    the and for are but not you all any can her was one our out his has how its
+    who did get may him she too use that with have this will your from they know
+    want been good much some time very when come here just like long make many
+    more only over such take than them well were what into about would there
+    their which these other could gate channel harmonic
+'''.split())
+
+
+def terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+# ═══════════════════════════════════════════════════════════════════
+# READING AND CHUNKING
+# ═══════════════════════════════════════════════════════════════════
+
+def iter_text(stream: BinaryIO, block_size: int = READ_BLOCK, encoding: str = 'utf-8') -> Iterator[str]:
+    """Decode a binary stream block by block (multi-byte characters may straddle blocks)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def iter_pdf_text(path: str) -> Iterator[str]:
+    """One page of text at a time (PyPDF2, as in parse_knowledge_base.py)"""
+    import PyPDF2
+
+    with open(path, 'rb') as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            yield (page.extract_text() or '') + '\n\n'
+
+
+def _split_long(paragraph: str, max_chars: int) -> Iterator[str]:
+    piece = ''
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if piece:
+                yield piece
+                piece = ''
+            yield sentence[:cut]
+            sentence = sentence[cut:].lstrip()
+        if piece and len(piece) + 1 + len(sentence) > max_chars:
+            yield piece
+            piece = ''
+        piece = f'{piece} {sentence}' if piece else sentence
+    if piece:
+        yield piece
+
+
+def chunk_text(pieces: Iterable[str], max_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """
+    Paragraph-packed chunks of at most max_chars from a stream of text pieces
+    Only the current partial paragraph and chunk are buffered.
+    """
+    buffer = ''
+    chunk = ''
+
+    def pack(paragraph: str) -> Iterator[str]:
+        nonlocal chunk
+        paragraph = ' '.join(paragraph.split())
+        if not paragraph:
+            return
+        for part in _split_long(paragraph, max_chars) if len(paragraph) > max_chars else (paragraph,):
+            if chunk and len(chunk) + 2 + len(part) > max_chars:
+                yield chunk
+                chunk = ''
+            chunk = f'{chunk}\n\n{part}' if chunk else part
+
+    for piece in pieces:
+        buffer += piece
+        paragraphs = re.split(r'\n\s*\n', buffer)
+        buffer = paragraphs.pop()
+        # A paragraph that never ends must not grow without bound
+        if len(buffer) > 4 * max_chars:
+            cut = buffer.rfind(' ', 0, 2 * max_chars)
+            cut = cut if cut > 0 else 2 * max_chars
+            paragraphs.append(buffer[:cut])
+            buffer = buffer[cut:]
+        for paragraph in paragraphs:
+            yield from pack(paragraph)
+
+    yield from pack(buffer)
+    if chunk:
+        yield chunk
+
+
+# ═══════════════════════════════════════════════════════════════════
+# SCORING
+# ═══════════════════════════════════════════════════════════════════
+
+class ResonanceScorer:
+    """Term → gate weight matrix built from the KB; scores chunk batches"""
+
+    def __init__(self, vocabulary: Dict[str, int], weights: np.ndarray):
+        self.vocabulary = vocabulary
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)  # [terms, 64]
+
+    @classmethod
+    def from_model(cls, model) -> 'ResonanceScorer':
+        """From a kb_model.KnowledgeBaseModel (e.g. kb_store.current().model)"""
+        vocabulary: Dict[str, int] = {}
+        entries: List[Tuple[int, int, float]] = []
+        for gate in model.gates[1:]:
+            if gate is None:
+                continue
+            sources = [(gate.name, 1.0), (gate.human_design_name, 1.0), (gate.iching_name, 0.5),
+                       (gate.yijing, 0.5)] + [(k, 1.0) for k in gate.keywords or ()]
+            for text, weight in sources:
+                for term in terms(text or ''):
+                    entries.append((vocabulary.setdefault(term, len(vocabulary)), gate.number - 1, weight))
+
+        weights = np.zeros((len(vocabulary), 64), dtype=np.float32)
+        for term, gate, weight in entries:
+            weights[term, gate] = max(weights[term, gate], weight)
+        # Terms shared by many gates say little about any one of them (idf)
+        spread = np.count_nonzero(weights, axis=1)
+        weights *= np.log1p(64.0 / np.maximum(spread, 1))[:, None]
+        return cls(vocabulary, weights)
+
+    def affinities(self, texts: Sequence[str]) -> np.ndarray:
+        """[len(texts), 64] gate affinity per chunk, length-normalized"""
+        vocabulary = self.vocabulary
+        size = len(self.weights)
+        keys, lengths = [], np.ones(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            lengths[row] = max(1, len(words))
+            # Stopwords never enter the vocabulary, so one dict probe filters both
+            offset = row * size
+            keys.extend(offset + i for i in map(vocabulary.get, words) if i is not None)
+
+        # (chunk, term) counts, then one [chunks, terms] @ [terms, 64] product
+        counts = np.bincount(np.asarray(keys, dtype=np.int64), minlength=len(texts) * size)
+        profile = counts.reshape(len(texts), size).astype(np.float32) @ self.weights
+        return profile / np.sqrt(lengths)[:, None]
+
+    def score(self, texts: Sequence[str], chart: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (axis_resonance or NaN per chunk, [n, TOP_GATES] top gate numbers, 0-padded)
+        chart: [64] weight per gate for the user's activations
+        """
+        profile = self.affinities(texts)
+        top = np.argsort(-profile, axis=1, kind='stable')[:, :TOP_GATES]
+        # 0 marks "no further gate matched"
+        top = np.where(np.take_along_axis(profile, top, axis=1) > 0, top + 1, 0)
+        if chart is None or not chart.any():
+            return np.full(len(texts), np.nan), top
+
+        norms = np.linalg.norm(profile, axis=1) * np.linalg.norm(chart)
+        resonance = np.divide(profile @ chart, norms, out=np.zeros(len(texts)), where=norms > 0)
+        return resonance, top
+
+
+def chart_vector(coordinates: Optional[Dict]) -> Optional[np.ndarray]:
+    """[64] activation count per gate from an anchor document ({fields: {name: {gate, ...}}})"""
+    if not coordinates or not coordinates.get('fields'):
+        return None
+    chart = np.zeros(64, dtype=np.float32)
+    for field in coordinates['fields'].values():
+        gate = field.get('gate')
+        if gate:
+            chart[int(gate) - 1] += 1.0
+    return chart
+
+
+# Per-process scorer for pool workers (built once by the initializer)
+_worker_scorer: Optional[ResonanceScorer] = None
+
+
+def _init_worker(vocabulary: Dict[str, int], weights: np.ndarray):
+    global _worker_scorer
+    _worker_scorer = ResonanceScorer(vocabulary, weights)
+
+
+def _score_batch(texts: List[str], chart: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    return _worker_scorer.score(texts, chart)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# PIPELINE
+# ═══════════════════════════════════════════════════════════════════
+
+class _InlineExecutor(Executor):
+    """Runs work in the calling thread (workers=0, small uploads, debugging)"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+class ChunkIngestor:
+    """Chunk → score → insert, with a bounded number of batches in flight"""
+
+    def __init__(self, repository, scorer: Optional[ResonanceScorer], workers: Optional[int] = None,
+                 batch_chunks: int = BATCH_CHUNKS, chunk_chars: int = CHUNK_CHARS,
+                 max_in_flight: Optional[int] = None):
+        """
+        workers: scoring processes (default: all cores); 0 scores inline
+        max_in_flight: batches submitted but not yet written (default 2 × workers)
+        """
+        self.repository = repository
+        self.scorer = scorer
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_chunks = batch_chunks
+        self.chunk_chars = chunk_chars
+        self.max_in_flight = max_in_flight or max(2, 2 * self.workers)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def set_scorer(self, scorer: ResonanceScorer):
+        """
+        Switch scorers (e.g. after a KB swap). Workers were initialized with the
+        old one, so the pool is retired; batches already submitted still finish.
+        """
+        with self._lock:
+            if scorer is self.scorer:
+                return
+            self.scorer = scorer
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _submit(self, texts: List[str], chart: Optional[np.ndarray]) -> Future:
+        with self._lock:
+            if not self.workers:
+                return _InlineExecutor().submit(self.scorer.score, texts, chart)
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    self.workers, initializer=_init_worker,
+                    initargs=(self.scorer.vocabulary, self.scorer.weights),
+                )
+            return self._pool.submit(_score_batch, texts, chart)
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def ingest(self, pieces: Iterable[str], user_id: Optional[str] = None,
+               coordinates: Optional[Dict] = None, source: Optional[str] = None) -> Dict:
+        """
+        Chunk, score and insert a stream of text pieces
+        coordinates: the user's anchor document, for axis_resonance
+        Returns counts; chunk ids are not collected (uploads may be huge).
+        """
+        chart = chart_vector(coordinates)
+        in_flight: Deque[Tuple[Future, List[str], int]] = deque()
+        stats = {'chunks': 0, 'batches': 0, 'characters': 0}
+
+        def drain_one():
+            future, texts, offset = in_flight.popleft()
+            resonance, top = future.result()
+            self.repository.insert_chunks(
+                {
+                    'user_id': user_id,
+                    'content': text,
+                    'axis_resonance': None if np.isnan(score) else round(float(score), 6),
+                    'metadata': {'source': source, 'position': offset + i, 'top_gates': [g for g in gates.tolist() if g]},
+                }
+                for i, (text, score, gates) in enumerate(zip(texts, resonance, top))
+            )
+            stats['batches'] += 1
+
+        batch: List[str] = []
+        position = 0
+        for chunk in chunk_text(pieces, self.chunk_chars):
+            batch.append(chunk)
+            stats['characters'] += len(chunk)
+            if len(batch) < self.batch_chunks:
+                continue
+            # Backpressure: wait for the oldest batch before reading further
+            while len(in_flight) >= self.max_in_flight:
+                drain_one()
+            in_flight.append((self._submit(batch, chart), batch, position))
+            position += len(batch)
+            batch = []
+
+        if batch:
+            in_flight.append((self._submit(batch, chart), batch, position))
+            position += len(batch)
+        while in_flight:
+            drain_one()
+
+        stats['chunks'] = position
+        return stats
+
+    def ingest_stream(self, stream: BinaryIO, **kwargs) -> Dict:
+        return self.ingest(iter_text(stream), **kwargs)
+
+    def ingest_file(self, path: str, **kwargs) -> Dict:
+        kwargs.setdefault('source', os.path.basename(path))
+        if path.lower().endswith('.pdf'):
+            return self.ingest(iter_pdf_text(path), **kwargs)
+        with open(path, 'rb') as f:
+            return self.ingest_stream(f, **kwargs)
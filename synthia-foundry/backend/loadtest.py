@@ -0,0 +1,311 @@
+"""
+Load generator for the synthia-foundry backend.
+
+Run the service against the fake model, then point this at it:
+
+    LLAMA_MODEL_FACTORY=fake_llama:FakeLlama uvicorn vc_llama_api:app --port 8000
+    python loadtest.py --mode open --rps-start 1 --rps-end 8 --duration 60
+    python loadtest.py --mode closed --concurrency 4 --duration 60 --out report.json
+
+Open loop: requests arrive on a schedule (Poisson or uniform) whose rate
+ramps linearly from --rps-start to --rps-end, regardless of how fast the
+service answers; this is what exposes queueing collapse.
+Closed loop: --concurrency virtual users each send a request, wait for the
+answer (plus --think-time), and repeat over a kept-alive connection.
+
+Prompts are drawn from --mix (e.g. short:0.6,medium:0.3,long:0.1). The
+report is JSON: latency percentiles overall and per prompt class,
+throughput, and error rates by status.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Prompt classes: name → words per prompt
+PROMPT_WORDS = {
+    'short': 8,
+    'medium': 64,
+    'long': 256,
+}
+
+VOCABULARY = (
+    'what does my chart say about purpose relationships work energy timing '
+    'decisions emotions clarity trust rest direction change growth'
+).split()
+
+DEFAULT_MIX = 'short:0.6,medium:0.3,long:0.1'
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(','):
+        name, _, weight = part.partition(':')
+        if name not in PROMPT_WORDS:
+            raise ValueError(f'unknown prompt class {name!r} (choose from {", ".join(PROMPT_WORDS)})')
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def make_prompt(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[index], 2)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# HTTP
+# ═══════════════════════════════════════════════════════════════════
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client (JSON POST only)"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def post(self, path: str, payload: Dict, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        body = json.dumps(payload).encode('utf-8')
+        head = [f'POST {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                'Content-Type: application/json', f'Content-Length: {len(body)}']
+        head += [f'{k}: {v}' for k, v in headers.items()]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('connection closed by server')
+        status = int(status_line.split()[1])
+
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection' and value.strip().lower() == 'close':
+                close = True
+
+        data = await self.reader.readexactly(length) if length else b''
+        if close:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LOAD GENERATOR
+# ═══════════════════════════════════════════════════════════════════
+
+class LoadTest:
+    """Runs one open- or closed-loop test and collects per-request results"""
+
+    def __init__(self, url: str, path: str = '/llama/generate', mix: str = DEFAULT_MIX,
+                 timeout: float = 120.0, clients: int = 1, seed: int = 0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.path = path
+        self.mix = parse_mix(mix)
+        self.timeout = timeout
+        self.clients = clients
+        self.rng = random.Random(seed)
+        self.results: List[Dict] = []
+
+    def _request(self) -> Tuple[str, Dict, Dict[str, str]]:
+        names, weights = zip(*self.mix)
+        kind = self.rng.choices(names, weights)[0]
+        payload = {
+            'prompt': make_prompt(self.rng, PROMPT_WORDS[kind]),
+            'birth_anchor': None,
+            'extra_context': None,
+        }
+        # Spread load over several client ids so per-client rate limits can be exercised or avoided
+        headers = {'X-Client-Id': f'loadtest-{self.rng.randrange(self.clients)}'}
+        return kind, payload, headers
+
+    async def _one(self, conn: Connection, scheduled: Optional[float] = None):
+        kind, payload, headers = self._request()
+        started = time.perf_counter()
+        try:
+            status, _ = await asyncio.wait_for(conn.post(self.path, payload, headers), self.timeout)
+            error = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as exc:
+            await conn.close()
+            status, error = 0, type(exc).__name__
+        finished = time.perf_counter()
+
+        self.results.append({
+            'kind': kind,
+            'status': status,
+            'error': error,
+            # Open loop measures from the scheduled send time, so client-side lag counts as latency
+            'latency_ms': (finished - (scheduled if scheduled is not None else started)) * 1000,
+            'finished': finished,
+        })
+
+    async def open_loop(self, rps_start: float, rps_end: float, duration: float, arrivals: str = 'poisson'):
+        """Send on a ramped schedule; each request gets its own connection"""
+        async def fire(scheduled: float):
+            conn = Connection(self.host, self.port)
+            try:
+                await self._one(conn, scheduled)
+            finally:
+                await conn.close()
+
+        tasks = []
+        start = time.perf_counter()
+        elapsed = 0.0
+        while True:
+            rate = rps_start + (rps_end - rps_start) * min(1.0, elapsed / duration)
+            gap = self.rng.expovariate(rate) if arrivals == 'poisson' else 1.0 / rate
+            elapsed += gap
+            if elapsed >= duration:
+                break
+            delay = start + elapsed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(fire(start + elapsed)))
+
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    async def closed_loop(self, concurrency: int, duration: float, think_time: float = 0.0):
+        """concurrency users, each waiting for its answer before sending the next request"""
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def user():
+            conn = Connection(self.host, self.port)
+            try:
+                while time.perf_counter() < deadline:
+                    await self._one(conn)
+                    if think_time:
+                        await asyncio.sleep(self.rng.expovariate(1.0 / think_time))
+            finally:
+                await conn.close()
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float, settings: Dict) -> Dict:
+        ok = [r for r in self.results if 200 <= r['status'] < 300]
+        statuses: Dict[str, int] = {}
+        for r in self.results:
+            key = r['error'] or str(r['status'])
+            statuses[key] = statuses.get(key, 0) + 1
+
+        def latency(rows: List[Dict]) -> Dict:
+            values = sorted(r['latency_ms'] for r in rows)
+            return {
+                'count': len(values),
+                'mean': round(sum(values) / len(values), 2) if values else None,
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99),
+                'max': round(values[-1], 2) if values else None,
+            }
+
+        total = len(self.results)
+        return {
+            'settings': settings,
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': total,
+            'succeeded': len(ok),
+            'error_rate': round((total - len(ok)) / total, 4) if total else 0.0,
+            'throughput_rps': round(len(ok) / elapsed, 3) if elapsed else 0.0,
+            'statuses': statuses,
+            'latency_ms': latency(ok),
+            'latency_ms_by_prompt': {
+                kind: latency([r for r in ok if r['kind'] == kind]) for kind, _ in self.mix
+            },
+        }
+
+
+async def fetch_json(url: str, path: str) -> Optional[Dict]:
+    """GET a stats endpoint (best effort)"""
+    parts = urlsplit(url)
+    try:
+        reader, writer = await asyncio.open_connection(parts.hostname or '127.0.0.1', parts.port or 80)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n'.encode('latin-1'))
+        raw = await reader.read()
+        writer.close()
+        return json.loads(raw.split(b'\r\n\r\n', 1)[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the synthia-foundry backend')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--path', default='/llama/generate')
+    parser.add_argument('--mode', choices=['open', 'closed'], default='closed')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--rps-start', type=float, default=1.0)
+    parser.add_argument('--rps-end', type=float, default=None, help='defaults to --rps-start (no ramp)')
+    parser.add_argument('--arrivals', choices=['poisson', 'uniform'], default='poisson')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--think-time', type=float, default=0.0)
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--clients', type=int, default=1, help='distinct X-Client-Id values')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scrape', action='store_true', help='include /inference/stats and /admission/stats')
+    parser.add_argument('--out', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    test = LoadTest(args.url, args.path, args.mix, args.timeout, args.clients, args.seed)
+    settings = {k: v for k, v in vars(args).items() if k not in ('out', 'scrape')}
+
+    async def run() -> Dict:
+        if args.mode == 'open':
+            rps_end = args.rps_end if args.rps_end is not None else args.rps_start
+            elapsed = await test.open_loop(args.rps_start, rps_end, args.duration, args.arrivals)
+        else:
+            elapsed = await test.closed_loop(args.concurrency, args.duration, args.think_time)
+        report = test.report(elapsed, settings)
+        if args.scrape:
+            report['server'] = {
+                'inference': await fetch_json(args.url, '/inference/stats'),
+                'admission': await fetch_json(args.url, '/admission/stats'),
+            }
+        return report
+
+    report = asyncio.run(run())
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"Report written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
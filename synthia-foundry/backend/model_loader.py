@@ -0,0 +1,145 @@
+"""
+Background model loading for the llama service.
+
+The server binds its port right away and loads the GGUF in a thread; a
+warm-up prompt runs before the model is marked ready, so the first real
+request doesn't pay for page faults and kernel setup. A bad model path
+shows up as a failed readiness probe instead of a crashed import.
+"""
+
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+PROCESS_STARTED = time.monotonic()
+
+
+def resolve_factory(spec: Optional[str] = None) -> Callable[..., Any]:
+    """llama_cpp.Llama, or "module:attr" (e.g. fake_llama:FakeLlama)"""
+    if not spec:
+        from llama_cpp import Llama
+        return Llama
+    module, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module), attr)
+
+
+def available_cores() -> int:
+    """CPUs this process may run on (respects affinity and cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ModelNotReady(Exception):
+    """Model is still loading (or failed to load)"""
+
+    def __init__(self, state: str, retry_after: float = 5.0):
+        super().__init__(f"model {state}")
+        self.state = state
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {'Retry-After': str(int(self.retry_after))}
+
+
+class ModelLoader:
+    """Owns the Llama instance and its lifecycle: loading → warming → ready | failed"""
+
+    def __init__(
+        self,
+        factory: Callable[..., Any],
+        model_path: str,
+        n_ctx: int = 2048,
+        n_threads: Optional[int] = None,
+        n_batch: int = 512,
+        use_mmap: bool = True,
+        use_mlock: bool = False,
+        warmup_prompt: str = "Hello",
+        warmup_tokens: int = 8,
+    ):
+        self.factory = factory
+        self.model_path = model_path
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or available_cores()
+        self.n_batch = n_batch
+        self.use_mmap = use_mmap
+        self.use_mlock = use_mlock
+        self.warmup_prompt = warmup_prompt
+        self.warmup_tokens = warmup_tokens
+
+        self.state = 'pending'
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.ready_after_seconds: Optional[float] = None
+
+        self._llm = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Kick off loading in a daemon thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._load, name='model-loader', daemon=True)
+            self._thread.start()
+
+    def _load(self):
+        try:
+            self.state = 'loading'
+            started = time.monotonic()
+            llm = self.factory(
+                model_path=self.model_path,
+                n_ctx=self.n_ctx,
+                n_threads=self.n_threads,
+                n_batch=self.n_batch,
+                use_mmap=self.use_mmap,
+                use_mlock=self.use_mlock,
+            )
+            self.load_seconds = time.monotonic() - started
+
+            if self.warmup_prompt:
+                self.state = 'warming'
+                started = time.monotonic()
+                llm(self.warmup_prompt, max_tokens=self.warmup_tokens)
+                self.warmup_seconds = time.monotonic() - started
+
+            self._llm = llm
+            self.state = 'ready'
+            self.ready_after_seconds = time.monotonic() - PROCESS_STARTED
+        except Exception as exc:  # surfaced through the readiness probe
+            self.state = 'failed'
+            self.error = f"{type(exc).__name__}: {exc}"
+
+    @property
+    def ready(self) -> bool:
+        return self.state == 'ready'
+
+    def get(self):
+        """The loaded model, or ModelNotReady"""
+        if self._llm is None:
+            raise ModelNotReady(self.state)
+        return self._llm
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading finishes (for scripts and tests)"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    def status(self) -> Dict:
+        return {
+            'state': self.state,
+            'model_path': self.model_path,
+            'n_ctx': self.n_ctx,
+            'n_threads': self.n_threads,
+            'n_batch': self.n_batch,
+            'use_mmap': self.use_mmap,
+            'use_mlock': self.use_mlock,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'ready_after_seconds': self.ready_after_seconds,
+            'error': self.error,
+        }
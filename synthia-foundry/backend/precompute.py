@@ -0,0 +1,434 @@
+"""
+Offline precomputation of LLM answers for frequent request signatures.
+
+Most prompts that fall through to the model share a small set of
+signatures the grammar parser and the chart already determine:
+
+    (field, state, question_type, gate)      e.g. "heart|shadow|how|59"
+
+The router appends each LLM-routed request's signature and prompt to a
+RequestLog. During idle hours a PrecomputeJob takes the most frequent
+signatures that have no stored answer yet, runs the model once per
+signature on a representative prompt, and writes the output to a
+PrecomputeStore keyed by (signature, model_version). At peak, a fallback
+whose signature is in the store is answered from it and skips
+generation entirely.
+
+Jobs are planned once (signatures in priority order, most frequent
+first) and checkpoint a cursor after every answer, so a run interrupted
+by the end of the idle window or a restart resumes where it stopped.
+
+    python precompute.py top --log request_log.jsonl
+    python precompute.py run --log request_log.jsonl --store precomputed.db --top 500
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from admission import AdmissionRejected
+
+# Distinct prompts remembered per signature when picking a representative one
+PROMPT_SAMPLES = 32
+
+
+def signature(parsed: Dict, birth_data: Optional[Dict] = None) -> str:
+    """Request signature from a GrammarParser.parse() result and the chart"""
+    fields = (birth_data or {}).get('fields') or {}
+    field = fields.get(parsed['field'])
+    gate = field.get('gate') if field else None
+    return f"{parsed['field']}|{parsed['state']}|{parsed['question_type']}|{gate or '-'}"
+
+
+def parse_signature(key: str) -> Dict:
+    field, state, question_type, gate = key.split('|')
+    return {
+        'field': field,
+        'state': state,
+        'question_type': question_type,
+        'gate': None if gate == '-' else int(gate),
+    }
+
+
+def signature_chart(key: str) -> Optional[Dict]:
+    """Minimal birth_data carrying just the signature's field and gate (None without a gate)"""
+    parts = parse_signature(key)
+    if parts['gate'] is None:
+        return None
+    return {'fields': {parts['field']: {'gate': parts['gate'], 'line': 1}}}
+
+
+def model_version(model_path: str, **settings) -> str:
+    """Identity of a model file plus the generation settings that shape its output"""
+    try:
+        stat = os.stat(model_path)
+        identity = f'{os.path.basename(model_path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    except OSError:
+        identity = os.path.basename(model_path)
+    if settings:
+        identity += ':' + json.dumps(settings, sort_keys=True)
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
+
+
+# ─── request log ───
+
+class RequestLog:
+    """Append-only JSONL of LLM-routed requests: {"ts", "signature", "prompt"}"""
+
+    def __init__(self, path: str, flush_every: int = 64):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, key: str, prompt: str):
+        line = json.dumps({'ts': time.time(), 'signature': key, 'prompt': prompt})
+        with self._lock:
+            self._buffer.append(line)
+            if len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._buffer) + '\n')
+        self._buffer.clear()
+
+    def entries(self, since: Optional[float] = None) -> Iterator[Dict]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line from a crash
+                if since is None or entry['ts'] >= since:
+                    yield entry
+
+    def top_signatures(self, limit: int = 500, since: Optional[float] = None,
+                       min_count: int = 1) -> List[Tuple[str, int, str]]:
+        """[(signature, count, representative prompt)], most frequent first"""
+        counts: Counter = Counter()
+        prompts: Dict[str, Counter] = {}
+        for entry in self.entries(since):
+            key = entry['signature']
+            counts[key] += 1
+            samples = prompts.setdefault(key, Counter())
+            if entry['prompt'] in samples or len(samples) < PROMPT_SAMPLES:
+                samples[entry['prompt']] += 1
+        return [
+            (key, count, prompts[key].most_common(1)[0][0])
+            for key, count in counts.most_common(limit)
+            if count >= min_count
+        ]
+
+
+# ─── store ───
+
+PRECOMPUTE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS precomputed (
+    signature TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    response TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (signature, model_version)
+);
+CREATE TABLE IF NOT EXISTS precompute_jobs (
+    job_id TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+
+class PrecomputeStore:
+    """
+    SQLite lookup of precomputed answers plus job checkpoints
+
+    get() is served from an in-memory map per model version, reloaded from
+    disk at most every `refresh_interval` seconds so answers written by a
+    job in another process show up without a restart.
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 30.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(PRECOMPUTE_SCHEMA)
+        self._lock = threading.Lock()
+        self._hot: Dict[str, Dict[str, str]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def _answers(self, version: str) -> Dict[str, str]:
+        now = time.monotonic()
+        if now - self._loaded_at.get(version, float('-inf')) > self.refresh_interval:
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT signature, response FROM precomputed WHERE model_version = ?', (version,)
+                ).fetchall()
+            self._hot[version] = dict(rows)
+            self._loaded_at[version] = now
+        return self._hot[version]
+
+    def get(self, key: str, version: str) -> Optional[str]:
+        return self._answers(version).get(key)
+
+    def put(self, key: str, version: str, response: str, prompt: str, priority: int):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO precomputed VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, version, response, prompt, priority, time.time()),
+                )
+            if version in self._hot:
+                self._hot[version][key] = response
+
+    def stored(self, version: str) -> set:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT signature FROM precomputed WHERE model_version = ?', (version,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    # job checkpoints
+
+    def open_job(self, version: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT job_id, plan, cursor FROM precompute_jobs '
+                'WHERE model_version = ? AND finished_at IS NULL ORDER BY created_at DESC LIMIT 1',
+                (version,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {'job_id': row[0], 'plan': json.loads(row[1]), 'cursor': row[2]}
+
+    def create_job(self, version: str, plan: List[Tuple[str, int, str]]) -> Dict:
+        job = {'job_id': uuid.uuid4().hex, 'plan': [list(item) for item in plan], 'cursor': 0}
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT INTO precompute_jobs (job_id, model_version, plan, cursor, created_at) VALUES (?, ?, ?, 0, ?)',
+                    (job['job_id'], version, json.dumps(job['plan']), time.time()),
+                )
+        return job
+
+    def checkpoint(self, job_id: str, cursor: int, finished: bool = False):
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'UPDATE precompute_jobs SET cursor = ?, finished_at = ? WHERE job_id = ?',
+                    (cursor, time.time() if finished else None, job_id),
+                )
+
+    def stats(self, version: Optional[str] = None) -> Dict:
+        with self._lock:
+            total = self._conn.execute('SELECT COUNT(*) FROM precomputed').fetchone()[0]
+            current = self._conn.execute(
+                'SELECT COUNT(*) FROM precomputed WHERE model_version = ?', (version,)
+            ).fetchone()[0] if version else None
+            open_jobs = self._conn.execute(
+                'SELECT COUNT(*) FROM precompute_jobs WHERE finished_at IS NULL'
+            ).fetchone()[0]
+        return {'answers': total, 'answers_current_version': current, 'open_jobs': open_jobs}
+
+    def close(self):
+        self._conn.close()
+
+
+class PrecomputedLookup:
+    """What the router consults: store answers for the live model version"""
+
+    def __init__(self, store: PrecomputeStore, version: Callable[[], str]):
+        self.store = store
+        self.version = version
+
+    def get(self, key: str) -> Optional[str]:
+        return self.store.get(key, self.version())
+
+
+# ─── batch job ───
+
+def idle_hours(spec: str) -> Callable[[], bool]:
+    """"1-6" → True between 01:00 and 06:00 local time ("22-5" wraps midnight)"""
+    start, end = (int(part) for part in spec.split('-'))
+
+    def idle() -> bool:
+        hour = datetime.now().hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    return idle
+
+
+class PrecomputeJob:
+    """Generate answers for the top signatures, resuming any unfinished plan"""
+
+    def __init__(
+        self,
+        store: PrecomputeStore,
+        log: RequestLog,
+        generate: Callable[..., str],
+        version: str,
+        top: int = 500,
+        min_count: int = 2,
+        since: Optional[float] = None,
+        should_run: Callable[[], bool] = lambda: True,
+    ):
+        """
+        generate: llm_generate-style callable (prompt, birth_data=...) -> text
+        should_run: checked before every signature (idle window, load, ...)
+        """
+        self.store = store
+        self.log = log
+        self.generate = generate
+        self.version = version
+        self.top = top
+        self.min_count = min_count
+        self.since = since
+        self.should_run = should_run
+
+    def plan(self) -> Dict:
+        job = self.store.open_job(self.version)
+        if job is not None:
+            return job
+        done = self.store.stored(self.version)
+        plan = [
+            item for item in self.log.top_signatures(self.top + len(done), self.since, self.min_count)
+            if item[0] not in done
+        ][:self.top]
+        return self.store.create_job(self.version, plan)
+
+    def run(self, max_items: Optional[int] = None) -> Dict:
+        self.log.flush()
+        job = self.plan()
+        plan, cursor = job['plan'], job['cursor']
+        generated = 0
+        stopped = None
+        while cursor < len(plan):
+            if max_items is not None and generated >= max_items:
+                stopped = 'max_items'
+                break
+            if not self.should_run():
+                stopped = 'not_idle'
+                break
+            key, count, prompt = plan[cursor]
+            if self.store.get(key, self.version) is None:
+                try:
+                    text = self.generate(prompt, birth_data=signature_chart(key))
+                except AdmissionRejected as exc:
+                    # Live traffic has the model; back off and retry this signature
+                    time.sleep(exc.retry_after)
+                    continue
+                self.store.put(key, self.version, text, prompt, priority=count)
+                generated += 1
+            cursor += 1
+            self.store.checkpoint(job['job_id'], cursor, finished=cursor == len(plan))
+        return {
+            'job_id': job['job_id'],
+            'model_version': self.version,
+            'planned': len(plan),
+            'completed': cursor,
+            'generated': generated,
+            'stopped': stopped,
+        }
+
+
+class IdlePrecomputer:
+    """Background thread that runs a PrecomputeJob whenever should_run() allows"""
+
+    def __init__(self, job_factory: Callable[[], PrecomputeJob], poll_interval: float = 300.0):
+        self.job_factory = job_factory
+        self.poll_interval = poll_interval
+        self.last_run: Optional[Dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'IdlePrecomputer':
+        self._thread = threading.Thread(target=self._loop, name='precompute', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = self.job_factory()
+            if job.should_run():
+                try:
+                    self.last_run = job.run()
+                except Exception as exc:
+                    # Progress is checkpointed; the next window resumes the plan
+                    self.last_run = {'error': f'{type(exc).__name__}: {exc}'}
+            self._stop.wait(self.poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute LLM answers for frequent request signatures')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    top = sub.add_parser('top', help='most frequent signatures in the request log')
+    top.add_argument('--log', default=os.getenv('REQUEST_LOG_PATH', 'request_log.jsonl'))
+    top.add_argument('--limit', type=int, default=50)
+
+    run = sub.add_parser('run', help='generate answers now (loads the model via vc_llama_api)')
+    run.add_argument('--log', default=os.getenv('REQUEST_LOG_PATH', 'request_log.jsonl'))
+    run.add_argument('--store', default=os.getenv('PRECOMPUTE_DB', 'precomputed.db'))
+    run.add_argument('--top', type=int, default=500)
+    run.add_argument('--min-count', type=int, default=2)
+    run.add_argument('--max-items', type=int, default=None)
+    args = parser.parse_args()
+
+    log = RequestLog(args.log)
+    if args.command == 'top':
+        for key, count, prompt in log.top_signatures(args.limit):
+            print(f'{count:8d}  {key:40s}  {prompt}')
+        return
+
+    import vc_llama_api as api
+
+    # Answers are keyed by model + KB version; without a loaded snapshot the
+    # version would not match what the server looks up
+    if api.kb_store.start().current() is None:
+        sys.exit(f'knowledge base failed to load: {api.kb_store.last_error}')
+    api.loader.start()
+    if not api.loader.wait():
+        sys.exit(f'model failed to load: {api.loader.error}')
+    job = PrecomputeJob(
+        PrecomputeStore(args.store), log,
+        lambda prompt, birth_data=None: api.llm_generate(
+            prompt, birth_data=birth_data, client_id='precompute', rate_limited=False
+        ),
+        api.current_model_version(), top=args.top, min_count=args.min_count,
+    )
+    try:
+        print(json.dumps(job.run(args.max_items), indent=2))
+    finally:
+        api.kb_store.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+"""
+Data access layer for the Supabase schema tables.
+
+user_anchors, knowledge_chunks and foundry_assets behind one Repository,
+backed by a small connection pool. SQL is written once in a
+Postgres-compatible subset and rendered per dialect, so the same
+statements run against SQLite (local runs and tests) and Postgres.
+
+Statement text is fixed per dialect, which lets sqlite3's statement cache
+and psycopg's server-side prepare reuse the parsed plans. Writes are
+batched with executemany; per-user reads are a single round trip.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class Dialect:
+    """Placeholder and JSON-parameter syntax for one database"""
+
+    def __init__(self, name: str, placeholder: str, json_placeholder: str):
+        self.name = name
+        self.placeholder = placeholder
+        self.json_placeholder = json_placeholder
+
+    def render(self, sql: str) -> str:
+        return sql.format(p=self.placeholder, j=self.json_placeholder)
+
+
+SQLITE = Dialect('sqlite', '?', '?')
+POSTGRES = Dialect('postgres', '%s', '%s::jsonb')
+
+
+# Local mirror of synthia-foundry/supabase/schema.sql (no auth.users, no uuid extension)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_anchors (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  birth_timestamp TEXT NOT NULL,
+  coordinates TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS user_anchors_user_id_key ON user_anchors (user_id);
+CREATE INDEX IF NOT EXISTS user_anchors_created_at_idx ON user_anchors (created_at);
+
+CREATE TABLE IF NOT EXISTS knowledge_chunks (
+  id TEXT PRIMARY KEY,
+  user_id TEXT,
+  content TEXT NOT NULL,
+  axis_resonance REAL,
+  metadata TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS knowledge_chunks_user_id_idx ON knowledge_chunks (user_id, axis_resonance);
+CREATE INDEX IF NOT EXISTS knowledge_chunks_created_at_idx ON knowledge_chunks (created_at);
+
+CREATE TABLE IF NOT EXISTS foundry_assets (
+  id TEXT PRIMARY KEY,
+  asset_name TEXT NOT NULL,
+  file_path TEXT NOT NULL,
+  manifest TEXT,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS foundry_assets_created_at_idx ON foundry_assets (created_at);
+"""
+
+UPSERT_ANCHOR = """
+INSERT INTO user_anchors (id, user_id, birth_timestamp, coordinates)
+VALUES ({p}, {p}, {p}, {j})
+ON CONFLICT (user_id) DO UPDATE
+SET birth_timestamp = excluded.birth_timestamp, coordinates = excluded.coordinates
+"""
+
+INSERT_CHUNK = """
+INSERT INTO knowledge_chunks (id, user_id, content, axis_resonance, metadata)
+VALUES ({p}, {p}, {p}, {p}, {j})
+"""
+
+INSERT_ASSET = """
+INSERT INTO foundry_assets (id, asset_name, file_path, manifest)
+VALUES ({p}, {p}, {p}, {j})
+"""
+
+SELECT_ANCHOR = """
+SELECT id, user_id, birth_timestamp, coordinates, created_at
+FROM user_anchors WHERE user_id = {p}
+"""
+
+# Keyset pagination over user_id (uses user_anchors_user_id_key, no OFFSET scans).
+# The first page has no cursor: user_id is a UUID on Postgres, so there is no
+# portable "before everything" literal to compare against.
+SELECT_ANCHOR_FIRST_PAGE = """
+SELECT user_id, coordinates FROM user_anchors
+ORDER BY user_id LIMIT {p}
+"""
+
+SELECT_ANCHOR_PAGE = """
+SELECT user_id, coordinates FROM user_anchors
+WHERE user_id > {p} ORDER BY user_id LIMIT {p}
+"""
+
+SELECT_ASSETS = """
+SELECT id, asset_name, file_path, manifest, created_at
+FROM foundry_assets ORDER BY created_at DESC LIMIT {p}
+"""
+
+# Anchor row plus top-k chunks for one user, in one statement
+SELECT_USER_STATE = """
+SELECT 'anchor' AS kind, id, birth_timestamp, coordinates AS payload,
+       NULL AS content, NULL AS axis_resonance, created_at
+FROM user_anchors WHERE user_id = {p}
+UNION ALL
+SELECT * FROM (
+  SELECT 'chunk' AS kind, id, NULL AS birth_timestamp, metadata AS payload,
+         content, axis_resonance, created_at
+  FROM knowledge_chunks WHERE user_id = {p}
+  ORDER BY axis_resonance DESC NULLS LAST, created_at DESC
+  LIMIT {p}
+) AS top_chunks
+"""
+
+
+def _json_in(value) -> Optional[str]:
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _json_out(value):
+    """JSONB comes back as dicts from psycopg and as text from sqlite"""
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+class ConnectionPool:
+    """Fixed-size pool of DB-API connections"""
+
+    def __init__(self, factory: Callable[[], object], dialect: Dialect, size: int = 4):
+        self.dialect = dialect
+        self.size = size
+        self._idle: 'queue.Queue' = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(factory())
+
+    @classmethod
+    def sqlite(cls, path: str = ':memory:', size: int = 4) -> 'ConnectionPool':
+        # A plain ':memory:' would give every pooled connection its own database
+        if path == ':memory:':
+            path = f'file:pool-{uuid.uuid4().hex}?mode=memory&cache=shared'
+
+        def factory():
+            conn = sqlite3.connect(path, uri=path.startswith('file:'), check_same_thread=False, cached_statements=256)
+            conn.execute('PRAGMA journal_mode=WAL')
+            return conn
+
+        return cls(factory, SQLITE, size)
+
+    @classmethod
+    def postgres(cls, dsn: str, size: int = 4) -> 'ConnectionPool':
+        import psycopg  # optional: only needed against a real Postgres
+
+        return cls(lambda: psycopg.connect(dsn, prepare_threshold=0), POSTGRES, size)
+
+    @classmethod
+    def from_url(cls, url: str, size: int = 4) -> 'ConnectionPool':
+        """sqlite:///path/to.db, sqlite://:memory: or postgresql://..."""
+        if url == 'sqlite://:memory:':
+            return cls.sqlite(':memory:', size)
+        if url.startswith('sqlite:///'):
+            return cls.sqlite(url[len('sqlite:///'):], size)
+        return cls.postgres(url, size)
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        conn = self._idle.get()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class Repository:
+    """Typed access to the three schema tables"""
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = 500):
+        self.pool = pool
+        self.batch_size = batch_size
+        render = pool.dialect.render
+        self._sql = {
+            'upsert_anchor': render(UPSERT_ANCHOR),
+            'insert_chunk': render(INSERT_CHUNK),
+            'insert_asset': render(INSERT_ASSET),
+            'select_anchor': render(SELECT_ANCHOR),
+            'select_anchor_first_page': render(SELECT_ANCHOR_FIRST_PAGE),
+            'select_anchor_page': render(SELECT_ANCHOR_PAGE),
+            'select_assets': render(SELECT_ASSETS),
+            'select_user_state': render(SELECT_USER_STATE),
+        }
+        self._lock = threading.Lock()
+        self.round_trips = 0
+
+    def create_schema(self):
+        """Create tables locally (Postgres gets supabase/schema.sql instead)"""
+        if self.pool.dialect is not SQLITE:
+            raise RuntimeError('create_schema is for local SQLite; apply supabase/schema.sql to Postgres')
+        with self.pool.connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    # ─── writes ───────────────────────────────────────────────────────
+
+    def upsert_anchor(self, user_id: str, birth_timestamp: str, coordinates: Optional[Dict] = None):
+        self.upsert_anchors([{'user_id': user_id, 'birth_timestamp': birth_timestamp, 'coordinates': coordinates}])
+
+    def upsert_anchors(self, anchors: Iterable[Dict]):
+        self._write_many('upsert_anchor', (
+            (str(uuid.uuid4()), a['user_id'], a['birth_timestamp'], _json_in(a.get('coordinates')))
+            for a in anchors
+        ))
+
+    def insert_chunks(self, chunks: Iterable[Dict]) -> List[str]:
+        ids = []
+
+        def rows():
+            for c in chunks:
+                chunk_id = c.get('id') or str(uuid.uuid4())
+                ids.append(chunk_id)
+                yield (chunk_id, c.get('user_id'), c['content'], c.get('axis_resonance'), _json_in(c.get('metadata')))
+
+        self._write_many('insert_chunk', rows())
+        return ids
+
+    def insert_assets(self, assets: Iterable[Dict]) -> List[str]:
+        ids = []
+
+        def rows():
+            for a in assets:
+                asset_id = a.get('id') or str(uuid.uuid4())
+                ids.append(asset_id)
+                yield (asset_id, a['asset_name'], a['file_path'], _json_in(a.get('manifest')))
+
+        self._write_many('insert_asset', rows())
+        return ids
+
+    def _write_many(self, statement: str, rows: Iterable[tuple]):
+        """executemany in batch_size slices, all in one transaction"""
+        sql = self._sql[statement]
+        batch = []
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    cur.executemany(sql, batch)
+                    self._count_round_trip()
+                    batch = []
+            if batch:
+                cur.executemany(sql, batch)
+                self._count_round_trip()
+
+    # ─── reads ────────────────────────────────────────────────────────
+
+    def get_anchor(self, user_id: str) -> Optional[Dict]:
+        rows = self._query('select_anchor', (user_id,))
+        if not rows:
+            return None
+        anchor_id, user_id, birth_timestamp, coordinates, created_at = rows[0]
+        return {
+            'id': anchor_id,
+            'user_id': user_id,
+            'birth_timestamp': birth_timestamp,
+            'coordinates': _json_out(coordinates),
+            'created_at': created_at,
+        }
+
+    def iter_anchor_coordinates(self, page_size: int = 5000) -> Iterator[tuple]:
+        """(user_id, coordinates) for every anchor, paged by user_id"""
+        rows = self._query('select_anchor_first_page', (page_size,))
+        while True:
+            for user_id, coordinates in rows:
+                yield user_id, _json_out(coordinates)
+            if len(rows) < page_size:
+                return
+            rows = self._query('select_anchor_page', (rows[-1][0], page_size))
+
+    def load_user_state(self, user_id: str, chunk_limit: int = 3) -> Dict:
+        """
+        Everything a request needs for one user, in a single round trip
+        Returns: {anchor: {...} | None, chunks: [...]} (chunks by axis_resonance desc)
+        """
+        state = {'anchor': None, 'chunks': []}
+        for kind, row_id, birth_timestamp, payload, content, resonance, created_at in self._query(
+            'select_user_state', (user_id, user_id, chunk_limit)
+        ):
+            if kind == 'anchor':
+                state['anchor'] = {
+                    'id': row_id,
+                    'user_id': user_id,
+                    'birth_timestamp': birth_timestamp,
+                    'coordinates': _json_out(payload),
+                    'created_at': created_at,
+                }
+            else:
+                state['chunks'].append({
+                    'id': row_id,
+                    'content': content,
+                    'axis_resonance': resonance,
+                    'metadata': _json_out(payload),
+                    'created_at': created_at,
+                })
+        return state
+
+    def list_assets(self, limit: int = 50) -> List[Dict]:
+        return [
+            {'id': i, 'asset_name': n, 'file_path': f, 'manifest': _json_out(m), 'created_at': c}
+            for i, n, f, m, c in self._query('select_assets', (limit,))
+        ]
+
+    def _query(self, statement: str, params: tuple) -> List[tuple]:
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self._sql[statement], params)
+            self._count_round_trip()
+            return cur.fetchall()
+
+    def _count_round_trip(self):
+        with self._lock:
+            self.round_trips += 1
@@ -0,0 +1,449 @@
+"""
+User-sharded worker processes for the deterministic responder.
+
+One Python process is GIL-bound, and a responder carries per-user state
+(the chart on CoordinateCalculator, plus whatever is cached around it).
+Round-robin over workers would build every user's responder in every
+process; instead the supervisor owns N worker processes and sends each
+request to the one that owns its user id on a consistent-hash ring:
+
+    user_id ──blake2b──▶ ring point ──bisect──▶ shard-k ──queue──▶ worker k
+
+Each worker keeps an LRU of responders by user id, so chart state and
+caches stay shard-local. The ring has `vnodes` points per worker, which
+keeps shards balanced and means adding or removing a worker remaps only
+about 1/N of the users (everyone else keeps their warm cache).
+
+Requests are sent in per-shard batches (one queue message per shard per
+call) so the pickling/IPC cost is amortised over many answers.
+
+    python shard_supervisor.py bench --workers 1,2,4 --requests 50000
+"""
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+VNODES = 128
+RESPONDER_CACHE_SIZE = 4096
+REAP_INTERVAL = 0.5  # seconds between crashed-worker checks
+
+
+def _point(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent-hash ring: `vnodes` points per node, lookup by bisect"""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            raise ValueError(f'node already on the ring: {node}')
+        self.nodes.append(node)
+        for replica in range(self.vnodes):
+            point = _point(f'{node}#{replica}')
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str):
+        self.nodes.remove(node)
+        keep = [i for i, owner in enumerate(self._owners) if owner != node]
+        self._points = [self._points[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+
+    def node_for(self, key: str) -> str:
+        if not self._points:
+            raise LookupError('ring is empty')
+        index = bisect.bisect(self._points, _point(key))
+        return self._owners[index % len(self._owners)]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+class WorkerDied(RuntimeError):
+    """A shard's process exited with requests still outstanding"""
+
+
+# ─── worker process ───
+
+def _responder_cache(max_users: int, kb_store):
+    from anchor_service import responder_factory
+
+    cache: 'OrderedDict[str, object]' = OrderedDict()
+    counters = {'hits': 0, 'misses': 0}
+
+    def responder(user_id: str, birth_data: Optional[Dict]):
+        entry = cache.get(user_id)
+        snapshot = kb_store.current() if kb_store is not None else None
+        if entry is not None:
+            cached_chart, cached = entry
+            # A new chart for the user or a KB swap invalidates the responder
+            current = snapshot is None or cached.kb_version == snapshot.version
+            if (birth_data is None or birth_data == cached_chart) and current:
+                cache.move_to_end(user_id)
+                counters['hits'] += 1
+                return cached
+            birth_data = birth_data or cached_chart
+        if birth_data is None:
+            raise KeyError(f'no chart cached for {user_id!r} on this shard; send birth_data')
+        counters['misses'] += 1
+        built = responder_factory(birth_data, kb_store=kb_store)
+        cache[user_id] = (birth_data, built)
+        if len(cache) > max_users:
+            cache.popitem(last=False)
+        return built
+
+    return responder, cache, counters
+
+
+def _worker_main(name: str, inbox, outbox, kb_path: Optional[str], max_users: int):
+    """
+    Serve batches from inbox until a None sentinel
+
+    inbox items: [(request_id, op, user_id, prompt, birth_data), ...]
+    outbox items: (name, [(request_id, ok, result_or_error), ...]); the
+    ('stats', ...) op answers with this shard's cache counters.
+    """
+    kb_store = None
+    if kb_path:
+        from kb_snapshot import KnowledgeBaseStore
+        kb_store = KnowledgeBaseStore(kb_path).start()
+    responder, cache, counters = _responder_cache(max_users, kb_store)
+
+    while True:
+        batch = inbox.get()
+        if batch is None:
+            break
+        results = []
+        for request_id, op, user_id, prompt, birth_data in batch:
+            try:
+                if op == 'stats':
+                    result = dict(counters, users=len(cache), pid=os.getpid())
+                elif op == 'etag':
+                    result = responder(user_id, birth_data).etag(prompt)
+                else:
+                    result = responder(user_id, birth_data).respond(prompt)
+                results.append((request_id, True, result))
+            except Exception as exc:
+                results.append((request_id, False, f'{type(exc).__name__}: {exc}'))
+        outbox.put((name, results))
+
+    if kb_store is not None:
+        kb_store.stop()
+
+
+# ─── supervisor ───
+
+class ShardSupervisor:
+    """Starts worker processes and routes requests to them by user id"""
+
+    def __init__(
+        self,
+        workers: int = None,
+        kb_path: Optional[str] = None,
+        vnodes: int = VNODES,
+        max_users: int = RESPONDER_CACHE_SIZE,
+        context: Optional[str] = None,
+    ):
+        """
+        workers: process count (default: one per core)
+        kb_path: KB file each worker hot-reloads via kb_snapshot; None uses
+        the responder's own KB loading
+        max_users: responders cached per shard (LRU)
+        context: multiprocessing start method ('spawn', 'fork', ...)
+        """
+        self.kb_path = kb_path
+        self.max_users = max_users
+        self._mp = multiprocessing.get_context(context)
+        self._outbox = self._mp.Queue()
+        self.ring = HashRing(vnodes=vnodes)
+        self._workers: Dict[str, Tuple[object, object]] = {}
+        self._pending: Dict[int, Tuple[str, Future]] = {}
+        self._ids = itertools.count()
+        self._names = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._initial = workers or os.cpu_count() or 1
+
+    # lifecycle
+
+    def start(self) -> 'ShardSupervisor':
+        for _ in range(self._initial):
+            self.add_worker()
+        self._collector = threading.Thread(target=self._collect, name='shard-collector', daemon=True)
+        self._collector.start()
+        return self
+
+    def _spawn(self, name: str):
+        inbox = self._mp.Queue()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(name, inbox, self._outbox, self.kb_path, self.max_users),
+            name=name,
+            daemon=True,
+        )
+        process.start()
+        self._workers[name] = (process, inbox)
+
+    def add_worker(self) -> str:
+        """Start one more shard; it takes over ~1/N of the users"""
+        name = f'shard-{next(self._names)}'
+        with self._lock:
+            self._spawn(name)
+            self.ring.add(name)
+        return name
+
+    def remove_worker(self, name: Optional[str] = None) -> str:
+        """Drain and stop a shard (the newest by default); its users move to the others"""
+        with self._lock:
+            name = name or self.ring.nodes[-1]
+            self.ring.remove(name)
+            process, inbox = self._workers.pop(name)
+        inbox.put(None)
+        process.join()
+        return name
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for _, inbox in workers:
+            inbox.put(None)
+        for process, _ in workers:
+            process.join()
+        if self._collector is not None:
+            self._collector.join()
+        self._fail_pending(lambda name: True, WorkerDied('supervisor stopped'))
+
+    def __enter__(self) -> 'ShardSupervisor':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # requests
+
+    def shard_for(self, user_id: str) -> str:
+        return self.ring.node_for(user_id)
+
+    def submit_many(
+        self,
+        requests: Sequence[Tuple[str, str, Optional[Dict]]],
+        op: str = 'respond',
+    ) -> List[Future]:
+        """
+        (user_id, prompt, birth_data) triples → futures, one queue message per shard
+
+        birth_data may be None once a user's chart is cached on its shard.
+        """
+        futures = []
+        batches: Dict[str, list] = {}
+        with self._lock:
+            for user_id, prompt, birth_data in requests:
+                request_id = next(self._ids)
+                name = self.ring.node_for(user_id)
+                future = Future()
+                self._pending[request_id] = (name, future)
+                batches.setdefault(name, []).append((request_id, op, user_id, prompt, birth_data))
+                futures.append(future)
+            for name, batch in batches.items():
+                self._workers[name][1].put(batch)
+        return futures
+
+    def submit(self, user_id: str, prompt: str, birth_data: Optional[Dict] = None, op: str = 'respond') -> Future:
+        return self.submit_many([(user_id, prompt, birth_data)], op=op)[0]
+
+    def respond(self, user_id: str, prompt: str, birth_data: Optional[Dict] = None,
+                timeout: Optional[float] = None) -> Dict:
+        return self.submit(user_id, prompt, birth_data).result(timeout)
+
+    def respond_many(self, requests: Sequence[Tuple[str, str, Optional[Dict]]],
+                     timeout: Optional[float] = None) -> List[Dict]:
+        return [future.result(timeout) for future in self.submit_many(requests)]
+
+    def stats(self, timeout: float = 10.0) -> Dict:
+        """Per-shard responder cache counters, queried from the workers themselves"""
+        with self._lock:
+            names = list(self.ring.nodes)
+            futures = {}
+            for name in names:
+                request_id = next(self._ids)
+                future = Future()
+                self._pending[request_id] = (name, future)
+                self._workers[name][1].put([(request_id, 'stats', None, None, None)])
+                futures[name] = future
+        return {name: future.result(timeout) for name, future in futures.items()}
+
+    # result collection
+
+    def _collect(self):
+        next_reap = time.monotonic() + REAP_INTERVAL
+        while not self._stopping.is_set() or self._pending:
+            # Checked every iteration: a busy outbox must not starve crash detection
+            if time.monotonic() >= next_reap:
+                self._reap()
+                next_reap = time.monotonic() + REAP_INTERVAL
+            try:
+                name, results = self._outbox.get(timeout=REAP_INTERVAL)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            with self._lock:
+                resolved = [(self._pending.pop(request_id, (None, None))[1], ok, value)
+                            for request_id, ok, value in results]
+            for future, ok, value in resolved:
+                if future is None:
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError(value))
+
+    def _reap(self):
+        """Restart crashed shards under the same name (ring unchanged) and fail their requests"""
+        with self._lock:
+            dead = {name for name, (process, _) in self._workers.items() if not process.is_alive()}
+            if not dead:
+                return
+            failed = [request_id for request_id, (name, _) in self._pending.items() if name in dead]
+            futures = [(self._pending[request_id][0], self._pending.pop(request_id)[1]) for request_id in failed]
+            for name in dead:
+                self._spawn(name)
+        for name, future in futures:
+            future.set_exception(WorkerDied(f'{name} exited'))
+
+    def _fail_pending(self, owned: Callable[[str], bool], error: Exception):
+        with self._lock:
+            failed = [request_id for request_id, (name, _) in self._pending.items() if owned(name)]
+            futures = [self._pending.pop(request_id)[1] for request_id in failed]
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# BENCHMARK
+# ═══════════════════════════════════════════════════════════════════
+
+FIELDS = ('mind', 'heart', 'body', 'soul', 'spirit', 'shadow', 'observer', 'unity', 'source')
+
+PROMPTS = (
+    'How do I make clear decisions with my mind?',
+    'What does my heart need to feel safe in relationships?',
+    'How should I use my body energy at work?',
+    'What is my soul purpose right now?',
+    'Why do I keep hitting the same shadow pattern?',
+)
+
+
+def synthetic_chart(user: int) -> Dict:
+    """Deterministic per-user fields ({gate, line, color, tone, base}) for load generation"""
+    seed = _point(f'user-{user}')
+    fields = {}
+    for i, field in enumerate(FIELDS):
+        value = (seed >> (i * 6)) ^ (seed >> (i + 17))
+        fields[field] = {
+            'gate': value % 64 + 1,
+            'line': (value >> 6) % 6 + 1,
+            'color': (value >> 9) % 6 + 1,
+            'tone': (value >> 12) % 6 + 1,
+            'base': (value >> 15) % 5 + 1,
+        }
+    return {'fields': fields}
+
+
+def remap_fraction(workers: int, users: int = 20000, vnodes: int = VNODES) -> float:
+    """Share of users whose shard changes when one worker is added to `workers`"""
+    before = HashRing([f'shard-{i}' for i in range(workers)], vnodes=vnodes)
+    after = HashRing([f'shard-{i}' for i in range(workers + 1)], vnodes=vnodes)
+    moved = sum(before.node_for(f'user-{u}') != after.node_for(f'user-{u}') for u in range(users))
+    return moved / users
+
+
+def bench(workers: int, requests: int, users: int, batch: int, kb_path: Optional[str]) -> Dict:
+    charts = [synthetic_chart(user) for user in range(users)]
+    with ShardSupervisor(workers, kb_path=kb_path) as supervisor:
+        # Warm every shard's responder cache (first request carries the chart)
+        supervisor.respond_many([(f'user-{u}', PROMPTS[0], charts[u]) for u in range(users)])
+
+        stream = [(f'user-{i % users}', PROMPTS[i % len(PROMPTS)], None) for i in range(requests)]
+        start = time.perf_counter()
+        in_flight: List[Future] = []
+        for offset in range(0, requests, batch):
+            in_flight.extend(supervisor.submit_many(stream[offset:offset + batch]))
+            # Bound the backlog at a few batches per worker
+            if len(in_flight) > batch * workers * 4:
+                for future in in_flight[:batch]:
+                    future.result()
+                in_flight = in_flight[batch:]
+        for future in in_flight:
+            future.result()
+        elapsed = time.perf_counter() - start
+        shards = supervisor.stats()
+
+    return {
+        'workers': workers,
+        'requests': requests,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'cache_misses_after_warmup': sum(s['misses'] for s in shards.values()) - users,
+        'users_per_shard': sorted(s['users'] for s in shards.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded deterministic responder workers')
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('bench', help='throughput per worker count (expect ~linear up to the core count)')
+    run.add_argument('--workers', default=','.join(str(2 ** i) for i in range(0, 8) if 2 ** i <= (os.cpu_count() or 1)),
+                     help='comma-separated worker counts')
+    run.add_argument('--requests', type=int, default=50000)
+    run.add_argument('--users', type=int, default=2000)
+    run.add_argument('--batch', type=int, default=256, help='requests per submit_many call')
+    run.add_argument('--kb-path', default=None, help='KB file for workers to load via kb_snapshot')
+    run.add_argument('--out', help='write the JSON report here')
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(',')]
+    rows = []
+    for workers in counts:
+        row = bench(workers, args.requests, args.users, args.batch, args.kb_path)
+        row['remap_fraction_on_add'] = round(remap_fraction(workers), 4)
+        rows.append(row)
+        base = rows[0]['throughput_rps'] / rows[0]['workers']
+        row['scaling_efficiency'] = round(row['throughput_rps'] / (base * workers), 3)
+        print(json.dumps(row), file=sys.stderr)
+
+    report = {'cpu_count': os.cpu_count(), 'runs': rows}
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
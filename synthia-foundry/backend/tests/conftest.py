@@ -0,0 +1,41 @@
+"""
+Backend tests run against the fake model and a throwaway SQLite database.
+
+vc_llama_api reads its configuration at import, so the environment is set
+once per session before the `api` fixture imports it.
+"""
+
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(scope='session')
+def api(tmp_path_factory):
+    root = tmp_path_factory.mktemp('backend')
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{root / "foundry.db"}',
+        'LLAMA_MODEL_FACTORY': 'fake_llama:FakeLlama',
+        'FAKE_LLAMA_LOAD_SECONDS': '0',
+        'FAKE_LLAMA_MS_PER_TOKEN': '0',
+        'KB_MEANING_TABLE': '0',
+        'ASSET_ROOT': str(root / 'assets'),
+        'REQUEST_LOG_PATH': str(root / 'request_log.jsonl'),
+        'PRECOMPUTE_DB': str(root / 'precomputed.db'),
+        'LLAMA_AUTOTUNE_PATH': str(root / 'autotune.json'),
+    })
+    return importlib.import_module('vc_llama_api')
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        assert api.loader.wait(10)
+        yield client
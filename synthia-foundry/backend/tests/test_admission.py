@@ -0,0 +1,142 @@
+import threading
+from contextlib import ExitStack
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module inside admission; only advances when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission, 'time', fake)
+    return fake
+
+
+def _hold(stack, controller, client_id):
+    """Occupy a model slot until the stack closes"""
+    return stack.enter_context(controller.admit(client_id))
+
+
+def test_bucket_spends_its_burst_then_refills(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+    assert bucket.take() == 0.0
+    assert bucket.take() == 0.0
+    assert bucket.take() == pytest.approx(2.0)
+
+    clock.advance(1.0)
+    assert bucket.take() == pytest.approx(1.0)
+    clock.advance(1.0)
+    assert bucket.take() == 0.0
+
+    # Idle time never banks more than the burst
+    clock.advance(60.0)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, pytest.approx(2.0)]
+
+
+def test_rate_limit_is_per_client_and_says_when_to_retry(clock):
+    controller = AdmissionController(client_rate=0.5, client_burst=1)
+    with controller.admit('a'):
+        pass
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        with controller.admit('a'):
+            pass
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers == {'Retry-After': '2'}
+
+    with controller.admit('b'):
+        pass
+    clock.advance(2.0)
+    with controller.admit('a'):
+        pass
+    assert controller.stats()['rejected_rate_limited'] == 1
+
+
+def test_unrated_caller_only_contends_for_the_slot(clock):
+    controller = AdmissionController(max_concurrency=1, max_queue=0, client_rate=0.5, client_burst=1)
+    for _ in range(5):
+        with controller.admit('precompute', rate_limited=False):
+            pass
+
+    with ExitStack() as stack:
+        _hold(stack, controller, 'live')
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('precompute', rate_limited=False):
+                pass
+    assert rejected.value.status_code == 503
+    assert controller.stats()['rejected_rate_limited'] == 0
+
+
+def test_full_queue_is_503_with_a_drain_estimate(clock):
+    controller = AdmissionController(max_concurrency=1, max_queue=0)
+    # One 6 s call moves the service-time average from 1 s to 2 s
+    with controller.admit('warm'):
+        clock.advance(6.0)
+
+    with ExitStack() as stack:
+        _hold(stack, controller, 'busy')
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('late'):
+                pass
+    assert rejected.value.status_code == 503
+    assert rejected.value.reason == 'model queue full'
+    assert rejected.value.retry_after == pytest.approx(2.0)
+    assert rejected.value.headers == {'Retry-After': '2'}
+    assert controller.stats()['rejected_queue_full'] == 1
+
+
+def test_queued_request_times_out_with_503(clock):
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    with ExitStack() as stack:
+        _hold(stack, controller, 'busy')
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.admit('late'):
+                pass
+    assert rejected.value.status_code == 503
+    assert rejected.value.reason == 'timed out waiting for model'
+    assert 'Retry-After' in rejected.value.headers
+
+    stats = controller.stats()
+    assert stats['rejected_queue_timeout'] == 1
+    assert stats['queue_depth'] == 0 and stats['active'] == 0
+
+
+def test_queued_request_takes_the_slot_when_it_frees(clock):
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=10)
+    waits = []
+
+    def queued():
+        with controller.admit('late') as queue_wait:
+            waits.append(queue_wait)
+
+    with ExitStack() as stack:
+        _hold(stack, controller, 'busy')
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        while controller.stats()['queue_depth'] == 0:
+            pass
+        clock.advance(3.0)
+    waiter.join(5)
+
+    assert waits == [pytest.approx(3.0)]
+    assert controller.stats()['admitted'] == 2
+
+
+def test_retry_after_rounds_up_to_whole_seconds():
+    assert AdmissionRejected(503, 'busy', 0.2).headers == {'Retry-After': '1'}
+    assert AdmissionRejected(503, 'busy', 2.1).headers == {'Retry-After': '3'}
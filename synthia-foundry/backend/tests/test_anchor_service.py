@@ -0,0 +1,14 @@
+def test_compute_reuses_the_live_snapshot_model(api, client, monkeypatch):
+    import deterministic_responder
+
+    def reread():
+        raise AssertionError('KB file re-read for an anchor write')
+
+    monkeypatch.setattr(deterministic_responder, 'load_model', reread)
+    response = client.post('/anchors', json={
+        'user_id': 'u-snapshot',
+        'birth_timestamp': '1990-09-18T21:34:00Z',
+        'fields': {'soul': {'gate': 6, 'line': 4}},
+    })
+    assert response.status_code == 200
+    assert response.json()['coordinates']['fields']['soul']['planet'] == 'sun'
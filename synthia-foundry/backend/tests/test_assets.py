@@ -0,0 +1,25 @@
+import asyncio
+import hashlib
+
+
+def test_upload_writes_off_the_event_loop(api, client, monkeypatch):
+    import asset_store
+
+    write = asset_store.AssetWriter.write
+    loops = []
+
+    def checked_write(self, block):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return write(self, block)
+
+    monkeypatch.setattr(asset_store.AssetWriter, 'write', checked_write)
+    body = b'chart export ' * 10000
+    response = client.put('/assets', content=body)
+
+    assert response.status_code == 200
+    assert response.json()['sha256'] == hashlib.sha256(body).hexdigest()
+    assert loops and all(loop is None for loop in loops)
+    assert client.get(f"/assets/{response.json()['sha256']}").content == body
@@ -0,0 +1,14 @@
+def test_oversized_prompt_keeps_its_tail(api):
+    assembler = api.ContextAssembler(n_ctx=128, max_tokens=32)
+    prompt = ' '.join(f'word{i}' for i in range(400)) + ' what is my purpose?'
+
+    context = assembler.assemble(prompt, birth_anchor='1990-09-18T21:34:00Z')
+    assert context['truncated']
+    assert context['prompt'].endswith('what is my purpose?')
+    assert context['prompt_tokens'] <= assembler.n_ctx - assembler.max_tokens
+    assert context['dropped'] == ['anchor']
+
+
+def test_prompt_within_budget_is_untouched(api):
+    context = api.ContextAssembler(n_ctx=128, max_tokens=32).assemble('what is my purpose?')
+    assert not context['truncated'] and context['prompt'] == 'what is my purpose?'
@@ -0,0 +1,20 @@
+TEXT = 'Gate 59 breaks down barriers. Intimacy comes from sustained openness.\n\n' * 50
+
+
+def test_ingest_streams_and_scores(client):
+    response = client.post('/chunks/ingest', params={'source': 'notes'}, content=TEXT.encode('utf-8'),
+                           headers={'content-type': 'text/plain'})
+    assert response.status_code == 200
+    assert response.json()['source'] == 'notes'
+
+
+def test_ingest_before_the_kb_loads_is_503(api, client, monkeypatch):
+    monkeypatch.setattr(api.kb_store, 'current', lambda: None)
+    response = client.post('/chunks/ingest', content=TEXT.encode('utf-8'), headers={'content-type': 'text/plain'})
+    assert response.status_code == 503
+
+
+def test_pdf_without_pypdf2_is_415(api, client, monkeypatch):
+    monkeypatch.setattr(api, 'PDF_SUPPORT', False)
+    response = client.post('/chunks/ingest', content=b'%PDF-1.4', headers={'content-type': 'application/pdf'})
+    assert response.status_code == 415
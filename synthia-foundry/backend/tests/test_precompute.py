@@ -0,0 +1,41 @@
+import json
+import sys
+import time
+
+import precompute
+
+PROMPT = 'tell me something'
+
+
+def test_cli_answers_are_served_by_respond(api, monkeypatch, capsys):
+    log_path = api.request_log.path
+    with open(log_path, 'w') as f:
+        for _ in range(3):
+            f.write(json.dumps({'ts': time.time(), 'signature': 'mind|gift|statement|-', 'prompt': PROMPT}) + '\n')
+
+    monkeypatch.setattr(sys, 'argv', [
+        'precompute.py', 'run', '--log', log_path, '--store', api.precompute_store.path, '--min-count', '1',
+    ])
+    precompute.main()
+    report = json.loads(capsys.readouterr().out)
+    assert report['generated'] == 1
+    assert report['model_version'].split(':')[1] != '-'
+
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        assert api.loader.wait(10)
+        assert report['model_version'] == api.current_model_version()
+        result = client.post('/respond', json={'prompt': PROMPT, 'birth_anchor': None, 'extra_context': None}).json()
+
+    assert result['route'] == 'precomputed'
+    assert result['signature'] == 'mind|gift|statement|-'
+
+
+def test_precompute_generation_skips_the_client_rate_limit(api, client):
+    generate = api.precompute_job().generate
+    rejected = api.admission.stats()['rejected_rate_limited']
+    # Well past the per-client burst; only the concurrency slot applies
+    for _ in range(int(api.admission.client_burst) + 3):
+        assert generate(PROMPT)
+    assert api.admission.stats()['rejected_rate_limited'] == rejected
@@ -0,0 +1,31 @@
+def test_sqlite_database_gets_its_schema(api, client):
+    response = client.post('/anchors', json={
+        'user_id': 'u-1',
+        'birth_timestamp': '1990-09-18T21:34:00Z',
+        'fields': {'mind': {'gate': 59, 'line': 2}},
+    })
+    assert response.status_code == 200
+    assert api.repository.get_anchor('u-1')['coordinates']['fields']['mind']['gate'] == 59
+
+
+def test_anchor_pages_cover_every_row(api):
+    api.repository.upsert_anchors([
+        {'user_id': f'page-{i:02d}', 'birth_timestamp': '2000-01-01T00:00:00Z', 'coordinates': {'fields': {}}}
+        for i in range(7)
+    ])
+    user_ids = [user_id for user_id, _ in api.repository.iter_anchor_coordinates(page_size=3)]
+    assert user_ids == sorted(user_ids)
+    assert {f'page-{i:02d}' for i in range(7)} <= set(user_ids)
+
+
+def test_gate_index_is_built_and_kept_current(api, client):
+    # Stored before this client started: comes from the startup build
+    assert 'u-1' in client.get('/gates/59/users').json()['users']
+    client.post('/anchors', json={
+        'user_id': 'transit-1',
+        'birth_timestamp': '1990-09-18T21:34:00Z',
+        'fields': {'mind': {'gate': 59, 'line': 3}},
+    })
+    assert 'transit-1' in client.get('/gates/59/users').json()['users']
+    assert 'transit-1' in client.get('/gates/59/users', params={'line': 3}).json()['users']
+    assert 'transit-1' not in client.get('/gates/59/users', params={'line': 4}).json()['users']
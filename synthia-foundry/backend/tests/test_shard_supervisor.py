@@ -0,0 +1,37 @@
+import threading
+import time
+
+from shard_supervisor import REAP_INTERVAL, ShardSupervisor
+
+
+def _user_on(supervisor, shard):
+    return next(f'u-{i}' for i in range(10000) if supervisor.shard_for(f'u-{i}') == shard)
+
+
+def test_crashed_shard_restarts_under_steady_traffic():
+    with ShardSupervisor(workers=2, context='spawn') as supervisor:
+        supervisor.stats()  # both shards up, so the only idle poll is behind us
+        busy = _user_on(supervisor, 'shard-0')
+        # Let shard-1's feeder thread release the shared outbox lock before the kill
+        time.sleep(0.2)
+        crashed, _ = supervisor._workers['shard-1']
+        stop = threading.Event()
+
+        def traffic():
+            # Keeps the outbox from ever going quiet for a whole poll timeout
+            while not stop.is_set():
+                supervisor.submit(busy, '', op='stats').result(10)
+
+        sender = threading.Thread(target=traffic)
+        sender.start()
+        try:
+            crashed.kill()
+            deadline = time.monotonic() + 20 * REAP_INTERVAL
+            while supervisor._workers['shard-1'][0] is crashed and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            sender.join()
+
+        assert supervisor._workers['shard-1'][0] is not crashed
+        assert supervisor.stats()['shard-1']['users'] == 0
@@ -1,23 +1,449 @@
-
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from llama_cpp import Llama
+from functools import partial
 import os
+import tempfile
+import time
+
+from admission import AdmissionController, AdmissionRejected
+from asset_store import AssetStore, asset_record
+from autotune import AUTOTUNE_PATH, load_tuned_config
+from anchor_service import AnchorService, responder_factory
+from context_assembler import ContextAssembler
+from hybrid_router import HybridRouter
+from ingest import PDF_SUPPORT, ChunkIngestor, ResonanceScorer
+from inference_metrics import InferenceMetrics, server_timing, timed_completion
+from deterministic_responder import KB_PATH
+from kb_snapshot import KnowledgeBaseStore, build_meaning_table
+from model_loader import ModelLoader, ModelNotReady, resolve_factory
+from precompute import IdlePrecomputer, PrecomputedLookup, PrecomputeJob, PrecomputeStore, RequestLog, idle_hours, model_version
+from repository import SQLITE, ConnectionPool, Repository
 
-app = FastAPI()
+MAX_TOKENS = 256
 
 model_path = os.getenv("LLAMA_MODEL_PATH", "tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf")
-llm = Llama(model_path=model_path, n_ctx=2048, n_threads=8)
+# Per-host settings from `python autotune.py run`; explicit env vars still win
+tuned = load_tuned_config(model_path, os.getenv("LLAMA_AUTOTUNE_PATH", AUTOTUNE_PATH))
+loader = ModelLoader(
+    resolve_factory(os.getenv("LLAMA_MODEL_FACTORY")),
+    model_path,
+    n_ctx=int(os.getenv("LLAMA_N_CTX", tuned.get("n_ctx", 2048))),
+    n_threads=int(os.getenv("LLAMA_N_THREADS", tuned.get("n_threads", 0))) or None,
+    n_batch=int(os.getenv("LLAMA_N_BATCH", tuned.get("n_batch", 512))),
+    use_mmap=os.getenv("LLAMA_USE_MMAP", "1") == "1",
+    use_mlock=os.getenv("LLAMA_USE_MLOCK", "0") == "1",
+    warmup_prompt=os.getenv("LLAMA_WARMUP_PROMPT", "Hello"),
+    warmup_tokens=int(os.getenv("LLAMA_WARMUP_TOKENS", "8")),
+)
+
+# Hot-reloaded KB: new versions are built off the request path and swapped in
+kb_store = KnowledgeBaseStore(
+    os.getenv("KB_PATH", KB_PATH),
+    poll_interval=float(os.getenv("KB_POLL_INTERVAL", "5")),
+    warmers={"meaning_table": build_meaning_table} if os.getenv("KB_MEANING_TABLE", "1") == "1" else None,
+)
+kb_responder_factory = partial(responder_factory, kb_store=kb_store)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loader.start()
+    kb_store.start()
+    assets.sweep_tmp()
+    if anchors is not None and GATE_INDEX:
+        # Built before serving so no anchor write can land in a replaced index
+        await run_in_threadpool(anchors.build_gate_index)
+    if precomputer is not None:
+        precomputer.start()
+    yield
+    if precomputer is not None:
+        precomputer.stop()
+    if request_log is not None:
+        request_log.flush()
+    kb_store.stop()
+    if ingestor is not None:
+        ingestor.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# A Llama instance is not reentrant, so concurrency defaults to one slot
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("LLAMA_MAX_CONCURRENCY", "1")),
+    max_queue=int(os.getenv("LLAMA_MAX_QUEUE", "8")),
+    queue_timeout=float(os.getenv("LLAMA_QUEUE_TIMEOUT", "30")),
+    client_rate=float(os.getenv("LLAMA_CLIENT_RATE", "0.5")),
+    client_burst=float(os.getenv("LLAMA_CLIENT_BURST", "5")),
+)
+
+metrics = InferenceMetrics()
+TIMING_HEADERS = os.getenv("INFERENCE_TIMING_HEADERS", "0") == "1"
+
+# Optional persistence: sqlite:///foundry.db locally, postgresql://... in production
+database_url = os.getenv("DATABASE_URL")
+repository = Repository(ConnectionPool.from_url(database_url, int(os.getenv("DATABASE_POOL_SIZE", "4")))) if database_url else None
+if repository is not None and repository.pool.dialect is SQLITE:
+    # Local databases create their own tables; Postgres gets supabase/schema.sql
+    repository.create_schema()
+anchors = AnchorService(repository, kb_store=kb_store) if repository else None
+# Inverted gate → users index for transit fan-out, seeded from user_anchors at startup
+GATE_INDEX = os.getenv("GATE_INDEX", "1") == "1"
+
+# Upload ingestion: chunks scored in worker processes, written in bulk
+ingestor = ChunkIngestor(
+    repository,
+    scorer=None,
+    workers=int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1))),
+    batch_chunks=int(os.getenv("INGEST_BATCH_CHUNKS", "256")),
+) if repository else None
+assets = AssetStore(os.getenv("ASSET_ROOT", "assets"))
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+INGEST_SPOOL_BYTES = int(os.getenv("INGEST_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+def resonance_scorer() -> ResonanceScorer:
+    snapshot = kb_store.current()
+    if snapshot is None:
+        raise HTTPException(status_code=503, detail="knowledge base not loaded yet")
+    return snapshot.cached("resonance_scorer", lambda snapshot: ResonanceScorer.from_model(snapshot.model))
+
+class AnchorWrite(BaseModel):
+    user_id: str
+    birth_timestamp: str
+    fields: dict | None = None
 
 class Query(BaseModel):
     prompt: str
     birth_anchor: str | None
     extra_context: str | None
+    birth_data: dict | None = None
+    knowledge_chunks: list[dict] | None = None
+    user_id: str | None = None
+
+def hydrate(query: Query) -> Query:
+    """Fill chart and chunks for a known user from the DB in one round trip"""
+    if repository is None or not query.user_id:
+        return query
+    if query.birth_data is not None and query.knowledge_chunks is not None:
+        return query
+
+    state = repository.load_user_state(query.user_id, chunk_limit=assembler.top_k)
+    coordinates = anchors.ensure_current(state["anchor"]) if state["anchor"] else None
+    return query.model_copy(update={
+        "birth_data": query.birth_data or coordinates,
+        "knowledge_chunks": query.knowledge_chunks if query.knowledge_chunks is not None else state["chunks"],
+    })
+
+def client_key(request: Request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
+
+def tokenize(text: str) -> list[int]:
+    return loader.get().tokenize(text.encode("utf-8"), add_bos=False)
+
+assembler = ContextAssembler(
+    tokenize,
+    n_ctx=loader.n_ctx,
+    max_tokens=MAX_TOKENS,
+    top_k=int(os.getenv("CONTEXT_TOP_K_CHUNKS", "3")),
+    responder_factory=kb_responder_factory,
+)
+
+def llm_generate(
+    prompt: str,
+    birth_anchor: str | None = None,
+    extra_context: str | None = None,
+    birth_data: dict | None = None,
+    knowledge_chunks: list[dict] | None = None,
+    client_id: str | None = None,
+    timing: dict | None = None,
+    rate_limited: bool = True,
+) -> str:
+    """timing: optional dict filled with this request's phase timings; rate_limited=False skips the client token bucket"""
+    llm = loader.get()
+    context = assembler.assemble(
+        prompt,
+        birth_anchor=birth_anchor,
+        birth_data=birth_data,
+        knowledge_chunks=knowledge_chunks,
+        extra_context=extra_context,
+    )
+    with admission.admit(client_id or "anonymous", rate_limited=rate_limited) as queue_wait:
+        started = time.perf_counter()
+        try:
+            # Streamed so prompt eval (time to first token) and generation can be told apart
+            text, measured = timed_completion(
+                llm(context["prompt"], max_tokens=MAX_TOKENS, stop=["</s>"], stream=True),
+                prompt_tokens=context["prompt_tokens"],
+                queue_wait=queue_wait,
+                started=started,
+            )
+        except Exception:
+            metrics.record_error()
+            raise
+    metrics.record(measured)
+    if timing is not None:
+        timing.update(measured)
+    return text.strip()
+
+def timing_headers(response: Response, timing: dict):
+    if TIMING_HEADERS and timing:
+        response.headers.update(server_timing(timing))
+
+# Offline answers for frequent fallback signatures, keyed by model + KB version
+MODEL_VERSION = model_version(model_path, n_ctx=loader.n_ctx, max_tokens=MAX_TOKENS)
+
+def current_model_version() -> str:
+    snapshot = kb_store.current()
+    return f"{MODEL_VERSION}:{snapshot.version if snapshot else '-'}"
+
+request_log = RequestLog(os.environ["REQUEST_LOG_PATH"]) if os.getenv("REQUEST_LOG_PATH") else None
+precompute_store = PrecomputeStore(os.environ["PRECOMPUTE_DB"]) if os.getenv("PRECOMPUTE_DB") else None
+
+def precompute_should_run() -> bool:
+    """Inside PRECOMPUTE_IDLE_HOURS and nobody waiting on the model"""
+    stats = admission.stats()
+    return in_idle_hours() and stats["active"] == 0 and stats["queue_depth"] == 0
+
+def precompute_job() -> PrecomputeJob:
+    return PrecomputeJob(
+        precompute_store,
+        request_log,
+        # Runs only while the model is idle, so only the concurrency slot applies
+        partial(llm_generate, client_id="precompute", rate_limited=False),
+        current_model_version(),
+        top=int(os.getenv("PRECOMPUTE_TOP", "500")),
+        min_count=int(os.getenv("PRECOMPUTE_MIN_COUNT", "2")),
+        should_run=precompute_should_run,
+    )
+
+in_idle_hours = idle_hours(os.getenv("PRECOMPUTE_IDLE_HOURS", "1-6"))
+precomputer = IdlePrecomputer(precompute_job) if precompute_store and request_log else None
+
+router = HybridRouter(
+    llm_generate,
+    threshold=float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.6")),
+    responder_factory=kb_responder_factory,
+    precomputed=PrecomputedLookup(precompute_store, current_model_version) if precompute_store else None,
+    request_log=request_log,
+)
+# Deterministic answers only change with the KB; ETags (which include the KB version) revalidate them.
+# They are per-user (the chart), so shared caches must not store them
+RESPOND_CACHE_CONTROL = os.getenv("RESPOND_CACHE_CONTROL", "private, max-age=60")
+
+@app.exception_handler(AdmissionRejected)
+def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.reason}, headers=exc.headers)
+
+@app.exception_handler(ModelNotReady)
+def model_not_ready(request: Request, exc: ModelNotReady):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers=exc.headers)
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readyz():
+    status = loader.status()
+    return JSONResponse(status_code=200 if loader.ready else 503, content=status)
 
 @app.post("/llama/generate")
-def generate(query: Query):
-    full_prompt = f"[ANCHOR: {query.birth_anchor}]
-{query.extra_context or ''}{query.prompt}"
-    out = llm(full_prompt, max_tokens=256, stop=["</s>"])
-    text = out["choices"][0]["text"].strip()
+def generate(query: Query, request: Request, response: Response):
+    query = hydrate(query)
+    timing = {}
+    text = llm_generate(
+        query.prompt,
+        birth_anchor=query.birth_anchor,
+        extra_context=query.extra_context,
+        birth_data=query.birth_data,
+        knowledge_chunks=query.knowledge_chunks,
+        client_id=client_key(request),
+        timing=timing,
+    )
+    timing_headers(response, timing)
     return {"response": text}
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match check: "*" or any listed tag, weak (W/) or strong"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+@app.post("/respond")
+def respond(query: Query, request: Request, response: Response):
+    query = hydrate(query)
+    # Deterministic answers are a pure function of (KB version, coordinate, parse):
+    # validate before collapse/compose so a revalidation costs one parse
+    tag = router.etag(query.prompt, query.birth_data)
+    etag = f'"{tag}"' if tag else None
+    if etag and etag_matches(request.headers.get("if-none-match"), etag):
+        router.not_modified()
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": RESPOND_CACHE_CONTROL})
+
+    timing = {}
+    result = router.route(
+        query.prompt,
+        birth_data=query.birth_data,
+        birth_anchor=query.birth_anchor,
+        extra_context=query.extra_context,
+        knowledge_chunks=query.knowledge_chunks,
+        client_id=client_key(request),
+        timing=timing,
+    )
+    timing_headers(response, timing)
+    if etag and result["route"] == "deterministic":
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = RESPOND_CACHE_CONTROL
+    else:
+        response.headers["Cache-Control"] = "no-store"
+    return result
+
+@app.get("/respond")
+def respond_get(request: Request, response: Response, prompt: str, user_id: str):
+    """Cacheable form of POST /respond for stored users (URL is the CDN cache key)"""
+    query = Query(prompt=prompt, birth_anchor=None, extra_context=None, user_id=user_id)
+    return respond(query, request, response)
+
+@app.get("/router/stats")
+def router_stats():
+    return router.stats()
+
+@app.get("/precompute/stats")
+def precompute_stats():
+    if precompute_store is None:
+        raise HTTPException(status_code=404, detail="precompute disabled (set PRECOMPUTE_DB)")
+    return {
+        "model_version": current_model_version(),
+        **precompute_store.stats(current_model_version()),
+        "last_run": precomputer.last_run if precomputer else None,
+    }
+
+@app.get("/admission/stats")
+def admission_stats():
+    return admission.stats()
+
+@app.get("/inference/stats")
+def inference_stats():
+    return metrics.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return metrics.render_prometheus()
+
+@app.get("/kb/stats")
+def kb_stats():
+    return kb_store.stats()
+
+@app.post("/kb/reload")
+def kb_reload():
+    return {"reloaded": kb_store.reload(), **kb_store.stats()}
+
+@app.post("/anchors")
+def store_anchor(anchor: AnchorWrite):
+    if anchors is None:
+        raise HTTPException(status_code=501, detail="DATABASE_URL is not configured")
+    try:
+        coordinates = anchors.store_anchor(anchor.user_id, anchor.birth_timestamp, anchor.fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"user_id": anchor.user_id, "coordinates": coordinates}
+
+@app.get("/gates/{gate}/users")
+def gate_users(gate: int, line: int | None = None, limit: int = 1000):
+    """Users with a gate (optionally on one line) active, from the posting lists"""
+    if anchors is None or anchors.gate_index is None:
+        raise HTTPException(status_code=501, detail="gate index disabled (needs DATABASE_URL and GATE_INDEX=1)")
+    if not 1 <= gate <= 64 or (line is not None and not 1 <= line <= 6):
+        raise HTTPException(status_code=422, detail="gate must be 1-64 and line 1-6")
+    index = anchors.gate_index
+    return {"gate": gate, "line": line, "count": index.count(gate, line), "users": index.users_with(gate, line)[:limit]}
+
+@app.get("/gates/stats")
+def gate_index_stats():
+    if anchors is None or anchors.gate_index is None:
+        raise HTTPException(status_code=501, detail="gate index disabled (needs DATABASE_URL and GATE_INDEX=1)")
+    return anchors.gate_index.stats()
+
+@app.post("/chunks/ingest")
+async def ingest_chunks(request: Request, user_id: str | None = None, source: str | None = None):
+    """Raw document body (text/plain, or application/pdf) → scored knowledge_chunks"""
+    if ingestor is None:
+        raise HTTPException(status_code=501, detail="DATABASE_URL is not configured")
+
+    is_pdf = request.headers.get("content-type", "").startswith("application/pdf")
+    if is_pdf and not PDF_SUPPORT:
+        raise HTTPException(status_code=415, detail="PDF ingest needs PyPDF2; send text/plain")
+    # Before reading the body: no KB, no scoring
+    scorer = await run_in_threadpool(resonance_scorer)
+    # Spooled: small uploads stay in memory, large ones go to disk as they arrive
+    # (off the event loop, since a write past INGEST_SPOOL_BYTES hits the disk)
+    with tempfile.SpooledTemporaryFile(max_size=INGEST_SPOOL_BYTES, suffix=".pdf" if is_pdf else ".txt") as spool:
+        async for block in request.stream():
+            await run_in_threadpool(spool.write, block)
+        spool.seek(0)
+
+        def run():
+            ingestor.set_scorer(scorer)
+            coordinates = anchors.load_coordinates(user_id) if user_id else None
+            kwargs = {"user_id": user_id, "coordinates": coordinates, "source": source}
+            if is_pdf:
+                # PyPDF2 needs a seekable file with a name
+                with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+                    while block := spool.read(1024 * 1024):
+                        pdf.write(block)
+                    pdf.flush()
+                    stats = ingestor.ingest_file(pdf.name, **kwargs)
+            else:
+                stats = ingestor.ingest_stream(spool, **kwargs)
+            return {**stats, "resonance_scored": coordinates is not None}
+
+        stats = await run_in_threadpool(run)
+    return {"user_id": user_id, "source": source, **stats}
+
+def record_asset(name: str | None, manifest: dict) -> dict:
+    result = {k: v for k, v in manifest.items() if k != "chunks"}
+    if repository is not None and name:
+        result["asset_id"] = repository.insert_assets([asset_record(name, assets, manifest)])[0]
+    return result
+
+@app.put("/assets")
+async def upload_asset(request: Request, name: str | None = None):
+    """Raw body → content-addressed object (stored once per distinct content)"""
+    # Hashing and disk I/O stay off the event loop, as in ingest
+    writer = await run_in_threadpool(assets.open_writer)
+    try:
+        async for block in request.stream():
+            await run_in_threadpool(writer.write, block)
+        manifest = await run_in_threadpool(writer.commit)
+    except BaseException:
+        writer.abort()
+        raise
+    return await run_in_threadpool(record_asset, name, manifest)
+
+@app.put("/assets/{sha256}")
+def link_asset(sha256: str, name: str | None = None):
+    """Record an upload of content the store already holds (check with HEAD first, send no body)"""
+    if not assets.exists(sha256):
+        raise HTTPException(status_code=404, detail="unknown object; PUT /assets with the body instead")
+    size = os.path.getsize(assets.path(sha256))
+    return record_asset(name, {"sha256": sha256, "size": size, "deduplicated": True})
+
+@app.api_route("/assets/{sha256}", methods=["GET", "HEAD"])
+def get_asset(sha256: str, request: Request):
+    if not assets.exists(sha256):
+        raise HTTPException(status_code=404, detail="no such asset")
+    etag = f'"{sha256}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ASSET_CACHE_CONTROL})
+    # FileResponse streams from disk (zero-copy where the server supports pathsend)
+    return FileResponse(
+        assets.path(sha256),
+        media_type="application/octet-stream",
+        headers={"ETag": etag, "Cache-Control": ASSET_CACHE_CONTROL},
+    )
+
+@app.get("/assets")
+def asset_stats():
+    return assets.summary()
@@ -23,3 +23,13 @@ CREATE TABLE foundry_assets (
   manifest JSONB,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
+
+-- One anchor per user; lets the backend upsert with ON CONFLICT (user_id)
+CREATE UNIQUE INDEX user_anchors_user_id_key ON user_anchors (user_id);
+CREATE INDEX user_anchors_created_at_idx ON user_anchors (created_at);
+
+-- Per-user top-k chunk lookup by resonance
+CREATE INDEX knowledge_chunks_user_id_idx ON knowledge_chunks (user_id, axis_resonance DESC NULLS LAST);
+CREATE INDEX knowledge_chunks_created_at_idx ON knowledge_chunks (created_at);
+
+CREATE INDEX foundry_assets_created_at_idx ON foundry_assets (created_at);
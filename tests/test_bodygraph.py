@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from bodygraph import (
+    AUTHORITIES, CENTERS, SPLITS, TYPES, definition, definition_many, gate_mask, mask_centers, mask_channels
+)
+
+
+def test_no_channels_is_a_reflector():
+    result = definition([1, 2, 3, 64])
+    assert result['type'] == 'Reflector'
+    assert result['authority'] == 'Lunar'
+    assert result['definition'] == 'None'
+    assert result['channels'] == [] and result['defined_centers'] == []
+    assert result['open_centers'] == CENTERS
+
+
+def test_sacral_motor_to_throat_is_a_manifesting_generator():
+    # 34-20 joins the Sacral straight to the Throat
+    result = definition([34, 20])
+    assert result['type'] == 'Manifesting Generator'
+    assert result['authority'] == 'Sacral'
+    assert result['definition'] == 'Single'
+    assert result['channels'] == [(20, 34)]
+    assert result['defined_centers'] == ['Throat', 'Sacral']
+
+
+def test_defined_solar_plexus_is_emotional_authority():
+    # 6-59 defines the Solar Plexus and the Sacral, neither reaching the Throat
+    result = definition([6, 59])
+    assert result['type'] == 'Generator'
+    assert result['authority'] == 'Emotional'
+    assert result['defined_centers'] == ['Sacral', 'Solar Plexus']
+
+
+@pytest.mark.parametrize('gates, kind, authority, split', [
+    ([21, 45], 'Manifestor', 'Ego Manifested', 'Single'),
+    ([1, 8, 47, 64], 'Projector', 'Self-Projected', 'Split'),
+    ([47, 64, 17, 62], 'Projector', 'Mental', 'Single'),
+])
+def test_known_definitions(gates, kind, authority, split):
+    result = definition(gates)
+    assert (result['type'], result['authority'], result['definition']) == (kind, authority, split)
+
+
+def test_definition_many_matches_definition_row_by_row():
+    rng = random.Random(7)
+    charts = [rng.sample(range(1, 65), rng.randint(0, 30)) for _ in range(300)]
+    batch = definition_many(np.array([gate_mask(gates) for gates in charts], dtype=np.uint64))
+
+    for row, gates in enumerate(charts):
+        single = definition(gates)
+        assert TYPES[batch['type'][row]] == single['type']
+        assert AUTHORITIES[batch['authority'][row]] == single['authority']
+        assert SPLITS[batch['split'][row]] == single['definition']
+        assert mask_channels(batch['channels'][row]) == single['channels']
+        assert mask_centers(batch['centers'][row]) == single['defined_centers']
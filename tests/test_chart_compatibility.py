@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from bodygraph import CENTER_CHANNEL_MASKS, CHANNELS
+from chart_compatibility import CompatibilityEngine, ChartMatrix, top_matches
+from memory_accounting import random_chart
+
+
+def _gates(chart):
+    return {field['gate'] for field in chart['fields'].values()}
+
+
+def _brute_score(a, b, weights):
+    """Pair score straight from gate sets, no bitmasks"""
+    complete = lambda gates: {c for c, (lo, hi) in enumerate(CHANNELS) if lo in gates and hi in gates}
+    em = {
+        c for c, (lo, hi) in enumerate(CHANNELS)
+        if (lo in a and hi not in a and hi in b and lo not in b) or (hi in a and lo not in a and lo in b and hi not in b)
+    }
+    channels = complete(a) | complete(b) | em
+    centers = [i for i, mask in enumerate(CENTER_CHANNEL_MASKS) if any(int(mask) >> c & 1 for c in channels)]
+    return (len(a & b) * weights['shared_gates'] + len(em) * weights['electromagnetic']
+            + len(centers) * weights['composite_centers'])
+
+
+def test_top_k_matches_brute_force_on_a_small_population():
+    rng = random.Random(3)
+    charts = [random_chart(rng) for _ in range(40)]
+    engine = CompatibilityEngine(ChartMatrix.from_charts(charts))
+    # Small blocks and chunks so the running top-k crosses every boundary
+    idx, scores = engine.top_k(k=5, block_size=7, chunk_size=9)
+
+    gates = [_gates(chart) for chart in charts]
+    for i in range(len(charts)):
+        expected = sorted(
+            (_brute_score(gates[i], gates[j], engine.weights) for j in range(len(charts)) if j != i), reverse=True
+        )[:5]
+        assert scores[i].tolist() == pytest.approx(expected)
+        assert i not in idx[i]
+        for j, score in zip(idx[i], scores[i]):
+            assert _brute_score(gates[i], gates[j], engine.weights) == pytest.approx(score)
+
+
+@pytest.mark.parametrize('n', [0, 1])
+def test_top_k_on_fewer_than_two_charts_is_empty(n):
+    charts = [random_chart(random.Random(i)) for i in range(n)]
+    idx, scores = CompatibilityEngine(ChartMatrix.from_charts(charts)).top_k(k=10)
+    assert idx.shape == scores.shape == (n, 0)
+    assert top_matches(charts) == [[] for _ in range(n)]
+
+
+def test_same_line_and_color_needs_the_same_gate():
+    a = {'fields': {'mind': {'gate': 10, 'line': 3, 'color': 2}, 'body': {'gate': 20, 'line': 1, 'color': 1}}}
+    b = {'fields': {'mind': {'gate': 11, 'line': 3, 'color': 2}, 'body': {'gate': 20, 'line': 1, 'color': 1}}}
+    detail = CompatibilityEngine(ChartMatrix.from_charts([a, b])).pair_detail(0, 1)
+    assert detail['same_line_and_color_fields'] == ['body']
@@ -0,0 +1,42 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from chart_store import DEFAULT_FIELDS, MAX_PACKED_COLUMNS, ChartStore
+from memory_accounting import random_chart
+
+
+def _store(tmp_path, n=500):
+    rng = random.Random(1)
+    store = ChartStore(str(tmp_path))
+    charts = [random_chart(rng) for _ in range(n)]
+    store.append(charts, cohorts=(f'c{i % 3}' for i in range(n)))
+    return store, charts
+
+
+def test_reopen_trims_rows_past_the_published_count(tmp_path):
+    store, _ = _store(tmp_path, 10)
+    # A crash after some columns were appended but before meta.json was
+    with open(store._column_path('soul.gate'), 'ab') as f:
+        f.write(bytes(5))
+    with open(store._column_path('cohort'), 'ab') as f:
+        f.write(bytes(10))
+
+    store = ChartStore(str(tmp_path))
+    store.append_columns({'soul.gate': np.full(3, 7, dtype=np.uint8)})
+    for name in store._column_names():
+        assert store._column_path(name).stat().st_size == 13 * (2 if name == 'cohort' else 1)
+    assert store.column('soul', 'gate')[10:].tolist() == [7, 7, 7]
+
+
+def test_top_combinations_beyond_the_packed_width(tmp_path):
+    store, charts = _store(tmp_path)
+    for fields in (DEFAULT_FIELDS[:3], DEFAULT_FIELDS):
+        assert (len(fields) > MAX_PACKED_COLUMNS) == (fields is DEFAULT_FIELDS)
+        columns = [(field, 'line') for field in fields]
+        expected = Counter(tuple(chart['fields'][field]['line'] for field in fields) for chart in charts)
+
+        top = store.top_combinations(columns, top=5)
+        assert [count for _, count in top] == sorted(expected.values(), reverse=True)[:5]
+        assert all(expected[values] == count for values, count in top)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from design_solver import DesignSolver, solar_longitude
+
+BIRTHS = np.array(['1990-09-19T04:34', 'NaT', '2001-01-01T00:00'], dtype='datetime64[s]')
+
+
+class CallableSun:
+    """Not the built-in SolarEphemeris, so the solver takes the sun= path"""
+    bodies = ('sun',)
+
+    def longitudes(self, jd_ut, bodies):
+        return {'sun': solar_longitude(jd_ut)}
+
+
+def test_nat_rows_are_masked_not_fatal():
+    result = DesignSolver().solve(BIRTHS)
+    alone = DesignSolver().solve(BIRTHS[[0, 2]])
+
+    assert np.isnat(result['design_utc'][1]) and np.isnan(result['design_jd'][1])
+    assert (result['design_utc'][[0, 2]] == alone['design_utc']).all()
+    for side in ('personality', 'design'):
+        soul = result[side]['soul']
+        assert soul['gate'][1] == 0 and np.isnan(soul['longitude'][1])
+        assert (soul['gate'][[0, 2]] == alone[side]['soul']['gate']).all()
+
+
+def test_nat_rows_with_another_ephemeris():
+    result = DesignSolver(CallableSun()).solve(BIRTHS)
+    assert np.isnat(result['design_utc']).tolist() == [False, True, False]
+
+
+def test_all_nat_batch():
+    result = DesignSolver().solve(np.array(['NaT'], dtype='datetime64[s]'))
+    assert np.isnat(result['design_utc']).all()
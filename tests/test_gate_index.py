@@ -0,0 +1,72 @@
+import random
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from gate_index import DEFAULT_FIELDS, GateIndex
+
+
+def _chart(rng):
+    return {field: {'gate': rng.randint(1, 64), 'line': rng.randint(1, 6)} for field in DEFAULT_FIELDS}
+
+
+def _expected(charts, gate, line=None):
+    return sorted(user for user, chart in charts.items()
+                  if any(a['gate'] == gate and (line is None or a['line'] == line) for a in chart.values()))
+
+
+@pytest.fixture
+def eager_switching():
+    """Switch threads as often as possible so unguarded read-modify-writes interleave"""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def test_concurrent_upserts_and_reads(eager_switching):
+    index = GateIndex(compact_every=500)
+    charts = {}
+    errors = []
+    done = threading.Event()
+
+    def writer(worker):
+        rng = random.Random(worker)
+        for i in range(800):
+            # Mostly new users (numbering and growth), some replaced ones
+            user = f'w{worker}-{i % 600}'
+            chart = _chart(rng)
+            index.upsert(user, chart)
+            charts[user] = chart
+
+    def reader():
+        rng = random.Random(99)
+        try:
+            while not done.is_set():
+                numbers = index.postings(rng.randint(1, 64), rng.choice([None, 1, 2, 3, 4, 5, 6]))
+                assert (np.diff(numbers.astype(np.int64)) > 0).all()
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    writers = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert not errors
+    # Every new user got its own internal number
+    assert len(index) == len(set(index.user_ids)) == len(charts) == 2400
+    for gate in range(1, 65):
+        assert sorted(index.users_with(gate)) == _expected(charts, gate)
+        assert sorted(index.users_with(gate, 3)) == _expected(charts, gate, 3)
+
+    index.compact()
+    for gate in (1, 32, 64):
+        assert sorted(index.users_with(gate)) == _expected(charts, gate)
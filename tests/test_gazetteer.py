@@ -0,0 +1,27 @@
+import pytest
+
+from gazetteer import Gazetteer, local_to_utc
+
+
+@pytest.fixture(scope='module')
+def gazetteer():
+    return Gazetteer.load()
+
+
+def test_qualifiers_narrow_the_match(gazetteer):
+    place = gazetteer.resolve('San Francisco, CA')
+    assert (place.country, place.timezone) == ('US', 'America/Los_Angeles')
+    assert gazetteer.resolve('Paris, FR').timezone == 'Europe/Paris'
+
+
+@pytest.mark.parametrize('query', ['Paris, TX', 'London, ON'])
+def test_unmatched_qualifiers_do_not_fall_back(gazetteer, query):
+    # Same-name cities elsewhere would convert the birth with a wrong offset
+    assert gazetteer.resolve(query) is None
+    assert gazetteer.resolve_many([query])[0] == -1
+    assert gazetteer.resolve_birth({'birth_date': '1990-09-18', 'birth_time': '21:34', 'location': query}) is None
+
+
+def test_historical_offsets():
+    # Pacific Daylight Time in September 1990
+    assert local_to_utc('1990-09-18', '21:34', 'America/Los_Angeles').isoformat() == '1990-09-19T04:34:00+00:00'
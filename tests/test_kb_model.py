@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from deterministic_responder import KB_PATH
+from enrich_knowledge_base import POWER_TEMPLATES, power_params, render_power_expressions
+from kb_model import POWER_STATES, KnowledgeBaseModel
+
+
+@pytest.fixture(scope='module')
+def kb():
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def template_kb(kb):
+    """Same KB in the shared-templates layout"""
+    gates = {
+        number: dict({k: v for k, v in data.items() if k != 'power_expressions'}, power_params=power_params(data))
+        for number, data in kb['gates'].items()
+    }
+    return dict(kb, gates=gates, power_templates=POWER_TEMPLATES)
+
+
+def _assert_power(model, kb):
+    templates = kb.get('power_templates', POWER_TEMPLATES)
+    for number, data in kb['gates'].items():
+        power = model.gates[int(number)].power
+        expected = data.get('power_expressions') or render_power_expressions(templates, data['power_params'])
+        for state in POWER_STATES:
+            assert (power[state].feels, power[state].looks, power[state].scenarios) == \
+                tuple(expected[state][aspect] for aspect in ('feels', 'looks', 'scenarios'))
+
+
+def test_pre_rendered_power_expressions(kb):
+    _assert_power(KnowledgeBaseModel.from_dict(kb), kb)
+
+
+def test_power_expressions_render_on_first_access(template_kb):
+    model = KnowledgeBaseModel.from_dict(template_kb)
+    assert all(gate._power is None for gate in model.gates[1:])
+
+    _assert_power(model, template_kb)
+    # Recently used gates are served from the cache
+    assert model.gates[1].power is model.gates[1].power
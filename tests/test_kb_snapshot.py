@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+import pytest
+
+from deterministic_responder import KB_PATH
+from kb_snapshot import KnowledgeBaseStore
+
+
+@pytest.fixture
+def kb():
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _publish(path, kb):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(kb, f)
+    os.replace(tmp, path)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_bad_file_keeps_the_old_snapshot_and_the_watcher_alive(tmp_path, kb):
+    path = str(tmp_path / 'kb.json')
+    _publish(path, kb)
+    store = KnowledgeBaseStore(path, poll_interval=0.02).start()
+    try:
+        good = store.current()
+        assert good is not None
+
+        # Parses, but the model cannot be built from it
+        broken = json.loads(json.dumps(kb))
+        del broken['gates']['1']['name']
+        _publish(path, broken)
+        assert _wait_for(lambda: store.failures == 1)
+        assert store.last_error.startswith('KeyError')
+        assert store.current() is good
+        assert store.stats()['watching']
+
+        kb['version'] = 'next'
+        _publish(path, kb)
+        assert _wait_for(lambda: store.current() is not good)
+        assert store.current().model.version == 'next'
+        assert store.last_error is None
+    finally:
+        store.stop()
+
+
+def test_failing_warmer_is_recorded(tmp_path, kb):
+    path = str(tmp_path / 'kb.json')
+    _publish(path, kb)
+
+    def warmer(snapshot):
+        raise RuntimeError('warm-up failed')
+
+    store = KnowledgeBaseStore(path, warmers={'broken': warmer})
+    assert store.reload() is False
+    assert store.current() is None
+    assert store.last_error == 'RuntimeError: warm-up failed'
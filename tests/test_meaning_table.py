@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from kb_snapshot import KnowledgeBaseSnapshot, build_meaning_table
+
+
+@pytest.fixture(scope='module')
+def table():
+    return build_meaning_table(KnowledgeBaseSnapshot.load())
+
+
+@pytest.mark.parametrize('coordinate', [
+    {'gate': 65, 'line': 1},
+    {'gate': 0, 'line': 1},
+    {'gate': 1, 'line': 7},
+    {'gate': 1, 'line': 1, 'color': 7},
+    {'gate': 1, 'line': 1, 'tone': 0},
+    {'gate': 1, 'line': 1, 'base': 6},
+])
+def test_out_of_range_coordinates_raise_key_error(table, coordinate):
+    with pytest.raises(KeyError):
+        table.index(coordinate)
+
+
+def test_corners_and_vectorized_indices_agree(table):
+    first = {'gate': 1, 'line': 1, 'color': 1, 'tone': 1, 'base': 1}
+    last = {'gate': 64, 'line': 6, 'color': 6, 'tone': 6, 'base': 5}
+    assert (table.index(first), table.index(last)) == (0, 64 * 6 * 6 * 6 * 5 - 1)
+
+    columns = [np.array([first[axis], last[axis]]) for axis in ('gate', 'line', 'color', 'tone', 'base')]
+    assert table.indices(*columns).tolist() == [0, 64 * 6 * 6 * 6 * 5 - 1]
+    columns[2] = np.array([1, 7])
+    with pytest.raises(KeyError, match='color 7'):
+        table.indices(*columns)
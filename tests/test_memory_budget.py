@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from deterministic_responder import DeterministicResponder
+from kb_snapshot import KnowledgeBaseSnapshot, build_meaning_table
+from memory_accounting import (
+    MEMORY_BUDGETS, chart_document, check_budgets, deep_sizeof, load_model, random_chart, tenant_rss
+)
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    return KnowledgeBaseSnapshot.load()
+
+
+def test_snapshot_fits_its_budget(snapshot):
+    assert check_budgets({'snapshot': deep_sizeof(snapshot)}) == []
+
+
+def test_model_fits_its_budget():
+    assert check_budgets({'model': deep_sizeof(load_model())}) == []
+
+
+def test_meaning_table_fits_its_budget(snapshot):
+    assert check_budgets({'meaning_table': build_meaning_table(snapshot).nbytes()}) == []
+
+
+def test_check_budgets_reports_overruns():
+    violations = check_budgets({'snapshot': MEMORY_BUDGETS['snapshot'] + 1})
+    assert len(violations) == 1 and violations[0].startswith('snapshot:')
+
+
+def test_per_tenant_cost_on_a_shared_snapshot(snapshot):
+    rng = random.Random(0)
+    n = 50
+    charts = [random_chart(rng) for _ in range(n)]
+    responders = [DeterministicResponder(chart, snapshot=snapshot) for chart in charts]
+    documents = [chart_document(chart, model=snapshot.model) for chart in charts]
+
+    # What each extra tenant adds on top of the one snapshot they all share
+    results = {
+        'responder_shared_kb': deep_sizeof(responders, exclude=[snapshot]) // n,
+        'chart': deep_sizeof(documents, exclude=[snapshot]) // n,
+        'tenant_rss_growth': tenant_rss(200, shared_kb=True)['rss_growth_per_tenant'],
+    }
+    assert check_budgets(results) == []
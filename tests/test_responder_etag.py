@@ -0,0 +1,16 @@
+import random
+
+from deterministic_responder import DeterministicResponder
+from kb_snapshot import KnowledgeBaseSnapshot
+from memory_accounting import random_chart
+
+CHART = random_chart(random.Random(3))
+PROMPT = 'How do I make clear decisions with my mind?'
+
+
+def test_etag_without_snapshot_uses_the_kb_content_hash():
+    snapshot = KnowledgeBaseSnapshot.load()
+    standalone = DeterministicResponder(CHART)
+
+    assert standalone.kb_version == snapshot.version
+    assert standalone.etag(PROMPT) == DeterministicResponder(CHART, snapshot=snapshot).etag(PROMPT)